@@ -2,14 +2,15 @@ import streamlit as st
 import json
 import subprocess
 
-def save_parameters(number_of_agents, infection_rate, initial_infected, recovery_period, quarantine_visit_proba):
+def save_parameters(number_of_agents, infection_rate, initial_infected, recovery_period, quarantine_visit_proba, seed):
     """Zapisuje parametry do pliku JSON."""
     parameters = {
         "number_of_agents": number_of_agents,
         "infection_rate": infection_rate,
         "initial_infected": initial_infected,
         "recovery_period": recovery_period,
-        "quarantine_visit_proba": quarantine_visit_proba
+        "quarantine_visit_proba": quarantine_visit_proba,
+        "seed": seed
     }
 
     with open("parameters.json", "w") as file:
@@ -66,6 +67,8 @@ def main_page():
             format="%.2f",
             key="quarantine_visit_proba_input"
         )
+        # Te same parametry i ziarno dają ten sam wynik, więc jest on brany z pamięci podręcznej zamiast liczony
+        seed_value = st.number_input("Ziarno losowania", min_value=0, step=1, key="seed_input")
 
     def run_simulation(script_path):
         try:
@@ -85,5 +88,5 @@ def main_page():
             st.error("Nie znaleziono pliku symulacji. Sprawdź ścieżkę.")
 
     if st.button("Rozpocznij", key="start_button"):
-        save_parameters(number_of_agents_value, infection_rate_value, initial_infected_value, recovery_period_value, quarantine_visit_proba_value)
+        save_parameters(number_of_agents_value, infection_rate_value, initial_infected_value, recovery_period_value, quarantine_visit_proba_value, seed_value)
         st.session_state["page"] = "next"
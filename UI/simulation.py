@@ -3,21 +3,42 @@ import json
 import base64
 import subprocess
 import os
+import sys
 
 base_dir = os.path.dirname(os.path.abspath(__file__))
-FILE_PATH = os.path.join(base_dir, '..', 'vis.gif')
+ROOT_DIR = os.path.join(base_dir, '..')
+sys.path.append(ROOT_DIR)
 
+from config import Config, SIMULATION_STEPS
+from result_cache import ResultCache, result_key
+
+RESULT_FILES = ('vis.gif', 'plot/distributions_plot.png', 'plot/rates_plot.png', 'plot/state_history_plot.png')
+
+
+def simulation_results():
+    """Katalog z wynikami dla parametrów z parameters.json - z pamięci podręcznej albo po uruchomieniu main.py."""
+    with open(os.path.join(ROOT_DIR, 'parameters.json'), 'r') as file:
+        config = Config(json.load(file))
+    cache = ResultCache(os.path.join(ROOT_DIR, '.cache', 'results'))
+    key = result_key(config, SIMULATION_STEPS)
+
+    results = cache.get(key, RESULT_FILES) if key is not None else None
+    if results is None:
+        ## run the simulation - instead of python, type the dir to the python.exe in the venv
+        with st.spinner("Trwa symulacja..."):
+            subprocess.run([sys.executable, os.path.join(ROOT_DIR, 'main.py')], cwd=ROOT_DIR, check=True)
+        results = cache.get(key, RESULT_FILES) if key is not None else None
+    return results if results is not None else ROOT_DIR
 
 
 def simulation():
-    """Wyświetla plik .gif utworzony po uruchomieniu symulacji."""
+    """Wyświetla plik .gif i wykresy utworzone przez symulację dla bieżących parametrów."""
 
     # st.title("Symulacja:")
 
-    ## run the simulation - instead of python, type the dir to the python.exe in the venv
-    # subprocess.run(["python", os.path.join(base_dir, '..', 'main.py')])
+    results_dir = simulation_results()
 
-    file_ = open(FILE_PATH, "rb")
+    file_ = open(os.path.join(results_dir, 'vis.gif'), "rb")
     contents = file_.read()
     data_url = base64.b64encode(contents).decode("utf-8")
     file_.close()
@@ -30,9 +51,9 @@ def simulation():
     st.title("Wykresy:")
 
     image_paths = [
-        os.path.join(base_dir, '..', 'plot', 'distributions_plot.png'),
-        os.path.join(base_dir, '..', 'plot', 'rates_plot.png'),
-        os.path.join(base_dir, '..', 'plot', 'state_history_plot.png')
+        os.path.join(results_dir, 'plot', 'distributions_plot.png'),
+        os.path.join(results_dir, 'plot', 'rates_plot.png'),
+        os.path.join(results_dir, 'plot', 'state_history_plot.png')
     ]
 
     for image_path in image_paths:
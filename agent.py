@@ -1,70 +1,125 @@
 import random
-import pygame
 import math
 import numpy as np
 
-from functions import age_immunity_loss_proba, age_infection_proba, age_mortality_proba, age_recovery_proba, gender_immunity_loss_proba, gender_infection_proba, gender_mortality_proba, gender_recovery_proba, mask_immunity_loss_proba, mask_infection_proba, mask_mortality_proba, mask_recovery_proba, vaccinated_immunity_loss_proba, vaccinated_infection_proba, vaccinated_mortality_proba, vaccinated_recovery_proba
+from engine import AGENT_SIZE, AGENT_SPEED, QUICK_TRAVEL_FRAMES, STATES
+from functions import RATE_FUNCTIONS, compute_rate, compute_rates
+
+AGE_MEAN = 40  # Parametry rozkładu normalnego wieku agentów (wiek jest obcinany do liczby całkowitej >= 0)
+AGE_STD_DEV = 10
 
 
 class Agent:
-    def __init__(self, id, x, y, config, state="S"):
+    def __init__(self, id, x, y, config, state="S", rng=None, attributes=None):
+        self.rng = rng if rng is not None else random  # Generator liczb losowych (random.Random albo moduł random)
         self.id = id  # Unikalny identyfikator agenta
         self.state = state  # Stan agenta: S, E, I, R, D
         self.x = x  # Pozycja X
         self.y = y  # Pozycja Y
         self.destination_x = 0
         self.destination_y = 0   # Użyte do quick travel
-        self.size = 5  # Rozmiar agenta
-        self.speed = 2
-        self.time_in_state = 0  # Czas spędzony w aktualnym stanie
+        self.size = AGENT_SIZE  # Rozmiar agenta
+        self.speed = AGENT_SPEED
+        self.state_entered_at = 0  # Tick wejścia w aktualny stan (czas w stanie to tick - state_entered_at)
         self.direction_x, self.direction_y = self.assign_random_direction()
         self.central_location = None
         self.quick_travelling = False
         self.quick_travelling_counter = 0
-        self.quick_travel_frames = 15
+        self.quick_travel_frames = QUICK_TRAVEL_FRAMES
         self.time_to_spend_in_central_location = 0
         self.quarantined = False
 
         self.config = config
-        
-        self.age = self.assign_age()
-        self.gender = self.assign_gender()
-        self.vaccinated = self.assign_vaccination()
-        self.mask = self.assign_mask()
-
-    def assign_age(self, mean=40, std_dev=10):
-        return max(0, int(np.random.normal(mean, std_dev)))
+        self.rates = {}  # Zapamiętane prawdopodobieństwa przejść: nazwa -> (bazowa wartość z Config, wynik)
+
+        # Cechy (wiek, płeć, szczepienie, maseczka) podane z góry, np. z population.py, albo losowane
+        if attributes is not None:
+            self.age, self.gender, self.vaccinated, self.mask = attributes
+        else:
+            self.age = self.assign_age()
+            self.gender = self.assign_gender()
+            self.vaccinated = self.assign_vaccination()
+            self.mask = self.assign_mask()
+
+    def assign_age(self, mean=AGE_MEAN, std_dev=AGE_STD_DEV):
+        return max(0, int(self.rng.gauss(mean, std_dev)))
     
     def assign_gender(self):
-        gender_value = np.random.uniform(-1, 1)
+        gender_value = self.rng.uniform(-1, 1)
         return 'Male' if gender_value < 0 else 'Female'
     
     def assign_vaccination(self):
-        vaccinated_value = np.random.random()
+        vaccinated_value = self.rng.random()
         return 'True' if vaccinated_value < self.config.vaccinated_proba else 'False'
     
     def assign_mask(self):
-        mask_value =  np.random.random()
+        mask_value =  self.rng.random()
         return 'True' if mask_value < self.config.mask_wearing_proba else 'False'
     
+    @property
+    def age(self):
+        return self._age
+
+    @age.setter
+    def age(self, value):
+        self._age = value
+        self.rates = {}
+
+    @property
+    def gender(self):
+        return self._gender
+
+    @gender.setter
+    def gender(self, value):
+        self._gender = value
+        self.rates = {}
+
+    @property
+    def vaccinated(self):
+        return self._vaccinated
+
+    @vaccinated.setter
+    def vaccinated(self, value):
+        self._vaccinated = value
+        self.rates = {}
+
+    @property
+    def mask(self):
+        return self._mask
+
+    @mask.setter
+    def mask(self, value):
+        self._mask = value
+        self.rates = {}
+
+    def rate(self, name, config):
+        """Zwraca prawdopodobieństwo przejścia `name`, licząc je ponownie tylko po zmianie atrybutu agenta
+        albo bazowej wartości w Config."""
+        base_rate = getattr(config, RATE_FUNCTIONS[name][0])
+        cached = self.rates.get(name)
+        if cached is None or cached[0] != base_rate:
+            cached = (base_rate, compute_rate(name, base_rate, self.age, self.gender, self.vaccinated, self.mask))
+            self.rates[name] = cached
+        return cached[1]
+
     def compute_infection_rate(self, config):
-        return max(0, min(config.infection_rate + age_infection_proba(self.age) + gender_infection_proba(self.gender) + vaccinated_infection_proba(self.vaccinated) + mask_infection_proba(self.mask), 1))
+        return self.rate('infection', config)
     
     def compute_recovery_rate(self, config):
-        return max(0, min(config.recovery_rate + age_recovery_proba(self.age) + gender_recovery_proba(self.gender) + vaccinated_recovery_proba(self.vaccinated) + mask_recovery_proba(self.mask), 1))
+        return self.rate('recovery', config)
     
     def compute_mortality_rate(self, config):
-        return max(0, min(config.mortality_rate + age_mortality_proba(self.age) + gender_mortality_proba(self.gender) + vaccinated_mortality_proba(self.vaccinated) + mask_mortality_proba(self.mask), 1))
+        return self.rate('mortality', config)
     
     def compute_immunity_loss_rate(self, config):
-        return max(0, min(config.immunity_loss_rate + age_immunity_loss_proba(self.age) + gender_immunity_loss_proba(self.gender) + vaccinated_immunity_loss_proba(self.vaccinated) + mask_immunity_loss_proba(self.mask), 1))
+        return self.rate('immunity_loss', config)
 
     def assign_random_direction(self):
         vector_length = 0
 
         while vector_length == 0.0:
-            distance_x = random.uniform(-1, 1)
-            distance_y = random.uniform(-1, 1)
+            distance_x = self.rng.uniform(-1, 1)
+            distance_y = self.rng.uniform(-1, 1)
 
             vector_length = (distance_x**2 + distance_y**2)**0.5
             if vector_length == 0:
@@ -79,87 +134,65 @@ class Agent:
             return distance_x, distance_y
 
 
-    def update_state(self, new_state):
-        """Zaktualizowanie stanu agenta i resetowanie czasu w danym stanie."""
+    def update_state(self, new_state, tick=0):
+        """Zaktualizowanie stanu agenta; `tick` to numer kroku, w którym agent wszedł w nowy stan."""
         self.state = new_state
-        self.time_in_state = 0  # Resetowanie licznika czasu w danym stanie
+        self.state_entered_at = tick
 
-    def increment_time_in_state(self):
-        """Zwiększenie czasu spędzonego w danym stanie."""
-        self.time_in_state += 1
+    def time_in_state(self, tick):
+        """Czas spędzony w aktualnym stanie w kroku `tick`."""
+        return tick - self.state_entered_at
 
-    def transition(self, config, board_grid):
+    def transition(self, config, infectious_contacts, tick=0):
         """Aktualizowanie stanu agenta na podstawie jego obecnego stanu i interakcji."""
         if self.state == "S":
-            self.state_S(self.find_agents_in_neighbouring_grid_cells(board_grid, config), config)
+            self.state_S(infectious_contacts, config, tick)
         elif self.state == "E":
-            self.state_E(config)
+            self.state_E(config, tick)
         elif self.state == "I":
-            self.state_I(config)
+            self.state_I(config, tick)
         elif self.state == "R":
-            self.state_R(config)
+            self.state_R(config, tick)
         elif self.state == "D":
             pass  # Zmarli nie zmieniają stanu
 
-    def state_S(self, agents, config):
-        """Stan zdrowy - agent może się zarazić."""
-        for other_agent in agents:
-            if other_agent.quick_travelling:
-                continue
-            if other_agent.state == "I" and self.distance_to(other_agent) < config.infection_radius:
-                if random.random() < self.compute_infection_rate(config):
-                    self.update_state("E")  # Zarażenie, przejście do stanu "E"
-                    break
+    def state_S(self, infectious_contacts, config, tick):
+        """Stan zdrowy - agent może się zarazić od każdego z `infectious_contacts` zakaźnych sąsiadów."""
+        if infectious_contacts == 0:
+            return
+        if self.rng.random() < 1 - (1 - self.compute_infection_rate(config)) ** infectious_contacts:
+            self.update_state("E", tick)  # Zarażenie, przejście do stanu "E"
 
-    def state_E(self, config):
+    def state_E(self, config, tick):
         """Stan narażony - agent może przejść w stan "I" (zakażony) lub wrócić do zdrowia."""
-        if self.time_in_state >= config.incubation_period:
-            self.update_state("I")  # Po okresie inkubacji przejście do stanu "I"
-
-    def state_I(self, config):
-        """Stan zakażony - agent może wyzdrowieć lub umrzeć."""
-        if random.random() < self.compute_recovery_rate(config) and self.time_in_state >= config.recovery_period:
-            self.update_state("R")  # Przechodzi do stanu wyzdrowienia
-        elif random.random() < self.compute_mortality_rate(config) and self.time_in_state >= config.mortality_period:
-            self.update_state("D")  # Umiera
-
-    def state_R(self, config):
-        if random.random() < self.compute_immunity_loss_rate(config) and self.time_in_state >= config.immunity_loss_period:
-            self.update_state("S")
+        if self.time_in_state(tick) >= config.incubation_period:
+            self.update_state("I", tick)  # Po okresie inkubacji przejście do stanu "I"
+
+    def state_I(self, config, tick):
+        """Stan zakażony - agent może wyzdrowieć lub umrzeć (losowanie tylko po upływie odpowiedniego okresu)."""
+        time_in_state = self.time_in_state(tick)
+        if time_in_state >= config.recovery_period and self.rng.random() < self.compute_recovery_rate(config):
+            self.update_state("R", tick)  # Przechodzi do stanu wyzdrowienia
+        elif time_in_state >= config.mortality_period and self.rng.random() < self.compute_mortality_rate(config):
+            self.update_state("D", tick)  # Umiera
+
+    def state_R(self, config, tick):
+        if self.time_in_state(tick) >= config.immunity_loss_period and \
+                self.rng.random() < self.compute_immunity_loss_rate(config):
+            self.update_state("S", tick)
 
     def distance_to(self, other_agent):
         """Obliczenie odległości między dwoma agentami."""
         return math.sqrt((self.x - other_agent.x) ** 2 + (self.y - other_agent.y) ** 2)
 
     def find_agents_in_neighbouring_grid_cells(self, board_grid, config):
-        agents = []
-        board_width = len(board_grid)
-        board_height = len(board_grid[0])
-        for x in [-1, 0, 1]:
-            for y in [-1, 0, 1]:
-                i = int((self.x // config.social_distancing_repulsion_radius) + x)
-                j = int((self.y // config.social_distancing_repulsion_radius) + y)
-                if 0 <= i < board_width and 0 <= j < board_height:
-                    agents.extend(board_grid[i][j])
-        return agents
-
-    def calculate_repulsion(self, config, board_grid):
+        """Agenci z komórki agenta i ośmiu sąsiednich komórek indeksu przestrzennego (board_grid)."""
+        return board_grid.candidates(self.x, self.y)
+
+    def calculate_repulsion(self, repulsion_x, repulsion_y):
+        """Dodanie siły odpychania od sąsiadów (policzonej dla całej populacji w repulsion_forces) do kierunku ruchu."""
         if self.quick_travelling:
             return
-        repulsion_x, repulsion_y = 0, 0
-        for agent in self.find_agents_in_neighbouring_grid_cells(board_grid, config):
-            if agent == self or agent.state == 'D':
-                continue
-
-            distance = self.distance_to(agent)
-            if distance > config.social_distancing_repulsion_radius:
-                continue
-            if distance == 0:
-                distance = 1e-10
-
-            repulsion_x += (-(agent.x - self.x) / distance ** 2) * config.social_distancing_repulsion_force
-            repulsion_y += (-(agent.y - self.y) / distance ** 2) * config.social_distancing_repulsion_force
-
         self.direction_x += repulsion_x
         self.direction_y += repulsion_y
 
@@ -236,7 +269,7 @@ class Agent:
     def change_direction(self, config):
         if self.quick_travelling:
             return
-        if random.random() < config.change_direction_proba:
+        if self.rng.random() < config.change_direction_proba:
             self.direction_x, self.direction_y = self.assign_random_direction()
 
     def visit_central_location(self, config, central_locations, width, height):
@@ -248,14 +281,14 @@ class Agent:
             if self.time_to_spend_in_central_location <= 0:
                 self.assign_central_location(None, width, height)
             return
-        if random.random() < config.central_location_visit_proba:
+        if self.rng.random() < config.central_location_visit_proba:
             self.time_to_spend_in_central_location = config.frames_spent_in_central_location
-            self.assign_central_location(random.choice(central_locations), width, height)
+            self.assign_central_location(self.rng.choice(central_locations), width, height)
 
     def assign_central_location(self, central_location, width, height):
         self.central_location = central_location
         if central_location is None:
-            self.destination_x, self.destination_y = random.randint(0, width), random.randint(0, height)
+            self.destination_x, self.destination_y = self.rng.randint(0, width), self.rng.randint(0, height)
             self.quick_travel_to_coordinates(self.destination_x, self.destination_y)
         else:
             self.direct_to_central_location()
@@ -263,19 +296,13 @@ class Agent:
     def visit_quarantine(self, config, quarantine, width, height):
         if not config.quarantine:
             return
-        if self.state == 'I' and not self.quarantined and random.random() < config.quarantine_visit_proba:
+        if self.state == 'I' and not self.quarantined and self.rng.random() < config.quarantine_visit_proba:
             self.quarantined = True
             self.assign_central_location(quarantine, width, height)
         elif self.state == 'R' and self.quarantined:
             self.quarantined = False
             self.assign_central_location(None, width, height)
 
-    def draw(self, screen, config):
-        """Rysowanie agenta na ekranie."""
-        color = self.get_color()
-        pygame.draw.circle(screen, color, (self.x, self.y), self.size)
-        # pygame.draw.circle(screen, (0, 0, 255), (self.x, self.y), config.infection_radius, 1)  # Rysowanie promienia zakażenia
-
     def get_color(self):
         """Zwraca kolor agenta w zależności od jego stanu."""
         if self.state == "S":
@@ -289,14 +316,57 @@ class Agent:
         elif self.state == "D":
             return (0, 0, 0)
 
-    def step(self, config, screen, central_locations, quarantine, width, height, board_grid):
-        """Aktualizacja agenta: poruszanie się, rysowanie i przejście stanu."""
+    def step(self, config, central_locations, quarantine, width, height, repulsion=(0, 0)):
+        """Aktualizacja agenta: poruszanie się (rysowanie odbywa się w PygameRenderer).
+
+        `repulsion` (siła odpychania) jest policzona dla całej populacji w Simulation.step, która po ruchu
+        wszystkich agentów wykonuje też przejścia stanów (Agent.transition)."""
         self.visit_central_location(config, central_locations, width, height)
         self.visit_quarantine(config, quarantine, width, height)
         self.change_direction(config)
         if config.social_distancing_repulsion_force > 0:
-            self.calculate_repulsion(config, board_grid)
+            self.calculate_repulsion(*repulsion)
         self.move(width, height)  # Poruszanie
-        self.transition(config, board_grid)  # Aktualizacja stanu
-        self.draw(screen, config)  # Rysowanie agenta
-        self.increment_time_in_state()  # Zwiększanie licznika czasu w danym stanie
+
+    def step_profiled(self, config, central_locations, quarantine, width, height, repulsion, profiler):
+        """Agent.step z pomiarem czasu każdej fazy w PhaseProfiler (używane przy włączonym Config.profile)."""
+        profiler.start()
+        self.visit_central_location(config, central_locations, width, height)
+        profiler.lap('visit_central_location')
+        self.visit_quarantine(config, quarantine, width, height)
+        profiler.lap('visit_quarantine')
+        self.change_direction(config)
+        profiler.lap('change_direction')
+        if config.social_distancing_repulsion_force > 0:
+            self.calculate_repulsion(*repulsion)
+            profiler.lap('calculate_repulsion')
+        self.move(width, height)
+        profiler.lap('move')
+
+def attribute_arrays(agents):
+    """Cechy populacji jako tablice (wiek, płeć męska, szczepienie, maseczka) - wejście compute_rates."""
+    age = np.array([agent.age for agent in agents], dtype=np.int64)
+    male = np.array([agent.gender == 'Male' for agent in agents], dtype=bool)
+    vaccinated = np.array([agent.vaccinated == 'True' for agent in agents], dtype=bool)
+    mask = np.array([agent.mask == 'True' for agent in agents], dtype=bool)
+    return age, male, vaccinated, mask
+
+
+def agents_from_columns(columns, config, rng=None):
+    """Obiekty Agent populacji opisanej tablicami AGENT_ARRAYS (pozycje, stany i cechy, np. z
+    population.initial_columns); kierunki ruchu agenci losują sami."""
+    values = {name: columns[name].tolist() for name in ('x', 'y', 'state', 'age', 'male', 'vaccinated', 'mask')}
+    return [Agent(index, x, y, config, state=STATES[state], rng=rng,
+                  attributes=(age, 'Male' if male else 'Female', str(vaccinated), str(mask)))
+            for index, (x, y, state, age, male, vaccinated, mask) in enumerate(zip(*values.values()))]
+
+
+def cache_rates(agents, config, attributes=None):
+    """Oblicza wektorowo wszystkie prawdopodobieństwa przejść dla populacji i zapisuje je w pamięci agentów."""
+    age, male, vaccinated, mask = attributes if attributes is not None else attribute_arrays(agents)
+
+    for name, (field, *_) in RATE_FUNCTIONS.items():
+        base_rate = getattr(config, field)
+        values = compute_rates(name, base_rate, age, male, vaccinated, mask)
+        for agent, value in zip(agents, values.tolist()):
+            agent.rates[name] = (base_rate, value)
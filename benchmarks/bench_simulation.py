@@ -0,0 +1,152 @@
+"""Benchmark rdzenia symulacji: kroki na sekundę, czasy faz i szczytowe zużycie pamięci.
+
+Przykłady:
+    python benchmarks/bench_simulation.py --output bench.json
+    python benchmarks/bench_simulation.py --agents 1000,10000 --baseline bench.json --threshold 0.15
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config  # noqa: E402
+from simulation import Simulation  # noqa: E402
+
+ENGINE_PHASES = ('visit_central_location', 'visit_quarantine', 'change_direction', 'calculate_repulsion', 'move',
+                 'transition')
+SIMULATION_PHASES = ('build_board_grid', 'count_infectious_contacts', 'record_state')
+
+
+def timed(owner, name, timings):
+    """Podmienia metodę `name` obiektu na wersję sumującą czas wywołań w `timings[name]`."""
+    method = getattr(owner, name)
+
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            timings[name] += time.perf_counter() - start
+
+    setattr(owner, name, wrapper)
+
+
+def run_case(case):
+    """Uruchamia jeden przypadek w osobnym procesie, żeby szczytowa pamięć dotyczyła tylko tego przypadku."""
+    config = Config({}, seed=case['seed'], engine=case['engine'], num_agents=case['agents'],
+                    initial_infected=max(1, case['agents'] // 50), quarantine=case['quarantine'],
+                    num_central_locations=case['central_locations'],
+                    social_distancing_repulsion_force=0.5 if case['repulsion'] else 0)
+    if case['constant_density']:
+        scale = (case['agents'] / 1000) ** 0.5
+        config.width = config.height = int(800 * scale)
+
+    start = time.perf_counter()
+    simulation = Simulation(config)
+    init_seconds = time.perf_counter() - start
+
+    timings = defaultdict(float)
+    for name in SIMULATION_PHASES:
+        timed(simulation, name, timings)
+    if simulation.engine is not None:
+        timed(simulation.engine.board_grid, 'build', timings)
+        for name in ENGINE_PHASES:
+            timed(simulation.engine, name, timings)
+
+    simulation.run_headless(case['warmup'])
+    timings.clear()
+    start = time.perf_counter()
+    simulation.run_headless(case['steps'])
+    seconds = time.perf_counter() - start
+
+    return {
+        **case,
+        'init_seconds': init_seconds,
+        'seconds': seconds,
+        'steps_per_second': case['steps'] / seconds,
+        'phases': {name: value / case['steps'] for name, value in sorted(timings.items())},
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def case_key(case):
+    return tuple(case[name] for name in ('engine', 'agents', 'repulsion', 'quarantine', 'central_locations',
+                                         'constant_density'))
+
+
+def compare(results, baseline, threshold):
+    """Porównuje kroki na sekundę z wynikami bazowymi; zwraca listę przypadków wolniejszych o więcej niż `threshold`."""
+    baseline_cases = {case_key(case): case for case in baseline['cases']}
+    regressions = []
+    for case in results['cases']:
+        base = baseline_cases.get(case_key(case))
+        if base is None:
+            continue
+        change = case['steps_per_second'] / base['steps_per_second'] - 1
+        print(f"{case_key(case)}: {base['steps_per_second']:.1f} -> {case['steps_per_second']:.1f} kroków/s "
+              f"({change:+.1%})")
+        if change < -threshold:
+            regressions.append(case)
+    return regressions
+
+
+def parse_list(text, convert=int):
+    return [convert(value) for value in text.split(',')]
+
+
+def parse_flags(text):
+    return parse_list(text, lambda value: value == 'on')
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark skalowania symulacji (tryb bez renderowania).")
+    parser.add_argument('--engines', default='vectorized', help="silniki, np. agents,vectorized")
+    parser.add_argument('--agents', default='1000,10000,100000', help="liczby agentów")
+    parser.add_argument('--repulsion', default='off,on', help="dystans społeczny: off,on")
+    parser.add_argument('--quarantine', default='off,on', help="kwarantanna: off,on")
+    parser.add_argument('--central-locations', default='0,1,4', help="liczby Central Locations")
+    parser.add_argument('--constant-density', action='store_true',
+                        help="skalowanie planszy tak, by gęstość była jak dla 1000 agentów na 800x800")
+    parser.add_argument('--steps', type=int, default=20, help="mierzone kroki na przypadek")
+    parser.add_argument('--warmup', type=int, default=2, help="kroki rozgrzewające (niemierzone)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='bench_results.json', help="plik JSON z wynikami")
+    parser.add_argument('--baseline', help="plik JSON z wynikami bazowymi do porównania")
+    parser.add_argument('--threshold', type=float, default=0.1, help="dopuszczalny spadek kroków/s (ułamek)")
+    args = parser.parse_args()
+
+    cases = [
+        {'engine': engine, 'agents': agents, 'repulsion': repulsion, 'quarantine': quarantine,
+         'central_locations': central_locations, 'constant_density': args.constant_density,
+         'steps': args.steps, 'warmup': args.warmup, 'seed': args.seed}
+        for engine, agents, repulsion, quarantine, central_locations in itertools.product(
+            args.engines.split(','), parse_list(args.agents), parse_flags(args.repulsion),
+            parse_flags(args.quarantine), parse_list(args.central_locations))
+    ]
+
+    results = {'python': platform.python_version(), 'machine': platform.machine(), 'cases': []}
+    context = multiprocessing.get_context('spawn')
+    for case in cases:
+        with context.Pool(1) as pool:
+            result = pool.apply(run_case, (case,))
+        results['cases'].append(result)
+        print(f"{case_key(case)}: {result['steps_per_second']:.1f} kroków/s, "
+              f"init {result['init_seconds']:.2f} s, {result['peak_rss_mb']:.0f} MB")
+
+    with open(args.output, 'w') as file:
+        json.dump(results, file, indent=4)
+
+    if args.baseline:
+        with open(args.baseline, 'r') as file:
+            regressions = compare(results, json.load(file), args.threshold)
+        if regressions:
+            print(f"Regresja wydajności w {len(regressions)} przypadkach (próg {args.threshold:.0%})")
+            sys.exit(1)
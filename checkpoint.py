@@ -0,0 +1,155 @@
+import json
+import os
+
+import numpy as np
+
+from config import Config
+from engine import AGENT_ARRAYS, NO_LOCATION, STATES, STATE_CODES
+from population import ATTRIBUTE_COLUMNS
+
+CHECKPOINT_VERSION = 3
+
+
+def agent_columns(simulation):
+    """Stan agentów jako tablice kolumnowe AGENT_ARRAYS (dla silnika wektorowego - jego własne tablice)."""
+    if simulation.engine is not None:
+        return {name: getattr(simulation.engine, name) for name in AGENT_ARRAYS}
+
+    locations = {id(location): index for index, location in enumerate(simulation_locations(simulation))}
+    agents = simulation.agents
+    columns = {name: [getattr(agent, name) for agent in agents] for name in AGENT_ARRAYS
+               if name not in ('state', 'location', 'male', 'vaccinated', 'mask')}
+    columns['state'] = np.array([STATE_CODES[agent.state] for agent in agents], dtype=np.int8)
+    columns['location'] = np.array([locations[id(agent.central_location)] if agent.central_location is not None
+                                    else NO_LOCATION for agent in agents], dtype=np.int64)
+    columns['male'] = np.array([agent.gender == 'Male' for agent in agents], dtype=bool)
+    columns['vaccinated'] = np.array([agent.vaccinated == 'True' for agent in agents], dtype=bool)
+    columns['mask'] = np.array([agent.mask == 'True' for agent in agents], dtype=bool)
+    return {name: np.asarray(values) for name, values in columns.items()}
+
+
+def simulation_locations(simulation):
+    """Central Locations i kwarantanna w kolejności indeksów używanych w kolumnie `location`."""
+    return simulation.central_locations + ([simulation.quarantine] if simulation.quarantine is not None else [])
+
+
+def restore_agent_columns(simulation, columns):
+    if simulation.engine is not None:
+        for name in AGENT_ARRAYS:
+            getattr(simulation.engine, name)[...] = columns[name]
+        simulation.engine.invalidate_rates()
+        return
+
+    locations = simulation_locations(simulation)
+    values = {name: columns[name].tolist() for name in AGENT_ARRAYS}
+    for index, agent in enumerate(simulation.agents):
+        for name in ('x', 'y', 'direction_x', 'direction_y', 'destination_x', 'destination_y', 'state_entered_at',
+                     'quick_travelling', 'quick_travelling_counter', 'time_to_spend_in_central_location',
+                     'quarantined', 'age'):
+            setattr(agent, name, values[name][index])
+        agent.state = STATES[values['state'][index]]
+        location = values['location'][index]
+        agent.central_location = locations[location] if location != NO_LOCATION else None
+        agent.gender = 'Male' if values['male'][index] else 'Female'
+        agent.vaccinated = 'True' if values['vaccinated'][index] else 'False'
+        agent.mask = 'True' if values['mask'][index] else 'False'
+
+
+def save_checkpoint(simulation, filename):
+    """Zapisuje pełny stan symulacji (agenci, generatory liczb losowych, historia) do pliku .npz.
+
+    Plik jest najpierw zapisywany obok, a potem podmieniany, więc przerwany zapis nie niszczy poprzedniego."""
+    recorder = simulation.recorder
+    event_log = simulation.event_log
+    version, random_state, gauss_next = simulation.random.getstate()
+    metadata = {
+        'version': CHECKPOINT_VERSION,
+        'config': vars(simulation.config),
+        'seed': simulation.seed,
+        'tick': simulation.tick,
+        'random_version': version,
+        'random_gauss_next': gauss_next,
+        'engine_rng': simulation.engine.rng_state() if simulation.engine is not None else None,
+        'recorder_length': recorder.length,
+        # Dziennik zdarzeń jest zapisywany do końca; po wczytaniu jest obcinany do tego rozmiaru
+        'event_log_size': event_log.flush() if event_log is not None else None,
+        'event_log_rng': event_log.rng.bit_generator.state if event_log is not None else None,
+    }
+    arrays = {'agent_' + name: values for name, values in agent_columns(simulation).items()}
+    arrays['random_state'] = np.array(random_state, dtype=np.uint32)
+    arrays['recorder_counts'] = recorder.counts[:recorder.length]
+    if recorder.record_transitions:
+        arrays['recorder_transitions'] = recorder.transitions[:recorder.length]
+        arrays['recorder_quarantined'] = recorder.quarantined[:recorder.length]
+        arrays['recorder_previous_state'] = recorder.previous_state
+    if simulation.strata is not None:
+        arrays.update({'strata_' + name: simulation.strata.table(name) for name in simulation.strata.codes})
+
+    temporary_filename = filename + '.tmp'
+    with open(temporary_filename, 'wb') as file:
+        np.savez(file, metadata=np.array(json.dumps(metadata)), **arrays)
+    os.replace(temporary_filename, filename)
+
+
+def load_checkpoint(filename):
+    """Odtwarza symulację z pliku zapisanego przez save_checkpoint; dalszy przebieg jest identyczny z oryginalnym."""
+    from simulation import Simulation  # simulation.py importuje CheckpointWriter z tego modułu
+
+    with np.load(filename) as data:
+        metadata = json.loads(str(data['metadata']))
+        if metadata['version'] != CHECKPOINT_VERSION:
+            raise ValueError(f"Nieobsługiwana wersja checkpointu: {metadata['version']}")
+
+        simulation = Simulation(Config({}, **metadata['config']))
+        simulation.seed = metadata['seed']
+        simulation.tick = metadata['tick']
+        columns = {name: data['agent_' + name] for name in AGENT_ARRAYS}
+        restore_agent_columns(simulation, columns)
+        # Cechy populacji wylosowane w Simulation (np. dla seed=None) mogą się różnić od zapisanych
+        simulation.set_attributes(columns[name] for name in ATTRIBUTE_COLUMNS)
+        simulation.schedule_all_transitions()
+        simulation.random.setstate((metadata['random_version'], tuple(data['random_state'].tolist()),
+                                    metadata['random_gauss_next']))
+        if simulation.engine is not None:
+            simulation.engine.set_rng_state(metadata['engine_rng'])
+        if simulation.event_log is not None:
+            simulation.event_log.resume(metadata['event_log_size'])
+            simulation.event_log.rng.bit_generator.state = metadata['event_log_rng']
+
+        recorder = simulation.recorder
+        length = metadata['recorder_length']
+        while len(recorder.counts) < length:
+            recorder.grow()
+        recorder.counts[:length] = data['recorder_counts']
+        if recorder.record_transitions:
+            recorder.transitions[:length] = data['recorder_transitions']
+            recorder.quarantined[:length] = data['recorder_quarantined']
+            recorder.previous_state = data['recorder_previous_state'].copy()
+        recorder.length = length
+
+        if simulation.strata is not None:
+            strata = simulation.strata
+            while len(strata.history['age_group']) < length:
+                strata.grow()
+            for name in strata.codes:
+                strata.history[name][:length] = data['strata_' + name]
+            strata.length = length
+            strata.start(simulation.current_states()[0])
+    return simulation
+
+
+class CheckpointWriter:
+    """Obserwator zapisujący checkpoint co `interval` kroków. `{step}` w nazwie pliku jest zastępowane numerem kroku,
+    bez niego plik jest nadpisywany najnowszym stanem."""
+
+    def __init__(self, filename, interval):
+        self.filename = filename
+        self.interval = interval
+
+    def on_step(self, simulation):
+        step = simulation.recorder.length
+        if step % self.interval == 0:
+            save_checkpoint(simulation, self.filename.format(step=step))
+
+    def on_finish(self, simulation):
+        pass
@@ -2,21 +2,31 @@ import json
 import os
 import random
 
+SIMULATION_STEPS = 500  # Liczba kroków symulacji uruchamianej z main.py (i przez interfejs Streamlit)
+
+
 class Config:
 
-    def __init__(self):
-        
+    def __init__(self, params=None, **overrides):
+        """Parametry są czytane z `params` (słownik w formacie parameters.json), a gdy go brak - z pliku
+        parameters.json. `overrides` nadpisują dowolne pole konfiguracji po jej zbudowaniu."""
+
         # base_dir = os.path.dirname(os.path.abspath(__file__))
         # file_path = os.path.join(base_dir, 'UI', 'parameters.json')
 
-        with open('parameters.json', 'r') as file:
-            params = json.load(file)
+        if params is None:
+            with open('parameters.json', 'r') as file:
+                params = json.load(file)
 
         self.num_agents = params.get('number_of_agents', 1000) # Liczba agentów w populacji
         self.infection_rate = params.get('infection_rate', 0.03)  # Prawdopodobieństwo zarażenia zdrowego agenta
         self.initial_infected = params.get('initial_infected', 20)  # Liczba początkowo zakażonych agentów
         self.recovery_period = params.get('recovery_period', 30)
         self.quarantine_visit_proba = params.get('quarantine_visit_proba', 0.12)
+        self.seed = params.get('seed', None)  # Ziarno generatorów liczb losowych (None - losowe)
+        self.engine = params.get('engine', 'agents')  # Silnik symulacji: 'agents' (obiekty Agent), 'vectorized' (tablice NumPy), 'tiled' (kafelki w osobnych procesach) lub 'mean_field' (przybliżony model warstwowy bez agentów, tylko sweep/ensemble)
+        self.tiles_x = params.get('tiles_x', 2)  # Podział planszy na kafelki silnika 'tiled' - jeden proces na kafelek
+        self.tiles_y = params.get('tiles_y', 2)
 
         self.incubation_period = 15  # Prawdopodobieństwo przejścia z narażenia do zakażenia
         self.recovery_rate = 0.3 # Prawdopodobieństwo wyzdrowienia
@@ -37,11 +47,46 @@ class Config:
         self.quarantine = True
 
         self.social_distancing_repulsion_force = 0
-        self.social_distancing_repulsion_radius = self.infection_radius + 10
+        self.social_distancing_repulsion_radius = None  # Domyślnie infection_radius + 10 (liczone po overrides)
 
         self.mask_wearing_proba = 0.7
         self.vaccinated_proba = 0.5
 
+        # Rozkłady cech populacji (population.py): udziały grup wieku 0-9, 10-19, ..., 90+ (None - rozkład normalny
+        # jak w Agent.assign_age) i prawdopodobieństwa szczepienia i maseczki w grupach wieku (None - stałe powyżej)
+        self.age_distribution = None
+        self.vaccinated_proba_by_age = None
+        self.mask_wearing_proba_by_age = None
+        self.population_file = None  # Tabela populacji .csv/.npz/.npy (kolumny age, male, vaccinated, mask, count)
+
+        self.record_transitions = False  # Zapisywanie liczby przejść E->I, I->R, I->D, zakażeń i kwarantanny
+        self.record_strata = False  # Zapisywanie liczby agentów w każdym stanie według grup wieku, płci, szczepienia i maseczki
+
+        self.profile = False  # Pomiar czasu faz kroku, liczby kandydatów na sąsiadów i obłożenia siatki
+        self.profile_filename = 'profile.json'  # Plik z wynikami profilowania zapisywany na końcu symulacji
+
+        self.checkpoint_interval = 0  # Zapisywanie checkpointu co n kroków (0 - wyłączone)
+        self.checkpoint_filename = 'checkpoint.npz'  # '{step}' w nazwie zostaje zastąpione numerem kroku
+
+        self.plots = ['state_history', 'distributions', 'rates']  # Wykresy zapisywane przez Simulation.run (pusta lista - bez wykresów)
+        self.plot_dpi = 300  # Rozdzielczość zapisywanych wykresów
+
+        self.frame_stride = 1  # Zapisywanie do animacji co n-tej klatki
+        self.frame_downscale = 1  # Zmniejszenie klatek animacji n-krotnie
+
+        self.record_trajectory = False  # Zapisywanie pozycji i stanów agentów w każdym kroku (odtwarzanie przez replay.py)
+        self.trajectory_filename = 'trajectory.traj'
+
+        self.record_events = False  # Dziennik przejść stanów, zakażeń (z zakażającym) i wejść do kwarantanny
+        self.events_filename = 'events.bin'  # Plik dziennika zdarzeń (zapytania w event_log.py)
+
+        for name, value in overrides.items():
+            if not hasattr(self, name):
+                raise ValueError(f"Nieznany parametr konfiguracji: {name}")
+            setattr(self, name, value)
+        if self.social_distancing_repulsion_radius is None:
+            self.social_distancing_repulsion_radius = self.infection_radius + 10
+
     def params_values_text(self):
         result = ''
         for variable_name, variable_value in vars(self).items():
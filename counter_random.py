@@ -0,0 +1,53 @@
+import numpy as np
+
+# Stałe SplitMix64: przyrost strumienia (złoty podział 2**64) i mnożniki funkcji mieszającej
+GAMMA = np.uint64(0x9E3779B97F4A7C15)
+MIX_MULTIPLIERS = (np.uint64(0xBF58476D1CE4E5B9), np.uint64(0x94D049BB133111EB))
+MIX_SHIFTS = (np.uint64(30), np.uint64(27), np.uint64(31))
+
+
+def mix64(values):
+    """Funkcja mieszająca SplitMix64 dla tablicy uint64 (bijekcja - różne wejścia dają różne wyjścia)."""
+    values = values ^ (values >> MIX_SHIFTS[0])
+    values *= MIX_MULTIPLIERS[0]
+    values ^= values >> MIX_SHIFTS[1]
+    values *= MIX_MULTIPLIERS[1]
+    values ^= values >> MIX_SHIFTS[2]
+    return values
+
+
+class CounterRandom:
+    """Licznikowy generator liczb losowych - liczba losowa agenta jest funkcją (ziarno, tick, numer agenta,
+    cel losowania), a nie pozycji w jednym wspólnym strumieniu.
+
+    Tick, cel i numer próby wybierają strumień SplitMix64 (skrót klucza i tych liczb), a agent o numerze `a`
+    dostaje jego `a`-ty element. Każda liczba jest liczona osobno, jednym wektorowym wywołaniem dla wszystkich
+    losujących agentów, więc koszt rośnie z liczbą losujących, a wynik nie zależy od kolejności agentów, od tego,
+    którzy inni agenci losują w tym samym wywołaniu, ani od tego, czy populacja jest liczona w jednym procesie,
+    czy w wielu kafelkach. Generator nie ma stanu poza kluczem."""
+
+    def __init__(self, seed=None, key=None):
+        if key is None:
+            seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+            key = seed_sequence.generate_state(2, np.uint64)
+        self.key = np.array(key, dtype=np.uint64)
+
+    def streams(self, tick, purpose, attempt, count):
+        """Początki strumieni `count` kolumn losowania (tick, cel, próba)."""
+        state = self.key[:1]
+        for word in (tick, purpose, attempt):
+            state = mix64((state ^ np.uint64(word)) + GAMMA)
+        return mix64((state ^ self.key[1] ^ np.arange(count, dtype=np.uint64)) + GAMMA)
+
+    def uniform(self, tick, purpose, agents, width=None, attempt=0):
+        """Liczby z przedziału [0, 1) dla agentów o numerach `agents`: jedna na agenta albo wiersz `width` liczb.
+
+        `attempt` daje kolejne, niezależne losowania tego samego celu (np. ponowienie odrzuconej próby)."""
+        agents = np.asarray(agents, dtype=np.int64).astype(np.uint64)
+        streams = self.streams(tick, purpose, attempt, 1 if width is None else width)
+        values = (mix64(agents[:, None] * GAMMA + streams) >> np.uint64(11)) * (1.0 / 2 ** 53)
+        return values[:, 0] if width is None else values
+
+    def state(self):
+        """Klucz generatora (do zapisu w checkpoincie)."""
+        return [int(value) for value in self.key]
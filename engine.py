@@ -0,0 +1,312 @@
+import functools
+
+import numpy as np
+
+from counter_random import CounterRandom
+from functions import RATE_FUNCTIONS, compute_rates
+from repulsion import repulsion_forces
+from spatial_index import SpatialIndex
+from transmission import NO_INFECTOR, count_infectious_contacts, infected_by_contacts
+
+STATES = ("S", "E", "I", "R", "D")
+S, E, I, R, D = range(len(STATES))
+STATE_CODES = {state: code for code, state in enumerate(STATES)}
+
+# Kolory stanów w tej samej kolejności co STATES (zgodne z Agent.get_color)
+STATE_COLORS = ((0, 0, 255), (255, 255, 0), (255, 0, 0), (0, 255, 0), (0, 0, 0))
+
+NO_LOCATION = -1  # Agent nie jest przypisany do żadnej Central Location
+
+# Cele losowań silnika - każdy ma w danym ticku własny strumień liczb losowych CounterRandom
+RANDOM_PURPOSES = ('visit', 'visit_location', 'target', 'quarantine', 'change_direction', 'direction', 'infection',
+                   'recovery', 'mortality', 'immunity_loss')
+(VISIT, VISIT_LOCATION, TARGET, QUARANTINE, CHANGE_DIRECTION, DIRECTION, INFECTION, RECOVERY, MORTALITY,
+ IMMUNITY_LOSS) = range(len(RANDOM_PURPOSES))
+
+# Tablice opisujące pełny stan każdego agenta (pozostałe pola silnika wynikają z nich i z Config)
+AGENT_ARRAYS = ('x', 'y', 'direction_x', 'direction_y', 'destination_x', 'destination_y', 'state', 'state_entered_at',
+                'quick_travelling', 'quick_travelling_counter', 'time_to_spend_in_central_location', 'quarantined',
+                'location', 'age', 'male', 'vaccinated', 'mask')
+AGENT_DTYPES = dict(zip(AGENT_ARRAYS, (np.float64, np.float64, np.float64, np.float64, np.float64, np.float64, np.int8,
+                                       np.int64, bool, np.int64, np.int64, bool, np.int64, np.int64, bool, bool, bool)))
+
+# Wymiary i prędkość agentów (jak w Agent)
+AGENT_SIZE = 5  # Rozmiar agenta - także odstęp od krawędzi, od której się odbija
+AGENT_SPEED = 2
+QUICK_TRAVEL_FRAMES = 15  # Czas przejścia do lokalizacji i z powrotem
+
+
+class VectorizedEngine:
+    """Silnik symulacji przechowujący całą populację w tablicach NumPy (struct-of-arrays).
+
+    Każda faza kroku (odwiedzanie Central Location, kwarantanna, zmiana kierunku, odpychanie,
+    ruch i przejścia SEIRD) jest wykonywana jedną operacją na tablicach dla wszystkich agentów,
+    zamiast wywoływania Agent.step po kolei dla każdego obiektu. Liczby losowe pochodzą z CounterRandom
+    i zależą tylko od ticku, numeru agenta (`agent_ids`) i celu losowania."""
+
+    def __init__(self, columns, config, central_locations, quarantine, width, height, scheduler, random=None):
+        self.config = config
+        self.width = width
+        self.height = height
+        self.random = random if random is not None else CounterRandom()
+        self.scheduler = scheduler  # TransitionScheduler - którzy agenci mogą w danym ticku zmienić stan
+        self.tick = 0
+        self.profiler = None  # PhaseProfiler przy włączonym Config.profile
+        self.event_log = None  # EventLog przy włączonym Config.record_events
+
+        # Stan populacji to tablice AGENT_ARRAYS (np. z population.initial_columns) - kopiowane do silnika
+        self.num_agents = len(columns['x'])
+        self.agent_ids = np.arange(self.num_agents)  # Numery agentów w całej populacji (klucz losowań)
+        self.size = AGENT_SIZE
+        self.speed = AGENT_SPEED
+        self.quick_travel_frames = QUICK_TRAVEL_FRAMES
+        for name, dtype in AGENT_DTYPES.items():
+            setattr(self, name, np.array(columns[name], dtype=dtype))
+
+        self.rates_key = None  # Bazowe wartości z Config, dla których policzono prawdopodobieństwa przejść
+        self.update_rates()
+
+        # Prostokąty lokalizacji: najpierw Central Locations, potem kwarantanna, a na końcu cała plansza,
+        # dzięki czemu indeks NO_LOCATION (-1) wskazuje granice planszy.
+        locations = list(central_locations) + ([quarantine] if quarantine is not None else [])
+        self.num_central_locations = len(central_locations)
+        self.quarantine_location = self.num_central_locations if quarantine is not None else None
+        self.location_x = np.array([location.x for location in locations] + [0], dtype=np.float64)
+        self.location_y = np.array([location.y for location in locations] + [0], dtype=np.float64)
+        self.location_right = np.array([location.x + location.size for location in locations] + [width],
+                                       dtype=np.float64)
+        self.location_bottom = np.array([location.y + location.size for location in locations] + [height],
+                                        dtype=np.float64)
+        self.location_center_x = np.array([location.x + location.size // 2 for location in locations] + [0],
+                                          dtype=np.float64)
+        self.location_center_y = np.array([location.y + location.size // 2 for location in locations] + [0],
+                                          dtype=np.float64)
+
+        self.board_grid = SpatialIndex(config.width, config.height,
+                                       max(config.infection_radius, config.social_distancing_repulsion_radius))
+
+    def invalidate_rates(self):
+        """Wymusza ponowne policzenie prawdopodobieństw przejść (np. po zmianie wieku lub szczepień agentów)."""
+        self.rates_key = None
+
+    def update_rates(self):
+        """Liczy prawdopodobieństwa przejść dla całej populacji, jeśli zmieniły się wartości bazowe w Config
+        albo wywołano invalidate_rates."""
+        rates_key = tuple(getattr(self.config, field) for field, *_ in RATE_FUNCTIONS.values())
+        if rates_key == self.rates_key:
+            return
+        for name, base_rate in zip(RATE_FUNCTIONS, rates_key):
+            setattr(self, name + '_rate',
+                    compute_rates(name, base_rate, self.age, self.male, self.vaccinated, self.mask))
+        self.rates_key = rates_key
+
+    def uniform(self, purpose, agents=None, width=None, attempt=0):
+        """Liczby z przedziału [0, 1) celu `purpose` w bieżącym ticku dla agentów o indeksach `agents`
+        (domyślnie wszystkich) - patrz CounterRandom.uniform."""
+        ids = self.agent_ids if agents is None else self.agent_ids[agents]
+        return self.random.uniform(self.tick, purpose, ids, width, attempt)
+
+    def random_directions(self, agents):
+        """Losuje kierunki agentów o indeksach `agents`, o długości równej prędkości agenta
+        (jak Agent.assign_random_direction)."""
+        vectors = self.uniform(DIRECTION, agents, width=2) * 2 - 1
+        lengths = np.hypot(vectors[:, 0], vectors[:, 1])
+        attempt = 0
+        while np.any(lengths == 0):
+            zero = lengths == 0
+            attempt += 1
+            vectors[zero] = self.uniform(DIRECTION, agents[zero], width=2, attempt=attempt) * 2 - 1
+            lengths = np.hypot(vectors[:, 0], vectors[:, 1])
+        vectors *= (self.speed / lengths)[:, None]
+        return vectors[:, 0], vectors[:, 1]
+
+    def quick_travel_to_coordinates(self, mask, x, y):
+        """Skierowanie wybranych agentów do podanych współrzędnych w trybie quick travel."""
+        self.destination_x[mask] = x
+        self.destination_y[mask] = y
+        self.direction_x[mask] = (x - self.x[mask]) / self.quick_travel_frames
+        self.direction_y[mask] = (y - self.y[mask]) / self.quick_travel_frames
+        self.quick_travelling_counter[mask] = 0
+        self.quick_travelling[mask] = True
+
+    def assign_location(self, mask, location):
+        """Przypisanie wybranym agentom lokalizacji (lub NO_LOCATION - powrót na losowe miejsce planszy)."""
+        count = int(mask.sum())
+        if count == 0:
+            return
+        location = np.broadcast_to(np.asarray(location, dtype=np.int64), (count,))
+        self.location[mask] = location
+
+        leaving = location == NO_LOCATION
+        target_x = self.location_center_x[location]
+        target_y = self.location_center_y[location]
+        # Losowy punkt planszy o całkowitych współrzędnych z przedziałów [0, width] i [0, height]
+        target = self.uniform(TARGET, np.flatnonzero(mask)[leaving], width=2)
+        target_x[leaving] = np.floor(target[:, 0] * (self.width + 1))
+        target_y[leaving] = np.floor(target[:, 1] * (self.height + 1))
+        self.quick_travel_to_coordinates(mask, target_x, target_y)
+
+    def visit_central_location(self):
+        if self.num_central_locations == 0:
+            return
+
+        free = ~self.quarantined
+        staying = free & (self.location != NO_LOCATION) & ~self.quick_travelling
+        self.time_to_spend_in_central_location[staying] -= 1
+        leaving = staying & (self.time_to_spend_in_central_location <= 0)
+        self.assign_location(leaving, NO_LOCATION)
+
+        visiting = free & ~staying & (self.uniform(VISIT) < self.config.central_location_visit_proba)
+        self.time_to_spend_in_central_location[visiting] = self.config.frames_spent_in_central_location
+        locations = self.uniform(VISIT_LOCATION, np.flatnonzero(visiting)) * self.num_central_locations
+        self.assign_location(visiting, locations.astype(np.int64))
+
+    def visit_quarantine(self):
+        if not self.config.quarantine or self.quarantine_location is None:
+            return
+
+        entering = (self.state == I) & ~self.quarantined & \
+            (self.uniform(QUARANTINE) < self.config.quarantine_visit_proba)
+        leaving = (self.state == R) & self.quarantined
+
+        self.quarantined[entering] = True
+        self.assign_location(entering, self.quarantine_location)
+        if self.event_log is not None:
+            self.event_log.record(self.tick, np.flatnonzero(entering), I, I, location=self.quarantine_location)
+        self.quarantined[leaving] = False
+        self.assign_location(leaving, NO_LOCATION)
+
+    def change_direction(self):
+        changing = ~self.quick_travelling & (self.uniform(CHANGE_DIRECTION) < self.config.change_direction_proba)
+        self.direction_x[changing], self.direction_y[changing] = self.random_directions(np.flatnonzero(changing))
+
+    def calculate_repulsion(self):
+        config = self.config
+        moving = ~self.quick_travelling
+        repulsion_x, repulsion_y = repulsion_forces(self.board_grid, config.social_distancing_repulsion_radius,
+                                                    config.social_distancing_repulsion_force, moving,
+                                                    self.state != D, x=self.x, y=self.y)
+
+        self.direction_x[moving] += repulsion_x[moving]
+        self.direction_y[moving] += repulsion_y[moving]
+
+        lengths = np.hypot(self.direction_x, self.direction_y)
+        normalize = moving & (lengths > 0)
+        self.direction_x[normalize] *= self.speed / lengths[normalize]
+        self.direction_y[normalize] *= self.speed / lengths[normalize]
+
+    def move(self):
+        """Poruszanie agentów po planszy (odbicie od krawędzi), odpowiednik Agent.move."""
+        alive = self.state != D
+
+        travelling = alive & self.quick_travelling
+        self.quick_travelling_counter[travelling] += 1
+        arrived = travelling & (self.quick_travelling_counter >= self.quick_travel_frames)
+        self.quick_travelling[arrived] = False
+        self.x[arrived] = self.destination_x[arrived]
+        self.y[arrived] = self.destination_y[arrived]
+        self.direction_x[arrived], self.direction_y[arrived] = self.random_directions(np.flatnonzero(arrived))
+
+        self.x[alive] += self.direction_x[alive]
+        self.y[alive] += self.direction_y[alive]
+
+        # Odbicie od krawędzi lokalizacji (lub planszy, gdy agent nie jest w żadnej lokalizacji)
+        bouncing = alive & ~self.quick_travelling
+        hit_x = bouncing & ((self.x <= self.location_x[self.location] + self.size) |
+                            (self.x >= self.location_right[self.location] - self.size))
+        self.direction_x[hit_x] *= -1
+        self.x[hit_x] += self.direction_x[hit_x] * 2
+        hit_y = bouncing & ((self.y <= self.location_y[self.location] + self.size) |
+                            (self.y >= self.location_bottom[self.location] - self.size))
+        self.direction_y[hit_y] *= -1
+        self.y[hit_y] += self.direction_y[hit_y] * 2
+
+    def update_state(self, agents, new_state, infectors=NO_INFECTOR):
+        """Zmiana stanu agentów o indeksach `agents` w bieżącym ticku i zaplanowanie ich kolejnego przejścia."""
+        if self.event_log is not None:
+            self.event_log.record(self.tick, agents, self.state[agents], new_state, infectors, self.location[agents])
+        self.state[agents] = new_state
+        self.state_entered_at[agents] = self.tick
+        self.scheduler.enter(agents, new_state, self.tick, self.tick + 1)
+
+    def transition(self):
+        """Przejścia SEIRD dla całej populacji naraz.
+
+        Poza zarażeniami sprawdzani są tylko agenci aktywni w TransitionScheduler - ci, dla których minął minimalny
+        okres stanu; pozostali nie zużywają losowań."""
+        config = self.config
+        self.update_rates()
+        susceptible = self.state == S
+        infectious = self.state == I
+
+        # Zdrowy agent zaraża się niezależnie od każdego zakażonego sąsiada w promieniu zakażenia
+        # (indeks przestrzenny jest zbudowany z pozycji po ruchu)
+        logging = self.event_log is not None
+        contacts = count_infectious_contacts(self.board_grid, config.infection_radius,
+                                             infectious & ~self.quick_travelling, susceptible, return_pairs=logging)
+        if logging:
+            contacts, pairs = contacts
+        infected = infected_by_contacts(contacts, self.infection_rate, functools.partial(self.uniform, INFECTION))
+        # Zakażający są losowani osobnym generatorem dziennika, więc jego włączenie nie zmienia przebiegu
+        infectors = self.event_log.choose_infectors(pairs, infected) if logging else NO_INFECTOR
+
+        self.scheduler.advance(self.tick, self.state_entered_at.__getitem__)
+        active = np.flatnonzero(self.scheduler.active)
+        active_state = self.state[active]
+
+        # Agent E jest aktywny dokładnie w ticku końca inkubacji
+        incubated = active[active_state == E]
+
+        ill = active[active_state == I]
+        time_in_state = self.tick - self.state_entered_at[ill]
+        recovered = (time_in_state >= config.recovery_period) & \
+            (self.uniform(RECOVERY, ill) < self.recovery_rate[ill])
+        died = ~recovered & (time_in_state >= config.mortality_period) & \
+            (self.uniform(MORTALITY, ill) < self.mortality_rate[ill])
+        recovering = ill[recovered]
+        dying = ill[died]
+
+        immune = active[active_state == R]
+        losing_immunity = immune[self.uniform(IMMUNITY_LOSS, immune) < self.immunity_loss_rate[immune]]
+
+        self.update_state(infected, E, infectors)
+        self.update_state(incubated, I)
+        self.update_state(recovering, R)
+        self.update_state(dying, D)
+        self.update_state(losing_immunity, S)
+
+    def step(self, tick):
+        """Krok `tick` symulacji dla całej populacji - kolejność faz jak w Agent.step."""
+        self.tick = tick
+        if self.profiler is not None:
+            self.profiler.start()
+        self.visit_central_location()
+        self.lap('visit_central_location')
+        self.visit_quarantine()
+        self.lap('visit_quarantine')
+        self.change_direction()
+        self.lap('change_direction')
+        if self.config.social_distancing_repulsion_force > 0:
+            self.board_grid.build(self.x.copy(), self.y.copy())  # Pozycje sprzed ruchu
+            self.lap('build_board_grid')
+            self.calculate_repulsion()
+            self.lap('calculate_repulsion')
+        self.move()
+        self.lap('move')
+        # Kontakty są liczone na pozycjach po ruchu (jak w Simulation.step dla silnika 'agents')
+        self.board_grid.build(self.x.copy(), self.y.copy())
+        self.lap('build_board_grid')
+        self.transition()
+        self.lap('transition')
+
+    def rng_state(self):
+        """Stan generatora liczb losowych silnika (do zapisu w checkpoincie) - sam klucz CounterRandom."""
+        return self.random.state()
+
+    def set_rng_state(self, state):
+        self.random = CounterRandom(key=state)
+
+    def lap(self, name):
+        """Zapisuje czas fazy `name` w profilerze (jeśli profilowanie jest włączone)."""
+        if self.profiler is not None:
+            self.profiler.lap(name)
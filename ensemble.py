@@ -0,0 +1,69 @@
+import argparse
+import json
+import os
+
+import numpy as np
+
+from config import Config
+from engine import STATES
+from result_cache import CACHE_DIRECTORY
+from sweep import run_scenarios
+
+
+def replicate_seeds(seed, replicates):
+    """Niezależne ziarna dla replik, wyprowadzone z jednego ziarna ensemble (SeedSequence.spawn)."""
+    return [int(child.generate_state(1, np.uint64)[0]) for child in np.random.SeedSequence(seed).spawn(replicates)]
+
+
+def run_ensemble(replicates, steps, seed=None, overrides=None, params=None, max_workers=None, cache_directory=None):
+    """Uruchamia `replicates` niezależnych, jawnie zasianych powtórzeń symulacji równolegle.
+
+    Zwraca tablicę liczb agentów o kształcie (repliki, kroki, stany) w kolejności STATES."""
+    overrides = overrides or {}
+    scenarios = [{**overrides, 'seed': replicate_seed} for replicate_seed in replicate_seeds(seed, replicates)]
+    runs = np.zeros((replicates, steps, len(STATES)), dtype=np.int32)
+    for replicate, _, history in run_scenarios(scenarios, steps, params, max_workers, cache_directory):
+        for step, state_counts in enumerate(history):
+            runs[replicate, step] = [state_counts[state] for state in STATES]
+    return runs
+
+
+def summarize_ensemble(runs, lower=0.05, upper=0.95):
+    """Średnia, mediana i kwantyle (pasmo ufności) krzywych S/E/I/R/D po wszystkich replikach."""
+    return {
+        'mean': runs.mean(axis=0),
+        'median': np.median(runs, axis=0),
+        'lower': np.quantile(runs, lower, axis=0),
+        'upper': np.quantile(runs, upper, axis=0),
+        'quantiles': (lower, upper),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ensemble Monte Carlo symulacji z pasmami ufności.")
+    parser.add_argument('--replicates', type=int, default=20, help="liczba powtórzeń")
+    parser.add_argument('--steps', type=int, default=500, help="liczba kroków każdej symulacji")
+    parser.add_argument('--seed', type=int, default=None, help="ziarno całego ensemble")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="liczba procesów")
+    parser.add_argument('--output', default='ensemble.npz', help="plik .npz z przebiegami i podsumowaniem")
+    parser.add_argument('--cache', default=CACHE_DIRECTORY, help="katalog pamięci podręcznej wyników")
+    parser.add_argument('--no-cache', action='store_true', help="zawsze uruchamiaj symulacje od nowa")
+    parser.add_argument('--plot', default='plot/ensemble_plot.png', help="plik z wykresem pasm (pusty - bez wykresu)")
+    args = parser.parse_args()
+
+    with open('parameters.json', 'r') as file:
+        params = json.load(file)
+
+    runs = run_ensemble(args.replicates, args.steps, seed=args.seed, params=params, max_workers=args.workers,
+                        cache_directory=None if args.no_cache else args.cache)
+    summary = summarize_ensemble(runs)
+    np.savez_compressed(args.output, runs=runs, states=np.array(STATES), mean=summary['mean'],
+                        median=summary['median'], lower=summary['lower'], upper=summary['upper'])
+
+    if args.plot:
+        import matplotlib.pyplot as plt
+        from plots import plot_state_history
+
+        plot_state_history(None, Config(params, seed=args.seed), ensemble=summary)
+        plt.savefig(args.plot, dpi=300)
+        plt.close()
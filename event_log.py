@@ -0,0 +1,155 @@
+import numpy as np
+
+from engine import NO_LOCATION, E, I, S
+from transmission import NO_INFECTOR, choose_infectors
+
+EVENT_LOG_MAGIC = b'SEIRDEVT'
+
+# Kolumny rekordu zdarzenia. Wejście do kwarantanny to zdarzenie I -> I w lokalizacji kwarantanny.
+EVENT_COLUMNS = (('tick', np.int32), ('agent', np.int32), ('from_state', np.int8), ('to_state', np.int8),
+                 ('infector', np.int32), ('location', np.int16))
+
+
+class EventLog:
+    """Dopisywany na dysk dziennik zdarzeń: przejść stanów (z zakażającym dla S -> E) i wejść do kwarantanny.
+
+    Rekordy o stałej szerokości są zbierane w kolumnowych buforach po `chunk_size` rekordów i zapisywane jako
+    kolejne porcje pliku, więc zużycie pamięci nie zależy od długości symulacji. Porcja to liczba rekordów
+    (uint32) i po kolei wszystkie kolumny EVENT_COLUMNS. Plik jest otwierany przy pierwszym zapisie porcji."""
+
+    def __init__(self, filename, rng=None, chunk_size=65536):
+        self.filename = filename
+        self.rng = rng if rng is not None else np.random.default_rng()  # Wybór zakażającego spośród kontaktów
+        self.chunk_size = chunk_size
+        self.buffers = {name: np.empty(chunk_size, dtype=dtype) for name, dtype in EVENT_COLUMNS}
+        self.length = 0  # Liczba rekordów w buforach
+        self.file = None
+        self.created = False  # Po zamknięciu pliku kolejne porcje są dopisywane na końcu
+
+    def record(self, tick, agents, from_state, to_state, infector=NO_INFECTOR, location=NO_LOCATION):
+        """Dopisuje zdarzenia agentów `agents`; pozostałe wartości to skalary albo tablice tej samej długości."""
+        agents = np.asarray(agents, dtype=np.int64).ravel()
+        columns = dict(zip((name for name, _ in EVENT_COLUMNS),
+                           np.broadcast_arrays(tick, agents, from_state, to_state, infector, location)))
+        start = 0
+        while start < len(agents):
+            count = min(len(agents) - start, self.chunk_size - self.length)
+            for name, values in columns.items():
+                self.buffers[name][self.length:self.length + count] = values[start:start + count]
+            self.length += count
+            start += count
+            if self.length == self.chunk_size:
+                self.flush()
+
+    def choose_infectors(self, pairs, infected):
+        """Zakażający agentów `infected` spośród ich zakaźnych kontaktów `pairs` (transmission.choose_infectors)."""
+        return choose_infectors(pairs, infected, self.rng.random)
+
+    def flush(self):
+        """Zapisuje zebrane rekordy jako kolejną porcję pliku; zwraca rozmiar pliku w bajtach."""
+        if self.file is None:
+            self.file = open(self.filename, 'ab' if self.created else 'wb')
+            if not self.created:
+                self.file.write(EVENT_LOG_MAGIC)
+                self.created = True
+        if self.length:
+            self.file.write(np.uint32(self.length).tobytes())
+            for name, _ in EVENT_COLUMNS:
+                self.file.write(self.buffers[name][:self.length].tobytes())
+            self.length = 0
+        self.file.flush()
+        return self.file.tell()
+
+    def resume(self, size):
+        """Kontynuuje dziennik zapisany do `size` bajtów (wczytanie checkpointu); niezapisane rekordy są odrzucane."""
+        if self.file is not None:
+            self.file.close()
+        self.file = open(self.filename, 'r+b')
+        self.file.truncate(size)
+        self.file.seek(size)
+        self.created = True
+        self.length = 0
+
+    def on_step(self, simulation):
+        pass
+
+    def on_finish(self, simulation):
+        self.flush()
+        self.file.close()
+        self.file = None
+
+
+def load_events(filename):
+    """Wszystkie zdarzenia z pliku EventLog jako słownik kolumn (niepełna ostatnia porcja jest pomijana)."""
+    with open(filename, 'rb') as file:
+        data = file.read()
+    if not data.startswith(EVENT_LOG_MAGIC):
+        raise ValueError(f"{filename} nie jest dziennikiem zdarzeń")
+
+    chunks = {name: [] for name, _ in EVENT_COLUMNS}
+    offset = len(EVENT_LOG_MAGIC)
+    record_size = sum(np.dtype(dtype).itemsize for _, dtype in EVENT_COLUMNS)
+    while offset + 4 <= len(data):
+        count = int(np.frombuffer(data, dtype=np.uint32, count=1, offset=offset)[0])
+        offset += 4
+        if offset + count * record_size > len(data):
+            break
+        for name, dtype in EVENT_COLUMNS:
+            chunks[name].append(np.frombuffer(data, dtype=dtype, count=count, offset=offset))
+            offset += count * np.dtype(dtype).itemsize
+    return {name: np.concatenate(values) if values else np.zeros(0, dtype=dtype)
+            for (name, dtype), values in zip(EVENT_COLUMNS, chunks.values())}
+
+
+def infection_tree(events):
+    """Zakażenia w kolejności czasu: (tick, zakażony agent, zakażający agent, numer zakażenia zakażającego).
+
+    Zakażeniem jest przejście S -> E, a dla początkowo zakażonych S -> I bez zakażającego (NO_INFECTOR). Agent
+    może zostać zakażony wielokrotnie (po utracie odporności), więc źródło jest wskazane także jako indeks
+    zakażenia (wiersza wyniku), w trakcie którego zakażający zaraził - dla początkowo zakażonych -1."""
+    infection = (events['from_state'] == S) & ((events['to_state'] == E) | (events['to_state'] == I))
+    order = np.argsort(events['tick'][infection], kind='stable')
+    tick = events['tick'][infection][order].astype(np.int64)
+    agent = events['agent'][infection][order].astype(np.int64)
+    infector = events['infector'][infection][order].astype(np.int64)
+
+    # Zakażenie źródła: ostatnie zakażenie zakażającego do danego ticku - wyszukiwanie po kluczu (agent, tick).
+    # Ten sam tick dopuszcza zakażenia przez początkowo zakażonych, którzy zarażają już w ticku 0
+    span = int(tick.max(initial=0)) + 1
+    keys = agent * span + tick
+    by_key = np.argsort(keys, kind='stable')
+    position = np.searchsorted(keys[by_key], infector * span + tick, side='right') - 1
+    source = by_key[np.clip(position, 0, None)] if len(by_key) else np.zeros(0, dtype=np.int64)
+    valid = (infector != NO_INFECTOR) & (position >= 0)
+    valid[valid] = agent[source[valid]] == infector[valid]
+    source_infection = np.where(valid, source, -1)
+    return {'tick': tick, 'agent': agent, 'infector': infector, 'source_infection': source_infection}
+
+
+def secondary_infections(tree):
+    """Liczba osób zakażonych w trakcie każdego zakażenia z infection_tree."""
+    sources = tree['source_infection']
+    return np.bincount(sources[sources >= 0], minlength=len(sources))
+
+
+def reproduction_numbers(events, window=1):
+    """Liczba reprodukcji R_t według kohort: średnia liczba zakażeń wtórnych osób zakażonych w tickach
+    [t, t + window). Zwraca (ticki początków okien, R_t); okna bez zakażeń mają NaN.
+
+    Zakażenia z końca symulacji nie zdążyły wywołać wszystkich zakażeń wtórnych, więc ostatnie wartości są
+    zaniżone."""
+    tree = infection_tree(events)
+    if len(tree['tick']) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0)
+    cohort = tree['tick'] // window
+    infections = np.bincount(cohort)
+    secondary = np.bincount(cohort, weights=secondary_infections(tree), minlength=len(infections))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.arange(len(infections)) * window, np.where(infections > 0, secondary / infections, np.nan)
+
+
+def generation_intervals(events):
+    """Odstępy pokoleń: czas (w tickach) między zakażeniem zakażającego a zakażeniem, które wywołał."""
+    tree = infection_tree(events)
+    secondary = tree['source_infection'] >= 0
+    return tree['tick'][secondary] - tree['tick'][tree['source_infection'][secondary]]
@@ -48,4 +48,37 @@ def vaccinated_immunity_loss_proba(vaccinated):
     return -0.15 if vaccinated == 'True' else 0
 
 def mask_immunity_loss_proba(mask):
-    return 0
\ No newline at end of file
+    return 0
+
+# Funkcje modyfikujące (wiek, płeć, szczepienie, maseczka) dla każdego z prawdopodobieństw przejść,
+# wraz z nazwą pola Config z bazową wartością prawdopodobieństwa
+RATE_FUNCTIONS = {
+    'infection': ('infection_rate', age_infection_proba, gender_infection_proba, vaccinated_infection_proba,
+                  mask_infection_proba),
+    'recovery': ('recovery_rate', age_recovery_proba, gender_recovery_proba, vaccinated_recovery_proba,
+                 mask_recovery_proba),
+    'mortality': ('mortality_rate', age_mortality_proba, gender_mortality_proba, vaccinated_mortality_proba,
+                  mask_mortality_proba),
+    'immunity_loss': ('immunity_loss_rate', age_immunity_loss_proba, gender_immunity_loss_proba,
+                      vaccinated_immunity_loss_proba, mask_immunity_loss_proba),
+}
+
+def compute_rate(rate, base_rate, age, gender, vaccinated, mask):
+    """Prawdopodobieństwo przejścia `rate` dla pojedynczego agenta (obcięte do przedziału [0, 1])."""
+    _, age_proba, gender_proba, vaccinated_proba, mask_proba = RATE_FUNCTIONS[rate]
+    return max(0, min(base_rate + age_proba(age) + gender_proba(gender) + vaccinated_proba(vaccinated) +
+                      mask_proba(mask), 1))
+
+def compute_rates(rate, base_rate, age, male, vaccinated, mask):
+    """Wektorowa wersja compute_rate dla całej populacji.
+
+    `age` to tablica liczb całkowitych, a `male`, `vaccinated` i `mask` to tablice logiczne. Funkcja wieku
+    jest liczona raz dla każdego wieku (tablica wartości), a pozostałe modyfikatory tylko dla dwóch kategorii."""
+    _, age_proba, gender_proba, vaccinated_proba, mask_proba = RATE_FUNCTIONS[rate]
+    age = np.asarray(age, dtype=np.int64)
+    age_table = np.asarray(age_proba(np.arange(age.max(initial=0) + 1)), dtype=np.float64)
+    result = base_rate + age_table[age] \
+        + np.where(male, gender_proba('Male'), gender_proba('Female')) \
+        + np.where(vaccinated, vaccinated_proba('True'), vaccinated_proba('False')) \
+        + np.where(mask, mask_proba('True'), mask_proba('False'))
+    return np.clip(result, 0, 1)
@@ -1,17 +1,42 @@
 import pygame
-from config import Config
+from config import Config, SIMULATION_STEPS
+from plot_stage import FIGURES
+from result_cache import ResultCache, result_key
 from simulation import Simulation
 
 
 if __name__ == "__main__":
-    pygame.init()
     config = Config()
-    simulation = Simulation(config)
 
-    screen = pygame.Surface((config.width, config.height))
-    clock = pygame.time.Clock()
+    # Wyniki zapisywane przez Simulation.run (i historia stanów) - zapamiętywane w ResultCache
+    result_files = ['vis.gif', 'state_history.npz'] + ['plot/' + FIGURES[name] for name in config.plots]
+    if config.record_strata:
+        result_files.append('state_strata.npz')
+    if config.record_trajectory:
+        result_files.append(config.trajectory_filename)
+    if config.record_events:
+        result_files.append(config.events_filename)
 
-    # NOTE: odkomentować, jeśli potrzeba wyświelić symulację w oknie pygame
-    screen = pygame.display.set_mode((config.width, config.height))
+    # Dla ustalonego ziarna te same parametry dają te same wyniki - nie trzeba ich liczyć ponownie
+    cache = ResultCache()
+    key = result_key(config, SIMULATION_STEPS)
+    if key is not None and cache.restore(key, result_files):
+        print(f"Wyniki wczytane z pamięci podręcznej ({key[:12]})")
+    else:
+        pygame.init()
+        simulation = Simulation(config)
 
-    simulation.run(500, screen, clock, "vis.gif")  # Uruchamiamy symulację przez 500 kroków
+        screen = pygame.Surface((config.width, config.height))
+        clock = pygame.time.Clock()
+
+        # NOTE: odkomentować, jeśli potrzeba wyświelić symulację w oknie pygame
+        screen = pygame.display.set_mode((config.width, config.height))
+
+        plots = simulation.run(SIMULATION_STEPS, screen, clock, "vis.gif")  # Uruchamiamy symulację przez 500 kroków
+        simulation.recorder.save_npz("state_history.npz")  # W tym czasie wykresy rysują się w tle
+        if simulation.strata is not None:
+            simulation.strata.save_npz("state_strata.npz")
+        plots.wait()
+
+        if key is not None:
+            cache.put(key, {name: name for name in result_files}, config, SIMULATION_STEPS)
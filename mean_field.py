@@ -0,0 +1,231 @@
+import math
+
+import numpy as np
+
+from engine import AGENT_SIZE, AGENT_SPEED, QUICK_TRAVEL_FRAMES
+from functions import RATE_FUNCTIONS, compute_rates
+from population import age_probabilities, population_attributes, proba_by_age
+from recorder import StateRecorder
+from simulation import board_size
+from strata import AGE_GROUP_SIZE, AGE_GROUPS
+
+NUM_STRATA = AGE_GROUPS * 2 * 2 * 2  # Grupa wieku x płeć x szczepienie x maseczka
+
+
+def stratum_codes(age, male, vaccinated, mask):
+    """Numer warstwy (grupa wieku, płeć, szczepienie, maseczka) każdego agenta."""
+    age_group = np.clip(np.asarray(age) // AGE_GROUP_SIZE, 0, AGE_GROUPS - 1)
+    return ((age_group * 2 + np.asarray(male, dtype=np.int64)) * 2 + np.asarray(vaccinated, dtype=np.int64)) * 2 \
+        + np.asarray(mask, dtype=np.int64)
+
+
+def expected_strata(config):
+    """Oczekiwany udział każdej warstwy w populacji budowanej przez Simulation (population.sample_attributes)
+    oraz średnie prawdopodobieństwa przejść w warstwach (ważone rozkładem wieku wewnątrz grupy wieku)."""
+    ages, age_weights = age_probabilities(config)
+
+    # Wszystkie kombinacje (wiek, płeć, szczepienie, maseczka) z ich prawdopodobieństwem
+    age, male, vaccinated, mask = (grid.ravel() for grid in np.meshgrid(ages, [False, True], [False, True],
+                                                                         [False, True], indexing='ij'))
+    vaccinated_proba = proba_by_age(config, 'vaccinated_proba', age)
+    mask_wearing_proba = proba_by_age(config, 'mask_wearing_proba', age)
+    weights = age_weights[age] * 0.5 \
+        * np.where(vaccinated, vaccinated_proba, 1 - vaccinated_proba) \
+        * np.where(mask, mask_wearing_proba, 1 - mask_wearing_proba)
+    return strata_summary(config, stratum_codes(age, male, vaccinated, mask), weights, age, male, vaccinated, mask)
+
+
+def population_strata(config, age, male, vaccinated, mask):
+    """Liczba agentów w każdej warstwie i średnie prawdopodobieństwa przejść dla konkretnej populacji
+    (np. Simulation.attributes)."""
+    return strata_summary(config, stratum_codes(age, male, vaccinated, mask), np.ones(len(age)), age, male,
+                          vaccinated, mask)
+
+
+def strata_summary(config, codes, weights, age, male, vaccinated, mask):
+    totals = np.bincount(codes, weights=weights, minlength=NUM_STRATA)
+    rates = {}
+    for name, (field, *_) in RATE_FUNCTIONS.items():
+        values = compute_rates(name, getattr(config, field), age, male, vaccinated, mask)
+        rate_sums = np.bincount(codes, weights=weights * values, minlength=NUM_STRATA)
+        rates[name] = np.divide(rate_sums, totals, out=np.zeros(NUM_STRATA), where=totals > 0)
+    return totals, rates
+
+
+def pair_contact_probability(radius, width, height):
+    """Prawdopodobieństwo, że dwa punkty o rozkładzie jednostajnym w prostokącie width x height są odległe
+    o mniej niż `radius` (wzór dokładny dla radius <= min(width, height))."""
+    radius = min(radius, width, height)
+    return (math.pi * radius ** 2 * width * height - 4 / 3 * radius ** 3 * (width + height) + radius ** 4 / 2) \
+        / (width * height) ** 2
+
+
+def central_location_fraction(config):
+    """Średni udział czasu, który agent spoza kwarantanny spędza w Central Location."""
+    if config.num_central_locations == 0 or config.central_location_visit_proba <= 0:
+        return 0.0
+    # Powrót z Central Location wlicza się do czasu poza nią (agent może wtedy wylosować kolejną wizytę)
+    stay = config.frames_spent_in_central_location
+    return stay / (1 / config.central_location_visit_proba + stay + QUICK_TRAVEL_FRAMES)
+
+
+def contact_probability(config):
+    """Prawdopodobieństwo, że dany zakaźny i dany podatny agent są w jednym kroku w promieniu zakażenia.
+
+    Agenci poza Central Location są rozłożeni jednostajnie po planszy (bez kwarantanny), a agenci w Central
+    Location - jednostajnie w jej wnętrzu; wszystkie Central Locations leżą w środku planszy, więc działają jak
+    jedna, zagęszczona lokalizacja."""
+    radius = config.infection_radius
+    width, height = (size - 2 * AGENT_SIZE for size in board_size(config))
+    inside = central_location_fraction(config)
+    location_size = config.central_location_size - 2 * AGENT_SIZE
+    return (1 - inside) ** 2 * pair_contact_probability(radius, width, height) \
+        + inside ** 2 * pair_contact_probability(radius, location_size, location_size) \
+        + 2 * inside * (1 - inside) * math.pi * radius ** 2 / (width * height)
+
+
+def contact_duration(config):
+    """Średni czas (w tickach) przebywania dwóch mijających się agentów w promieniu zakażenia: średnia cięciwa
+    koła (pi r / 2) przez średnią prędkość względną agentów o losowych kierunkach (4 v / pi)."""
+    return math.pi ** 2 * config.infection_radius / (8 * AGENT_SPEED)
+
+
+def transmission_probability(config, infection_rate):
+    """Prawdopodobieństwo zarażenia na tick dla pary (zakaźny, podatny) w modelu pełnego wymieszania.
+
+    W modelu agentowym para pozostaje w kontakcie przez wiele ticków, więc przy dużym infection_rate zarażenie
+    następuje już na początku kontaktu. Prawdopodobieństwo zarażenia w całym kontakcie, 1 - (1 - p)^czas,
+    jest rozkładane równo na czas kontaktu."""
+    duration = contact_duration(config)
+    return contact_probability(config) * (1 - (1 - infection_rate) ** duration) / duration
+
+
+def age_compartment(counts, entering):
+    """Przesuwa liczniki o jeden tick czasu spędzonego w stanie i dopisuje agentów, którzy weszli do stanu
+    w tym ticku. Ostatni przedział zbiera wszystkich, dla których minął już minimalny okres stanu."""
+    counts[..., -1] += counts[..., -2]
+    counts[..., 1:-1] = counts[..., :-2]
+    counts[..., 0] = 0
+    counts[..., 1] += entering
+
+
+class MeanFieldModel:
+    """Szybki, przybliżony model SEIRD bez geometrii pojedynczych agentów - do przeglądania wielu scenariuszy.
+
+    Populacja jest podzielona na warstwy (grupa wieku x płeć x szczepienie x maseczka) z prawdopodobieństwami
+    przejść z functions.py. Przedziały E, I i R pamiętają czas spędzony w stanie, więc minimalne okresy
+    z Config działają jak w modelu agentowym. Każdy krok to krok tau-leaping o długości jednego ticka: liczby
+    przejść są losowane z rozkładu dwumianowego dla całej warstwy. Zarażenie zakłada pełne wymieszanie
+    populacji z częstością kontaktów skalibrowaną do modelu agentowego (transmission_probability - gęstość
+    agentów, infection_radius, Central Location); zakażeni w kwarantannie nie zarażają.
+
+    Wynik (StateRecorder, state_history) ma ten sam format co Simulation."""
+
+    def __init__(self, config, attributes=None, rng=None):
+        self.config = config
+        seed_sequence = np.random.SeedSequence(config.seed)
+        self.seed = seed_sequence.entropy
+        self.rng = rng if rng is not None else np.random.default_rng(seed_sequence)
+        self.tick = 0
+
+        # Liczba agentów w warstwach: dla podanej populacji (wiek, płeć, szczepienie, maseczka) albo tabeli
+        # Config.population_file dokładna, w przeciwnym razie wylosowana z rozkładów cech z Config
+        if attributes is None and config.population_file is not None:
+            attributes = population_attributes(config, self.rng)
+        if attributes is not None:
+            counts, self.rates = population_strata(config, *attributes)
+            counts = counts.astype(np.int64)
+        else:
+            weights, self.rates = expected_strata(config)
+            counts = self.rng.multinomial(config.num_agents, weights / weights.sum())
+        self.transmission = transmission_probability(config, self.rates['infection'])
+
+        # Tablice (warstwy, czas w stanie); kolejny wymiar zakażonych: 0 - poza kwarantanną, 1 - w kwarantannie
+        infectious_period = max(config.recovery_period, config.mortality_period)
+        self.susceptible = counts.copy()
+        self.exposed = np.zeros((NUM_STRATA, max(config.incubation_period, 1) + 1), dtype=np.int64)
+        self.infectious = np.zeros((2, NUM_STRATA, max(infectious_period, 1) + 1), dtype=np.int64)
+        self.recovered = np.zeros((NUM_STRATA, max(config.immunity_loss_period, 1) + 1), dtype=np.int64)
+        self.dead = np.zeros(NUM_STRATA, dtype=np.int64)
+        self.dead_quarantined = 0
+
+        # Początkowo zakażeni to losowi agenci populacji, w stanie I od ticku 0
+        initial = self.rng.multivariate_hypergeometric(counts, min(config.initial_infected, int(counts.sum())))
+        self.susceptible -= initial
+        self.infectious[0, :, 0] = initial
+
+        # Czas w stanie I (wiersze tablicy infectious), od którego możliwe jest wyzdrowienie i śmierć
+        ages = np.arange(self.infectious.shape[-1])
+        self.can_recover = ages >= config.recovery_period
+        self.can_die = ages >= config.mortality_period
+
+        self.recorder = StateRecorder(config.record_transitions)
+        self.running = False
+
+    def binomial(self, counts, proba):
+        """Liczby przejść w przedziałach `counts` z prawdopodobieństwem `proba`; losowane są tylko niepuste
+        przedziały (większość przedziałów czasu w stanie jest pusta)."""
+        result = np.zeros_like(counts)
+        occupied = counts > 0
+        result[occupied] = self.rng.binomial(counts[occupied], np.broadcast_to(proba, counts.shape)[occupied])
+        return result
+
+    def state_counts(self):
+        """Liczba agentów w każdym stanie (kolejność STATES)."""
+        return [int(self.susceptible.sum()), int(self.exposed.sum()), int(self.infectious.sum()),
+                int(self.recovered.sum()), int(self.dead.sum())]
+
+    def step(self):
+        """Jeden tick modelu - kolejność faz jak w VectorizedEngine.step."""
+        config = self.config
+        self.tick += 1
+
+        # Kwarantanna przed przejściami stanów, jak w visit_quarantine
+        if config.quarantine:
+            entering = self.binomial(self.infectious[0], config.quarantine_visit_proba)
+            self.infectious[0] -= entering
+            self.infectious[1] += entering
+
+        # Każdy z zakaźnych agentów poza kwarantanną zaraża podatnego agenta niezależnie (transmission_probability)
+        infectious = int(self.infectious[0].sum())
+        infection_proba = 1 - (1 - self.transmission) ** infectious
+        infected = self.binomial(self.susceptible, infection_proba)
+
+        incubated = self.exposed[:, -1].copy()
+        self.exposed[:, -1] = 0
+
+        ill = self.infectious
+        recovered = self.binomial(ill * self.can_recover, self.rates['recovery'][:, None])
+        died = self.binomial((ill - recovered) * self.can_die, self.rates['mortality'][:, None])
+        ill -= recovered + died
+
+        losing_immunity = self.binomial(self.recovered[:, -1], self.rates['immunity_loss'])
+        self.recovered[:, -1] -= losing_immunity
+
+        self.susceptible += losing_immunity - infected
+        age_compartment(self.exposed, infected)
+        age_compartment(self.infectious, 0)
+        self.infectious[0, :, 1] += incubated
+        age_compartment(self.recovered, recovered.sum(axis=(0, 2)))
+        self.dead += died.sum(axis=(0, 2))
+        self.dead_quarantined += int(died[1].sum())
+
+        self.transitions = [int(infected.sum()), int(incubated.sum()), int(recovered.sum()), int(died.sum())]
+
+    def record_state(self):
+        """Zapisuje liczbę agentów w każdym stanie (i liczby przejść przy Config.record_transitions)."""
+        quarantined = int(self.infectious[1].sum()) + self.dead_quarantined
+        self.recorder.record_counts(self.state_counts(), self.transitions, quarantined)
+
+    def run_headless(self, steps):
+        """Uruchamia `steps` kroków modelu; zwraca historię stanów (jak Simulation.run_headless)."""
+        self.running = True
+        while self.running and steps > 0:
+            self.step()
+            self.record_state()
+            steps -= 1
+        return self.state_history
+
+    @property
+    def state_history(self):
+        return self.recorder.state_history()
@@ -0,0 +1,73 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+# Wykresy dostępne w Config.plots: nazwa -> plik w katalogu wykresów
+FIGURES = {
+    'state_history': 'state_history_plot.png',
+    'distributions': 'distributions_plot.png',
+    'rates': 'rates_plot.png',
+}
+
+
+def plot_data(simulation):
+    """Dane potrzebne do wykresów, przekazywane do procesów rysujących (bez samych agentów)."""
+    return {
+        'state_counts': simulation.recorder.counts[:simulation.recorder.length].copy(),
+        'config': simulation.config,
+        'dists': simulation.dists,
+        'rates': simulation.rates,
+    }
+
+
+def render_figure(name, data, filename, dpi):
+    """Rysuje i zapisuje jeden wykres - wywoływane w procesie rysującym."""
+    import matplotlib
+    matplotlib.use('Agg')  # Bez okien - proces rysujący tylko zapisuje pliki
+    import matplotlib.pyplot as plt
+    from plots import plot_dists, plot_rates, plot_state_history
+
+    if name == 'state_history':
+        plot_state_history(data['state_counts'], data['config'])
+    elif name == 'distributions':
+        plot_dists(data['dists'])
+    elif name == 'rates':
+        plot_rates(data['rates'])
+    plt.savefig(filename, dpi=dpi)
+    plt.close('all')
+    return filename
+
+
+class PlotJob:
+    """Wykresy rysowane w tle; wait() czeka na zapis wszystkich plików i zwraca ich nazwy."""
+
+    def __init__(self, futures=()):
+        self.futures = list(futures)
+
+    def done(self):
+        return all(future.done() for future in self.futures)
+
+    def wait(self):
+        return [future.result() for future in self.futures]
+
+
+def save_plots(simulation, figures=None, dpi=None, directory='plot', background=False):
+    """Rysuje wybrane wykresy (domyślnie Config.plots, rozdzielczość Config.plot_dpi) równolegle, każdy w osobnym
+    procesie. Pusta lista wykresów nie uruchamia żadnego procesu.
+
+    Bez `background` czeka na zapis wszystkich plików; w przeciwnym razie zwraca od razu PlotJob."""
+    config = simulation.config
+    figures = config.plots if figures is None else figures
+    dpi = config.plot_dpi if dpi is None else dpi
+    unknown = [name for name in figures if name not in FIGURES]
+    if unknown:
+        raise ValueError(f"Nieznane wykresy: {', '.join(unknown)} (dostępne: {', '.join(FIGURES)})")
+    if not figures:
+        return PlotJob()
+
+    os.makedirs(directory, exist_ok=True)
+    data = plot_data(simulation)
+    executor = ProcessPoolExecutor(max_workers=len(figures))
+    job = PlotJob(executor.submit(render_figure, name, data, os.path.join(directory, FIGURES[name]), dpi)
+                  for name in figures)
+    executor.shutdown(wait=not background)
+    return job
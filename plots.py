@@ -0,0 +1,179 @@
+import numpy as np
+import matplotlib.pyplot as plt
+
+from functions import age_immunity_loss_proba, age_infection_proba, age_mortality_proba, age_recovery_proba, \
+    gender_immunity_loss_proba, gender_infection_proba, gender_mortality_proba, gender_recovery_proba, \
+    mask_immunity_loss_proba, mask_infection_proba, mask_mortality_proba, mask_recovery_proba, \
+    vaccinated_immunity_loss_proba, vaccinated_infection_proba, vaccinated_mortality_proba, vaccinated_recovery_proba
+
+
+STATE_LABELS = (("S", "S - Susceptible", "blue"),
+                ("E", "E - Exposed", "yellow"),
+                ("I", "I - Infected", "red"),
+                ("R", "R - Recovered", "green"),
+                ("D", "D - Dead", "black"))
+
+
+def plot_state_history(state_counts, config, ensemble=None):
+    """Rysowanie wykresu rozkładu stanów w czasie; `state_counts` to tablica (kroki, stany) w kolejności STATES.
+
+    Dla wyniku ensemble (summarize_ensemble) rysuje średnią oraz pasmo między dolnym i górnym kwantylem
+    zamiast pojedynczej trajektorii."""
+    # Tworzymy wykres
+    f, ax = plt.subplots(1, 1, figsize=(15, 6))
+    if ensemble is None:
+        time_steps = np.arange(len(state_counts))
+        for index, (state, label, color) in enumerate(STATE_LABELS):
+            plt.plot(time_steps, state_counts[:, index], label=label, color=color)
+    else:
+        time_steps = np.arange(len(ensemble['mean']))
+        for index, (state, label, color) in enumerate(STATE_LABELS):
+            plt.plot(time_steps, ensemble['mean'][:, index], label=label, color=color)
+            plt.fill_between(time_steps, ensemble['lower'][:, index], ensemble['upper'][:, index],
+                             color=color, alpha=0.2)
+
+    # Dodajemy parametry config do tytułu wykresu
+    title = f"Agent States Over Time"
+    plt.title(title)
+
+    plt.xlabel("Time Step")
+    plt.ylabel("Number of Agents")
+    plt.legend()
+    plt.grid(True)
+
+    text = 'Configuration parameters:\n' + config.params_values_text()
+    box = dict(boxstyle='round', facecolor='grey', alpha=0.15)
+    ax.text(1.03, 0.98, text, transform=ax.transAxes, fontsize=8, verticalalignment='top', bbox=box)
+    plt.tight_layout()
+
+
+def plot_dists(dists):
+    """Rozkłady wieku, płci, szczepień i noszenia maseczek w populacji (Simulation.dists)."""
+    fig, ax = plt.subplots(2, 2, figsize=(10, 5))
+
+    ax[0, 0].bar(dists['age'].keys(), dists['age'].values(), color="skyblue")
+    ax[0, 0].set_title("Age Distribution")
+    ax[0, 0].set_xlabel("Age")
+    ax[0, 0].set_ylabel("Count")
+    ax[0, 0].grid(True)
+
+    ax[0, 1].pie(dists['gender'].values(), labels=dists['gender'].keys(), autopct='%1.2f%%',
+                 startangle=90, colors=["blue", "pink"])
+    ax[0, 1].set_title("Gender Distribution")
+
+    ax[1, 0].pie(dists['vaccinated'].values(), labels=dists['vaccinated'].keys(), autopct='%1.2f%%',
+                 startangle=90, colors=["blue", "pink"])
+    ax[1, 0].set_title("Vaccination Distribution")
+
+    ax[1, 1].pie(dists['mask'].values(), labels=dists['mask'].keys(), autopct='%1.2f%%', startangle=90,
+                 colors=["blue", "pink"])
+    ax[1, 1].set_title("Mask Wearing Distribution")
+
+    plt.tight_layout()
+
+def plot_functions():
+    """Zależność prawdopodobieństw przejść od wieku, płci, szczepienia i maseczki (funkcje z functions.py).
+
+    Jak pozostałe funkcje rysujące tylko rysuje - zwraca obie figury, które wywołujący może zapisać."""
+    fig1, ax = plt.subplots(2, 4, figsize=(10, 5))
+    fig2, ax2 = plt.subplots(2, 4, figsize=(10, 5))
+
+    ages = np.linspace(0, 100)
+    genders = ['Male', 'Female']
+    vaccinated = ['True', 'False']
+    masks = ['True', 'False']
+
+    infection_vals = [age_infection_proba(age) for age in ages]
+    ax[0, 0].plot(ages, infection_vals, label="InfectionProbability(age)")
+    ax[0, 0].set_xlabel("Age")
+    ax[0, 0].set_ylabel("Rate")
+    ax[0, 0].legend()
+    ax[0, 0].grid(True)
+
+    ax[0, 1].bar(genders, [gender_infection_proba(gender) for gender in genders], color='darkgreen')
+    ax[0, 1].set_title("InfectionProbability(gender)")
+
+    ax[0, 2].bar(vaccinated, [vaccinated_infection_proba(vacc) for vacc in vaccinated], color='gray')
+    ax[0, 2].set_title("InfectionProbability(vaccinated)")
+
+    ax[0, 3].bar(masks, [mask_infection_proba(mask) for mask in masks], color='red')
+    ax[0, 3].set_title("InfectionProbability(wearing_mask)")
+
+    recovery_vals = [age_recovery_proba(age) for age in ages]
+    ax[1, 0].plot(ages, recovery_vals, label="RecoveryProbability(age)")
+    ax[1, 0].set_xlabel("Age")
+    ax[1, 0].set_ylabel("Rate")
+    ax[1, 0].legend()
+    ax[1, 0].grid(True)
+
+    ax[1, 1].bar(genders, [gender_recovery_proba(gender) for gender in genders], color='darkgreen')
+    ax[1, 1].set_title("RecoveryProbability(gender)")
+
+    ax[1, 2].bar(vaccinated, [vaccinated_recovery_proba(vacc) for vacc in vaccinated], color='gray')
+    ax[1, 2].set_title("RecoveryProbability(vaccinated)")
+
+    ax[1, 3].bar(masks, [mask_recovery_proba(mask) for mask in masks], color='red')
+    ax[1, 3].set_title("RecoveryProbability(wearing_mask)")
+
+    mortality_vals = [age_mortality_proba(age) for age in ages]
+    ax2[0, 0].plot(ages, mortality_vals, label="MortalityProbability(age)")
+    ax2[0, 0].set_xlabel("Age")
+    ax2[0, 0].set_ylabel("Rate")
+    ax2[0, 0].legend()
+    ax2[0, 0].grid(True)
+
+    ax2[0, 1].bar(genders, [gender_mortality_proba(gender) for gender in genders], color='darkgreen')
+    ax2[0, 1].set_title("MortalityProbability(gender)")
+
+    ax2[0, 2].bar(vaccinated, [vaccinated_mortality_proba(vacc) for vacc in vaccinated], color='gray')
+    ax2[0, 2].set_title("MortalityProbability(vaccinated)")
+
+    ax2[0, 3].bar(masks, [mask_mortality_proba(mask) for mask in masks], color='red')
+    ax2[0, 3].set_title("MortalityProbability(wearing_mask)")
+
+    immunity_loss_vals = [age_immunity_loss_proba(age) for age in ages]
+    ax2[1, 0].plot(ages, immunity_loss_vals, label="ImmunityLossProbability(age)")
+    ax2[1, 0].set_xlabel("Age")
+    ax2[1, 0].set_ylabel("Rate")
+    ax2[1, 0].legend()
+    ax2[1, 0].grid(True)
+
+    ax2[1, 1].bar(genders, [gender_immunity_loss_proba(gender) for gender in genders], color='darkgreen')
+    ax2[1, 1].set_title("ImmunityLossProbability(gender)")
+
+    ax2[1, 2].bar(vaccinated, [vaccinated_immunity_loss_proba(vacc) for vacc in vaccinated], color='gray')
+    ax2[1, 2].set_title("ImmunityLossProbability(vaccinated)")
+
+    ax2[1, 3].bar(masks, [mask_immunity_loss_proba(mask) for mask in masks], color='red')
+    ax2[1, 3].set_title("ImmunityLossProbability(wearing_mask)")
+
+    return fig1, fig2
+
+def plot_rates(rates):
+    """Rozkłady prawdopodobieństw przejść w populacji (Simulation.rates)."""
+    fig, ax = plt.subplots(1, 4, figsize=(15, 10))
+
+    ax[0].bar(rates["infection"].keys(), rates["infection"].values(), color="red")
+    ax[0].set_title("Infection Rates Distribution")
+    ax[0].set_xlabel("Infection Rate (%)")
+    ax[0].set_ylabel("Rate")
+    ax[0].grid(True)
+
+    ax[1].bar(rates["recovery"].keys(), rates["recovery"].values(), color="green")
+    ax[1].set_title("Recovery Rates Distribution")
+    ax[1].set_xlabel("Recovery Rate (%)")
+    ax[1].set_ylabel("Rate")
+    ax[1].grid(True)
+
+    ax[2].bar(rates["mortality"].keys(), rates["mortality"].values(), color="black")
+    ax[2].set_title("Mortality Rates Distribution")
+    ax[2].set_xlabel("Mortality Rate (%)")
+    ax[2].set_ylabel("Rate")
+    ax[2].grid(True)
+
+    ax[3].bar(rates["immunity_loss"].keys(), rates["immunity_loss"].values(), color="blue")
+    ax[3].set_title("Immunity Loss Rates Distribution")
+    ax[3].set_xlabel("Immunity Loss Rate (%)")
+    ax[3].set_ylabel("Rate")
+    ax[3].grid(True)
+
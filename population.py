@@ -0,0 +1,221 @@
+import math
+import os
+import struct
+import zipfile
+
+import numpy as np
+
+from agent import AGE_MEAN, AGE_STD_DEV
+from engine import AGENT_ARRAYS, AGENT_SPEED, I, NO_LOCATION, S
+from result_cache import file_digest
+from strata import AGE_GROUP_SIZE, AGE_GROUPS, age_groups
+
+ATTRIBUTE_COLUMNS = ('age', 'male', 'vaccinated', 'mask')  # Cechy agentów (kolejność Simulation.attributes)
+COUNT_COLUMN = 'count'  # Opcjonalna kolumna tabeli populacji: liczba osób opisanych wierszem
+# Typy kolumn tabeli populacji wczytanej z .csv (kolumny .npz/.npy mają typy zapisane w pliku)
+COLUMN_DTYPES = {'age': np.int64, 'male': bool, 'vaccinated': bool, 'mask': bool, COUNT_COLUMN: np.int64}
+CSV_CACHE_DIRECTORY = os.path.join('.cache', 'population')  # Tabele .csv przekonwertowane do .npz
+
+
+def age_distribution(max_age):
+    """Prawdopodobieństwa wieku 0..max_age agenta z Agent.assign_age (część całkowita z rozkładu normalnego,
+    wartości ujemne obcięte do 0)."""
+    edges = np.arange(1, max_age + 1)
+    cdf = np.array([0.5 * (1 + math.erf((edge - AGE_MEAN) / (AGE_STD_DEV * math.sqrt(2)))) for edge in edges])
+    return np.diff(np.concatenate(([0.0], cdf, [1.0])))
+
+
+def age_group_weights(config):
+    """Udziały grup wieku z Config.age_distribution (jedna wartość na grupę STRATA_LABELS['age_group'])."""
+    weights = np.asarray(config.age_distribution, dtype=np.float64)
+    if weights.shape != (AGE_GROUPS,):
+        raise ValueError(f"age_distribution musi mieć {AGE_GROUPS} wartości (grupy wieku co {AGE_GROUP_SIZE} lat)")
+    return weights / weights.sum()
+
+
+def age_probabilities(config):
+    """Możliwe wartości wieku i ich prawdopodobieństwa w populacji losowanej przez sample_ages."""
+    if config.age_distribution is None:
+        ages = np.arange(AGE_MEAN + 10 * AGE_STD_DEV + 1)
+        return ages, age_distribution(ages[-1])
+    ages = np.arange(AGE_GROUPS * AGE_GROUP_SIZE)
+    return ages, np.repeat(age_group_weights(config), AGE_GROUP_SIZE) / AGE_GROUP_SIZE
+
+
+def proba_by_age(config, field, age):
+    """Prawdopodobieństwo cechy `field` ('vaccinated_proba', 'mask_wearing_proba') dla agentów w wieku `age`:
+    z listy Config.<field>_by_age (jedna wartość na grupę wieku), a bez niej - stała wartość z Config."""
+    by_age = getattr(config, field + '_by_age')
+    if by_age is None:
+        return np.full(np.shape(age), getattr(config, field), dtype=np.float64)
+    by_age = np.asarray(by_age, dtype=np.float64)
+    if by_age.shape != (AGE_GROUPS,):
+        raise ValueError(f"{field}_by_age musi mieć {AGE_GROUPS} wartości (grupy wieku co {AGE_GROUP_SIZE} lat)")
+    return by_age[age_groups(age)]
+
+
+def sample_ages(config, rng, count):
+    """Wiek `count` agentów: rozkład normalny jak w Agent.assign_age albo udziały grup wieku z
+    Config.age_distribution (wiek jednostajny w grupie)."""
+    if config.age_distribution is None:
+        return np.maximum(np.trunc(rng.normal(AGE_MEAN, AGE_STD_DEV, count)), 0).astype(np.int64)
+    groups = rng.choice(AGE_GROUPS, count, p=age_group_weights(config))
+    return groups * AGE_GROUP_SIZE + rng.integers(0, AGE_GROUP_SIZE, count)
+
+
+def sample_attributes(config, rng, count, known=None):
+    """Cechy (wiek, płeć męska, szczepienie, maseczka) `count` agentów jako tablice, losowane wektorowo.
+
+    Cechy podane w `known` (np. wczytane z tabeli populacji) są zachowane; szczepienie i maseczka zależą od wieku,
+    gdy Config ma prawdopodobieństwa dla grup wieku."""
+    known = known if known is not None else {}
+    age = np.asarray(known['age'], dtype=np.int64) if 'age' in known else sample_ages(config, rng, count)
+    male = np.asarray(known['male'], dtype=bool) if 'male' in known else rng.random(count) < 0.5
+    vaccinated = np.asarray(known['vaccinated'], dtype=bool) if 'vaccinated' in known \
+        else rng.random(count) < proba_by_age(config, 'vaccinated_proba', age)
+    mask = np.asarray(known['mask'], dtype=bool) if 'mask' in known \
+        else rng.random(count) < proba_by_age(config, 'mask_wearing_proba', age)
+    return age, male, vaccinated, mask
+
+
+def npz_columns(filename):
+    """Tablice z pliku .npz; nieskompresowane (np.savez) są mapowane w pamięci zamiast wczytywane."""
+    columns = {}
+    with zipfile.ZipFile(filename) as archive, open(filename, 'rb') as file:
+        for info in archive.infolist():
+            name = info.filename[:-len('.npy')] if info.filename.endswith('.npy') else info.filename
+            if info.compress_type != zipfile.ZIP_STORED:
+                with archive.open(info) as member:
+                    columns[name] = np.lib.format.read_array(member)
+                continue
+            # Dane członka archiwum zaczynają się za lokalnym nagłówkiem pliku (30 bajtów, nazwa, pole extra)
+            file.seek(info.header_offset + 26)
+            name_length, extra_length = struct.unpack('<HH', file.read(4))
+            file.seek(info.header_offset + 30 + name_length + extra_length)
+            version = np.lib.format.read_magic(file)
+            read_header = np.lib.format.read_array_header_1_0 if version == (1, 0) \
+                else np.lib.format.read_array_header_2_0
+            shape, fortran_order, dtype = read_header(file)
+            columns[name] = np.memmap(filename, dtype=dtype, mode='r', offset=file.tell(), shape=shape,
+                                      order='F' if fortran_order else 'C')
+    return columns
+
+
+def typed_column(name, values):
+    """Kolumna tabeli .csv (wczytana jako liczby zmiennoprzecinkowe) w typie z COLUMN_DTYPES."""
+    dtype = COLUMN_DTYPES.get(name)
+    if dtype is bool:
+        return values != 0
+    if dtype is not None:
+        if np.any(values != np.trunc(values)):
+            raise ValueError(f"Kolumna {name} tabeli populacji musi mieć wartości całkowite")
+        return values.astype(dtype)
+    return values
+
+
+def csv_columns(filename, cache_directory=CSV_CACHE_DIRECTORY):
+    """Tabela .csv z nagłówkiem (wartości logiczne jako 0/1) jako kolumny mapowane w pamięci.
+
+    Plik jest parsowany tylko raz: kolumny w typach COLUMN_DTYPES są zapisywane do nieskompresowanego .npz
+    w `cache_directory` pod skrótem zawartości pliku, a kolejne wczytania tylko go mapują."""
+    cached = os.path.join(cache_directory, file_digest(filename) + '.npz')
+    if not os.path.exists(cached):
+        with open(filename) as file:
+            names = [name.strip() for name in file.readline().split(',')]
+        values = np.loadtxt(filename, delimiter=',', skiprows=1, ndmin=2)
+        columns = {name: typed_column(name, values[:, index]) for index, name in enumerate(names)}
+
+        # Zapis obok i podmiana, więc równoległe procesy (np. sweep) nie czytają niepełnego pliku
+        os.makedirs(cache_directory, exist_ok=True)
+        temporary = f"{cached}.{os.getpid()}.tmp"
+        with open(temporary, 'wb') as file:
+            np.savez(file, **columns)
+        os.replace(temporary, cached)
+    return npz_columns(cached)
+
+
+def load_population_table(filename):
+    """Tabela populacji jako słownik kolumn mapowanych w pamięci: .npz (kolumny jako osobne tablice; skompresowane
+    są wczytywane), .npy (tablica strukturalna) albo .csv (przez csv_columns).
+
+    Kolumny to cechy ATTRIBUTE_COLUMNS (dowolny ich podzbiór) i opcjonalnie COUNT_COLUMN."""
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == '.npz':
+        table = npz_columns(filename)
+    elif extension == '.npy':
+        records = np.load(filename, mmap_mode='r')
+        table = {name: records[name] for name in records.dtype.names}
+    elif extension == '.csv':
+        table = csv_columns(filename)
+    else:
+        raise ValueError(f"Nieobsługiwany format tabeli populacji: {filename}")
+
+    unknown = set(table) - set(ATTRIBUTE_COLUMNS) - {COUNT_COLUMN}
+    if unknown:
+        raise ValueError(f"Nieznane kolumny tabeli populacji: {', '.join(sorted(unknown))}")
+    return table
+
+
+def table_rows(table, rng, count):
+    """Cechy `count` agentów z tabeli populacji.
+
+    Gdy tabela opisuje dokładnie `count` osób (wiersze albo suma COUNT_COLUMN), populacja jest nią samą
+    w losowej kolejności; w przeciwnym razie wiersze są losowane ze zwracaniem, z wagami COUNT_COLUMN."""
+    rows = len(next(iter(table.values())))
+    weights = np.asarray(table[COUNT_COLUMN], dtype=np.int64) if COUNT_COLUMN in table else None
+    total = int(weights.sum()) if weights is not None else rows
+    if total == count:
+        index = rng.permutation(np.arange(rows) if weights is None else np.repeat(np.arange(rows), weights))
+    else:
+        index = rng.choice(rows, count, p=None if weights is None else weights / total)
+    return {name: np.asarray(values[index]) for name, values in table.items() if name in ATTRIBUTE_COLUMNS}
+
+
+def population_attributes(config, rng):
+    """Cechy całej populacji: z tabeli Config.population_file (brakujące cechy losowane) albo wylosowane."""
+    known = table_rows(load_population_table(config.population_file), rng, config.num_agents) \
+        if config.population_file is not None else None
+    return sample_attributes(config, rng, config.num_agents, known)
+
+
+def random_directions(rng, count, speed=AGENT_SPEED):
+    """Kierunki ruchu `count` agentów o długości `speed` (jak Agent.assign_random_direction)."""
+    vectors = rng.uniform(-1, 1, (count, 2))
+    lengths = np.hypot(vectors[:, 0], vectors[:, 1])
+    while np.any(lengths == 0):
+        zero = lengths == 0
+        vectors[zero] = rng.uniform(-1, 1, (int(zero.sum()), 2))
+        lengths = np.hypot(vectors[:, 0], vectors[:, 1])
+    vectors *= (speed / lengths)[:, None]
+    return vectors[:, 0], vectors[:, 1]
+
+
+def initial_columns(config, attributes, rng, width, height):
+    """Stan początkowy populacji jako tablice AGENT_ARRAYS: losowe pozycje na planszy `width` x `height`
+    (jak w Simulation - do 10 pikseli od prawej i dolnej krawędzi) i kierunki, pierwsi Config.initial_infected
+    agenci w stanie I, reszta w S."""
+    count = config.num_agents
+    age, male, vaccinated, mask = attributes
+    state = np.full(count, S, dtype=np.int8)
+    state[:config.initial_infected] = I
+    direction_x, direction_y = random_directions(rng, count)
+    columns = {
+        'x': rng.integers(0, width - 10, count, endpoint=True).astype(np.float64),
+        'y': rng.integers(0, height - 10, count, endpoint=True).astype(np.float64),
+        'direction_x': direction_x,
+        'direction_y': direction_y,
+        'destination_x': np.zeros(count),
+        'destination_y': np.zeros(count),
+        'state': state,
+        'state_entered_at': np.zeros(count, dtype=np.int64),
+        'quick_travelling': np.zeros(count, dtype=bool),
+        'quick_travelling_counter': np.zeros(count, dtype=np.int64),
+        'time_to_spend_in_central_location': np.zeros(count, dtype=np.int64),
+        'quarantined': np.zeros(count, dtype=bool),
+        'location': np.full(count, NO_LOCATION, dtype=np.int64),
+        'age': age,
+        'male': male,
+        'vaccinated': vaccinated,
+        'mask': mask,
+    }
+    return {name: columns[name] for name in AGENT_ARRAYS}
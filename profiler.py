@@ -0,0 +1,79 @@
+import json
+import time
+from collections import defaultdict
+
+import numpy as np
+
+
+class PhaseProfiler:
+    """Sumaryczny czas i liczba wywołań faz kroku, liczba kandydatów na sąsiadów oraz obłożenie komórek siatki.
+
+    Fazy mierzy się "okrążeniami": start() zapamiętuje chwilę, a lap(nazwa) dolicza czas od poprzedniego punktu
+    do danej fazy. Symulacja korzysta z profilera tylko wtedy, gdy Config.profile jest włączone."""
+
+    def __init__(self):
+        self.times = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.last = time.perf_counter()
+
+        self.queries = 0  # Zapytania o sąsiadów (pojedyncze lub wsadowe - liczone na agenta źródłowego)
+        self.candidates = 0  # Agenci z sąsiednich komórek sprawdzeni w tych zapytaniach
+        self.max_candidates = 0
+
+        self.grid_builds = 0
+        self.cell_occupancy_max = 0
+        self.cell_occupancy_max_sum = 0
+        self.occupied_cells_sum = 0
+        self.occupied_agents_sum = 0
+        self.cells = 0
+
+    def start(self):
+        self.last = time.perf_counter()
+
+    def lap(self, name):
+        now = time.perf_counter()
+        self.times[name] += now - self.last
+        self.calls[name] += 1
+        self.last = now
+
+    def count_candidates(self, queries, candidates, max_candidates):
+        self.queries += queries
+        self.candidates += candidates
+        self.max_candidates = max(self.max_candidates, max_candidates)
+
+    def record_grid(self, cell_counts):
+        """Statystyki obłożenia komórek po zbudowaniu indeksu przestrzennego."""
+        occupied = np.count_nonzero(cell_counts)
+        largest = int(cell_counts.max(initial=0))
+        self.grid_builds += 1
+        self.cells = len(cell_counts)
+        self.cell_occupancy_max = max(self.cell_occupancy_max, largest)
+        self.cell_occupancy_max_sum += largest
+        self.occupied_cells_sum += occupied
+        self.occupied_agents_sum += int(cell_counts.sum())
+
+    def summary(self):
+        builds = max(self.grid_builds, 1)
+        return {
+            'phases': {name: {'seconds': self.times[name], 'calls': self.calls[name],
+                              'mean_seconds': self.times[name] / self.calls[name]}
+                       for name in sorted(self.times, key=self.times.get, reverse=True)},
+            'neighbour_queries': {
+                'queries': self.queries,
+                'candidates': self.candidates,
+                'mean_candidates': self.candidates / self.queries if self.queries else 0,
+                'max_candidates': self.max_candidates,
+            },
+            'grid': {
+                'builds': self.grid_builds,
+                'cells': self.cells,
+                'max_occupancy': self.cell_occupancy_max,
+                'mean_max_occupancy': self.cell_occupancy_max_sum / builds,
+                'mean_occupied_cells': self.occupied_cells_sum / builds,
+                'mean_occupancy_of_occupied_cells': self.occupied_agents_sum / max(self.occupied_cells_sum, 1),
+            },
+        }
+
+    def dump(self, filename):
+        with open(filename, 'w') as file:
+            json.dump(self.summary(), file, indent=4)
@@ -0,0 +1,121 @@
+import numpy as np
+
+from engine import STATE_COLORS, STATES
+
+# Kolejność stanów na nakładających się pikselach - stan dalej na liście przykrywa wcześniejsze (zakażeni na wierzchu)
+DRAW_PRIORITY = ('S', 'R', 'D', 'E', 'I')
+
+# Kolory klatki: tło, obramowania lokalizacji i kolory stanów agentów (kolejność DRAW_PRIORITY). Klatki są tablicami
+# indeksów tych kolorów, więc GIF można zakodować bez kwantyzacji, a RGB to jedno odwzorowanie przez PALETTE.
+# Indeks koloru jest zarazem jego priorytetem: agent przykrywa tło i ramki, a na wspólnym pikselu zostaje
+# największy indeks.
+FRAME_COLORS = ((255, 255, 255), (0, 0, 0)) + tuple(STATE_COLORS[STATES.index(state)] for state in DRAW_PRIORITY)
+PALETTE = np.array(FRAME_COLORS, dtype=np.uint8)
+BACKGROUND = 0
+BORDER = 1
+FIRST_STATE_COLOR = 2
+STATE_COLOR_INDEX = np.array([FIRST_STATE_COLOR + DRAW_PRIORITY.index(state) for state in STATES], dtype=np.uint8)
+
+BORDER_WIDTH = 2  # Grubość ramek lokalizacji (jak pygame.draw.rect(..., 2))
+RASTER_CHUNK = 16384  # Agenci stemplowani jedną operacją - ogranicza pamięć tablicy indeksów pikseli
+
+
+def frame_rectangles(simulation):
+    """Ramki rysowane na planszy: granica planszy (przy kwarantannie), Central Locations i kwarantanna,
+    jako (x, y, szerokość, wysokość)."""
+    locations = list(simulation.central_locations)
+    rectangles = []
+    if simulation.quarantine:
+        locations.append(simulation.quarantine)
+        rectangles.append((0, 0, simulation.board_width, simulation.board_height))
+    return rectangles + [(location.x, location.y, location.size, location.size) for location in locations]
+
+
+def disc_offsets(radius):
+    """Przesunięcia (wiersz, kolumna) pikseli koła o promieniu `radius` względem środka agenta - wzorzec
+    stemplowany dla każdego agenta. Kształt odpowiada pygame.draw.circle (średnica 2 * radius pikseli)."""
+    dy, dx = np.mgrid[-radius:radius, -radius:radius]
+    inside = (dx + 0.5) ** 2 + (dy + 0.5) ** 2 <= max(radius ** 2 - 1, 1)
+    return dy[inside], dx[inside]
+
+
+class FrameRasterizer:
+    """Rysuje klatkę animacji dla całej populacji naraz, zamiast pygame.draw.circle dla każdego agenta.
+
+    Klatka to tablica uint8 (wysokość x szerokość) indeksów FRAME_COLORS. Stałe tło z ramkami lokalizacji jest
+    rysowane raz; w każdej klatce agenci są stemplowani przez indeksy w spłaszczonej klatce, porcjami po RASTER_CHUNK
+    agentów. Nakładające się koła są rozstrzygane według DRAW_PRIORITY, a nie kolejności agentów (w pygame
+    późniejszy agent przykrywał wcześniejszych), więc klatka nie zależy od podziału na porcje. Przy `downscale` > 1
+    klatka od razu ma n-krotnie mniejszą rozdzielczość (ten sam rozmiar co przy pomniejszaniu co n-tym pikselem),
+    a `origin` pozwala narysować fragment planszy o wymiarach width x height zaczynający się w danym punkcie."""
+
+    def __init__(self, width, height, agent_size, rectangles=(), downscale=1, origin=(0, 0)):
+        self.downscale = max(1, int(downscale))
+        self.width = -(-width // self.downscale)
+        self.height = -(-height // self.downscale)
+        # Piksel planszy w lewym górnym rogu klatki (przy rysowaniu fragmentu planszy)
+        self.origin_x, self.origin_y = (coordinate // self.downscale for coordinate in origin)
+        self.sprite_radius = max(1, int(agent_size / self.downscale + 0.5))
+        self.sprite_dy, self.sprite_dx = disc_offsets(self.sprite_radius)
+        self.sprite_offsets = self.sprite_dy * self.width + self.sprite_dx  # W spłaszczonej klatce
+
+        self.background = np.full(self.height * self.width + 1, BACKGROUND, dtype=np.uint8)
+        for rectangle in rectangles:
+            self.draw_rectangle(*rectangle)
+
+    def draw_rectangle(self, x, y, width, height):
+        """Ramka prostokąta (x, y, szerokość, wysokość) na tle, rysowana do wewnątrz jak w pygame.draw.rect.
+        Części ramki poza klatką są pomijane."""
+        scale = self.downscale
+        border = max(1, BORDER_WIDTH // scale)
+        left, top = x // scale - self.origin_x, y // scale - self.origin_y
+        right = -(-(x + width) // scale) - self.origin_x
+        bottom = -(-(y + height) // scale) - self.origin_y
+        background = self.background[:-1].reshape(self.height, self.width)
+        for row_start, row_stop, column_start, column_stop in ((top, bottom, left, left + border),
+                                                               (top, bottom, max(left, right - border), right),
+                                                               (top, top + border, left, right),
+                                                               (max(top, bottom - border), bottom, left, right)):
+            row_start, row_stop = max(row_start, 0), min(row_stop, self.height)
+            column_start, column_stop = max(column_start, 0), min(column_stop, self.width)
+            if row_start < row_stop and column_start < column_stop:
+                background[row_start:row_stop, column_start:column_stop] = BORDER
+
+    def rasterize(self, x, y, state):
+        """Nowa klatka z agentami w punktach (x, y) w kolorach stanów `state` (kody STATES)."""
+        # Bufor ma jeden piksel więcej - trafiają do niego części kół wystające poza klatkę, dzięki czemu
+        # agenci są stemplowani bez sprawdzania granic
+        buffer = self.background.copy()
+
+        # Środek agenta to piksel o współrzędnych obciętych do liczby całkowitej, jak w pygame
+        rows = (np.asarray(y) / self.downscale).astype(np.int64) - self.origin_y
+        columns = (np.asarray(x) / self.downscale).astype(np.int64) - self.origin_x
+        colors = STATE_COLOR_INDEX[np.asarray(state, dtype=np.int64)]
+        for start in range(0, len(rows), RASTER_CHUNK):
+            chunk = slice(start, start + RASTER_CHUNK)
+            self.stamp(buffer, rows[chunk], columns[chunk], colors[chunk])
+        return buffer[:-1].reshape(self.height, self.width)
+
+    def stamp(self, buffer, rows, columns, colors):
+        """Stempluje koła agentów o środkach (rows, columns) w spłaszczonym buforze klatki; na każdym pikselu
+        zostaje kolor o największym priorytecie (indeksie)."""
+        outside = len(buffer) - 1
+        pixels = (rows * self.width + columns)[:, None] + self.sprite_offsets
+
+        radius = self.sprite_radius
+        edge = np.flatnonzero((rows < radius) | (rows >= self.height - radius) | (columns < radius) |
+                              (columns >= self.width - radius))
+        if len(edge):
+            edge_rows = rows[edge][:, None] + self.sprite_dy
+            edge_columns = columns[edge][:, None] + self.sprite_dx
+            visible = (edge_rows >= 0) & (edge_rows < self.height) & (edge_columns >= 0) & \
+                (edge_columns < self.width)
+            pixels[edge] = np.where(visible, pixels[edge], outside)
+
+        # Przypisanie przez powtarzające się indeksy nie określa, który zapis zostaje - maksimum jest jednoznaczne
+        np.maximum.at(buffer, pixels.ravel(), np.repeat(colors, pixels.shape[1]))
+
+    @staticmethod
+    def to_rgb(frame):
+        """Klatka RGB (wysokość x szerokość x 3) z klatki indeksów kolorów."""
+        return PALETTE[frame]
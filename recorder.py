@@ -0,0 +1,93 @@
+import numpy as np
+
+from engine import STATES, S, E, I, R, D
+
+# Dodatkowe serie zapisywane przy record_transitions: (nazwa, stan poprzedni, stan obecny)
+TRANSITIONS = (("new_infections", S, E), ("E->I", E, I), ("I->R", I, R), ("I->D", I, D))
+
+
+def load_state_history(filename):
+    """Historia stanów (format state_history) z pliku zapisanego przez StateRecorder.save_npz."""
+    with np.load(filename) as data:
+        return [dict(zip(STATES, counts)) for counts in data['data'][:, :len(STATES)].tolist()]
+
+
+class StateRecorder:
+    """Zapis liczby agentów w każdym stanie do prealokowanej tablicy int32 (powiększanej dwukrotnie w razie potrzeby).
+
+    Liczności są liczone jednym bincount po zakodowanych stanach (kolejność STATES). Przy `record_transitions`
+    zapisywane są też liczby przejść S->E, E->I, I->R, I->D oraz liczba agentów w kwarantannie w każdym kroku."""
+
+    def __init__(self, record_transitions=False, capacity=1024):
+        self.record_transitions = record_transitions
+        self.length = 0
+        self.counts = np.zeros((capacity, len(STATES)), dtype=np.int32)
+        self.transitions = np.zeros((capacity, len(TRANSITIONS)), dtype=np.int32) if record_transitions else None
+        self.quarantined = np.zeros(capacity, dtype=np.int32) if record_transitions else None
+        self.previous_state = None
+
+    def columns(self):
+        names = list(STATES)
+        if self.record_transitions:
+            names += [name for name, _, _ in TRANSITIONS] + ["quarantined"]
+        return names
+
+    def grow(self):
+        capacity = 2 * len(self.counts)
+        self.counts = np.resize(self.counts, (capacity, len(STATES)))
+        if self.record_transitions:
+            self.transitions = np.resize(self.transitions, (capacity, len(TRANSITIONS)))
+            self.quarantined = np.resize(self.quarantined, capacity)
+
+    def start(self, state):
+        """Zapamiętuje stany początkowe, od których liczone są przejścia w pierwszym zapisanym kroku."""
+        if self.record_transitions:
+            self.previous_state = np.array(state, dtype=np.int8)
+
+    def record(self, state, quarantined=None):
+        """Zapisuje krok; `state` to tablica kodów stanów agentów, `quarantined` - maska agentów w kwarantannie."""
+        if self.length == len(self.counts):
+            self.grow()
+
+        self.counts[self.length] = np.bincount(state, minlength=len(STATES))
+        if self.record_transitions:
+            if self.previous_state is not None:
+                # Para (stan poprzedni, stan obecny) zakodowana jako jedna liczba - wszystkie przejścia jednym bincount
+                pairs = np.bincount(self.previous_state.astype(np.int64) * len(STATES) + state,
+                                    minlength=len(STATES) ** 2)
+                self.transitions[self.length] = [pairs[before * len(STATES) + after]
+                                                 for _, before, after in TRANSITIONS]
+            else:
+                self.transitions[self.length] = 0
+            self.quarantined[self.length] = 0 if quarantined is None else np.count_nonzero(quarantined)
+            self.previous_state = np.array(state, dtype=np.int8)
+        self.length += 1
+
+    def record_counts(self, counts, transitions=None, quarantined=0):
+        """Zapisuje krok podany wprost liczbami agentów w każdym stanie (modele bez pojedynczych agentów,
+        np. MeanFieldModel); `transitions` to liczby przejść w kolejności TRANSITIONS."""
+        if self.length == len(self.counts):
+            self.grow()
+
+        self.counts[self.length] = counts
+        if self.record_transitions:
+            self.transitions[self.length] = transitions if transitions is not None else 0
+            self.quarantined[self.length] = quarantined
+        self.length += 1
+
+    def table(self):
+        """Wszystkie zapisane serie jako tablica (kroki, kolumny) w kolejności columns()."""
+        series = [self.counts[:self.length]]
+        if self.record_transitions:
+            series += [self.transitions[:self.length], self.quarantined[:self.length, None]]
+        return np.hstack(series)
+
+    def state_history(self):
+        """Historia w dotychczasowym formacie listy słowników {"S": ..., "E": ..., ...}."""
+        return [dict(zip(STATES, counts)) for counts in self.counts[:self.length].tolist()]
+
+    def save_npz(self, filename):
+        np.savez_compressed(filename, columns=np.array(self.columns()), data=self.table())
+
+    def save_csv(self, filename):
+        np.savetxt(filename, self.table(), fmt='%d', delimiter=',', header=','.join(self.columns()), comments='')
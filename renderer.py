@@ -0,0 +1,74 @@
+import pygame
+
+from rasterizer import FRAME_COLORS, FrameRasterizer, frame_rectangles
+from video_writer import StreamingVideoWriter
+
+
+class PygameRenderer:
+    """Obserwator symulacji rysujący każdy krok i zapisujący klatki do pliku GIF/MP4.
+
+    Podpina się przez Simulation.add_observer - symulacja bez obserwatorów w ogóle nie korzysta z pygame.
+    Klatki rysuje FrameRasterizer (cała populacja naraz, z tablic pozycji i stanów) i trafiają one bez kopiowania
+    do StreamingVideoWriter, który koduje je na bieżąco. Przy `frame_downscale` klatki są rysowane od razu
+    w zmniejszonej rozdzielczości, a klatki pomijane przez `frame_stride` nie są rysowane wcale (chyba że są
+    wyświetlane w oknie pygame)."""
+
+    def __init__(self, screen, clock=None, gif_filename=None, fps=24, frame_stride=1, frame_downscale=1):
+        self.screen = screen
+        self.clock = clock
+        self.gif_filename = gif_filename
+        self.fps = fps
+        self.frame_downscale = frame_downscale
+        self.rasterizer = None  # Tworzony przy pierwszym kroku, gdy znane są wymiary planszy i lokalizacje
+        self.writer = StreamingVideoWriter(gif_filename, stride=frame_stride) if gif_filename else None
+
+    def on_step(self, simulation):
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                simulation.running = False
+
+        display = pygame.display.get_surface() is not None
+        recording = self.writer is not None and self.writer.keeps_next_frame()
+        if recording or display:
+            frame = self.draw(simulation)
+            if display:
+                self.show(frame)
+                pygame.display.flip()  # Aktualizacja ekranu
+            if recording:
+                self.writer.append(frame)
+        if self.writer is not None and not recording:
+            self.writer.skip()
+
+        if self.clock is not None:
+            self.clock.tick(self.fps)  # Ustalamy ilość klatek na sekundę
+
+    def on_finish(self, simulation):
+        # Dokończenie zapisu animacji
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+        pygame.quit()
+
+    def create_rasterizer(self, simulation):
+        """Rasteryzator z ramkami Central Locations oraz kwarantanny i granicy planszy."""
+        width, height = self.screen.get_size()
+        return FrameRasterizer(width, height, simulation.agent_size(), frame_rectangles(simulation),
+                               downscale=self.frame_downscale)
+
+    def draw(self, simulation):
+        """Klatka (indeksy kolorów FrameRasterizer) z planszą, lokalizacjami i agentami po zakończonym kroku."""
+        if self.rasterizer is None:
+            self.rasterizer = self.create_rasterizer(simulation)
+        x, y = simulation.positions()
+        return self.rasterizer.rasterize(x, y, simulation.current_states()[0])
+
+    def show(self, frame):
+        """Wyświetla klatkę na ekranie pygame (powiększoną do rozmiaru ekranu przy zmniejszonej rozdzielczości).
+
+        Klatka indeksów kolorów jest wyświetlana jako 8-bitowa powierzchnia z paletą, bez zamiany na RGB."""
+        height, width = frame.shape
+        surface = pygame.image.frombuffer(frame, (width, height), 'P')
+        surface.set_palette(FRAME_COLORS)
+        if surface.get_size() != self.screen.get_size():
+            surface = pygame.transform.scale(surface, self.screen.get_size())
+        self.screen.blit(surface, (0, 0))
@@ -0,0 +1,45 @@
+import argparse
+
+from rasterizer import FrameRasterizer
+from trajectory import Trajectory
+from video_writer import StreamingVideoWriter
+
+
+def render_trajectory(trajectory, filename, start=0, stop=None, stride=1, window=None, downscale=1, fps=25):
+    """Rysuje animację (GIF lub wideo, według rozszerzenia `filename`) z zapisanej trajektorii, bez ponownego
+    uruchamiania symulacji.
+
+    Rysowane są kroki start, start + stride, ... < stop; `window` = (x, y, szerokość, wysokość) ogranicza klatki do
+    fragmentu planszy, a `downscale` zmniejsza ich rozdzielczość n-krotnie. Zwraca liczbę zapisanych klatek."""
+    metadata = trajectory.metadata
+    left, top, width, height = window if window is not None else (0, 0, metadata['width'], metadata['height'])
+    rasterizer = FrameRasterizer(width, height, metadata['agent_size'], metadata['rectangles'], downscale=downscale,
+                                 origin=(left, top))
+
+    steps = range(len(trajectory))[start:stop:stride]
+    writer = StreamingVideoWriter(filename, fps=fps)
+    try:
+        for step in steps:
+            x, y, state = trajectory.frame(step)
+            writer.append(rasterizer.rasterize(x, y, state))
+    finally:
+        writer.close()
+    return len(steps)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Animacja z trajektorii zapisanej przez TrajectoryRecorder.")
+    parser.add_argument('trajectory', help="plik trajektorii (Config.trajectory_filename)")
+    parser.add_argument('output', help="plik animacji (.gif lub np. .mp4)")
+    parser.add_argument('--start', type=int, default=0, help="pierwszy krok")
+    parser.add_argument('--stop', type=int, default=None, help="krok, na którym animacja się kończy (bez niego)")
+    parser.add_argument('--stride', type=int, default=1, help="co który krok rysować")
+    parser.add_argument('--window', type=int, nargs=4, metavar=('X', 'Y', 'SZEROKOŚĆ', 'WYSOKOŚĆ'),
+                        help="fragment planszy do narysowania")
+    parser.add_argument('--downscale', type=int, default=1, help="zmniejszenie klatek n-krotnie")
+    parser.add_argument('--fps', type=int, default=25, help="liczba klatek na sekundę")
+    args = parser.parse_args()
+
+    frames = render_trajectory(Trajectory(args.trajectory), args.output, args.start, args.stop, args.stride,
+                               args.window, args.downscale, args.fps)
+    print(f"Zapisano {frames} klatek do {args.output}")
@@ -0,0 +1,21 @@
+import numpy as np
+
+
+def repulsion_forces(board_grid, radius, force, moving, alive, x=None, y=None):
+    """Suma sił odpychania (social distancing) działających na każdego agenta.
+
+    Jeden przebieg po liście par z indeksu przestrzennego: agent `moving` (nie w quick travel) jest odpychany
+    przez żywych (`alive`) sąsiadów w promieniu `radius` z siłą odwrotnie proporcjonalną do kwadratu odległości.
+    Składowe są sumowane dla każdego agenta przez bincount z wagami (scatter-add)."""
+    x = board_grid.x if x is None else x
+    y = board_grid.y if y is None else y
+    first, second = board_grid.pairs(radius, sources=moving, targets=alive, x=x, y=y)
+
+    delta_x = x[second] - x[first]
+    delta_y = y[second] - y[first]
+    distance_squared = delta_x ** 2 + delta_y ** 2
+    distance_squared[distance_squared == 0] = 1e-20
+    weight = -force / distance_squared
+
+    return (np.bincount(first, weights=delta_x * weight, minlength=len(moving)),
+            np.bincount(first, weights=delta_y * weight, minlength=len(moving)))
@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+CACHE_DIRECTORY = os.path.join('.cache', 'results')
+ENTRY_FILE = 'entry.json'
+# Wersja kodu symulacji w kluczu - zwiększana przy zmianach, po których ta sama konfiguracja z tym samym ziarnem
+# daje inny przebieg (np. zmiana silnika lub generatora liczb losowych), żeby stare wyniki nie były zwracane
+RESULTS_VERSION = 2
+
+# Pola Config, które nie zmieniają wyników symulacji (diagnostyka i zapisy pośrednie)
+NON_RESULT_FIELDS = ('profile', 'profile_filename', 'checkpoint_interval', 'checkpoint_filename', 'trajectory_filename',
+                     'events_filename')
+
+
+def result_fields(config):
+    return {name: value for name, value in sorted(vars(config).items()) if name not in NON_RESULT_FIELDS}
+
+
+def file_digest(filename):
+    """Skrót SHA-256 zawartości pliku."""
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as file:
+        for block in iter(lambda: file.read(1024 ** 2), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def result_key(config, steps):
+    """Skrót SHA-256 pełnej konfiguracji (razem z ziarnem), liczby kroków, wersji kodu (RESULTS_VERSION)
+    i zawartości tabeli populacji Config.population_file - jej zmiana pod tą samą ścieżką daje nowy klucz.
+
+    Dla seed=None wynik jest losowy, więc nie ma klucza (None) i nic nie jest zapamiętywane."""
+    if config.seed is None:
+        return None
+    description = {'version': RESULTS_VERSION, 'config': result_fields(config), 'steps': steps}
+    if config.population_file is not None:
+        description['population_file'] = file_digest(config.population_file)
+    return hashlib.sha256(json.dumps(description, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def directory_size(path):
+    return sum(os.path.getsize(os.path.join(directory, name))
+               for directory, _, names in os.walk(path) for name in names)
+
+
+class ResultCache:
+    """Katalog wyników adresowany kluczem result_key: historia stanów, wykresy i animacja jednej konfiguracji.
+
+    Każdy wpis to podkatalog z plikami wyników i plikiem entry.json, którego czas modyfikacji oznacza ostatnie
+    użycie. Po dodaniu wpisu najdawniej używane są usuwane, dopóki cache przekracza `max_bytes` lub `max_entries`."""
+
+    def __init__(self, directory=CACHE_DIRECTORY, max_bytes=2 * 1024 ** 3, max_entries=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+
+    def entry_path(self, key):
+        return os.path.join(self.directory, key)
+
+    def get(self, key, required=()):
+        """Katalog wpisu `key` zawierającego wszystkie pliki `required` albo None; oznacza wpis jako użyty."""
+        path = self.entry_path(key)
+        entry_file = os.path.join(path, ENTRY_FILE)
+        if not os.path.exists(entry_file) or \
+                not all(os.path.exists(os.path.join(path, name)) for name in required):
+            return None
+        os.utime(entry_file)
+        return path
+
+    def restore(self, key, required, destination='.'):
+        """Kopiuje pliki `required` z wpisu do katalogu `destination`; zwraca False, gdy wpisu (lub plików) brak."""
+        path = self.get(key, required)
+        if path is None:
+            return False
+        for name in required:
+            target = os.path.join(destination, name)
+            os.makedirs(os.path.dirname(target) or '.', exist_ok=True)
+            shutil.copyfile(os.path.join(path, name), target)
+        return True
+
+    def put(self, key, files, config=None, steps=None):
+        """Zapisuje pliki wyników (nazwa we wpisie -> ścieżka źródłowa) pod kluczem `key`.
+
+        Pliki z wcześniejszej wersji wpisu, których nie podano, są zachowywane. Wpis jest składany w katalogu
+        tymczasowym i podmieniany w całości, więc przerwany zapis nie zostawia niepełnych wyników."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.entry_path(key)
+        temporary = tempfile.mkdtemp(prefix='.tmp-', dir=self.directory)
+        if os.path.exists(os.path.join(path, ENTRY_FILE)):
+            shutil.copytree(path, temporary, dirs_exist_ok=True)
+        for name, source in files.items():
+            target = os.path.join(temporary, name)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copyfile(source, target)
+
+        names = sorted(os.path.relpath(os.path.join(directory, name), temporary)
+                       for directory, _, file_names in os.walk(temporary) for name in file_names
+                       if name != ENTRY_FILE)
+        with open(os.path.join(temporary, ENTRY_FILE), 'w') as file:
+            json.dump({'created': time.time(), 'steps': steps, 'files': names,
+                       'config': result_fields(config) if config is not None else None}, file, indent=4, default=str)
+
+        shutil.rmtree(path, ignore_errors=True)
+        try:
+            os.replace(temporary, path)
+        except OSError:
+            shutil.rmtree(temporary, ignore_errors=True)  # Ten sam wpis zapisał równolegle inny proces
+        self.evict(keep=key)
+        return path
+
+    def entries(self):
+        """Lista (ostatnie użycie, rozmiar w bajtach, klucz) wszystkich kompletnych wpisów."""
+        if not os.path.isdir(self.directory):
+            return []
+        entries = []
+        for key in os.listdir(self.directory):
+            if key.startswith('.tmp-'):
+                continue  # Wpis składany właśnie przez put
+            entry_file = os.path.join(self.directory, key, ENTRY_FILE)
+            try:
+                entries.append((os.path.getmtime(entry_file), directory_size(self.entry_path(key)), key))
+            except OSError:
+                continue  # Katalog tymczasowy albo wpis usuwany właśnie przez inny proces
+        return entries
+
+    def evict(self, keep=None):
+        """Usuwa najdawniej używane wpisy (poza `keep`), aż cache zmieści się w limitach."""
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        count = len(entries)
+        for _, size, key in entries:
+            over_size = self.max_bytes is not None and total > self.max_bytes
+            over_count = self.max_entries is not None and count > self.max_entries
+            if not (over_size or over_count):
+                break
+            if key == keep:
+                continue
+            shutil.rmtree(self.entry_path(key), ignore_errors=True)
+            total -= size
+            count -= 1
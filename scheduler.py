@@ -0,0 +1,60 @@
+from collections import defaultdict
+
+import numpy as np
+
+from engine import E, I, R
+
+
+def minimum_periods(config):
+    """Najkrótszy czas w stanie, po którym przejście jest w ogóle możliwe (S i D nie są planowane)."""
+    return {E: config.incubation_period,
+            I: min(config.recovery_period, config.mortality_period),
+            R: config.immunity_loss_period}
+
+
+class TransitionScheduler:
+    """Kalendarz przejść SEIRD (timing wheel): agent trafia do zbioru aktywnych dopiero w ticku, w którym upływa
+    minimalny okres jego stanu, i wypada z niego przy zmianie stanu.
+
+    Przejście E->I jest deterministyczne, więc agent E jest aktywny dokładnie w ticku przejścia; agenci I i R
+    pozostają aktywni (losują przejście w każdym ticku) aż do zmiany stanu. Czas w stanie nie jest liczony per agent -
+    wynika z ticku wejścia w stan (`state_entered_at`). Wpisy kalendarza dezaktualizują się, gdy agent zmieni stan
+    przed terminem - rozpoznaje się to po innym ticku wejścia w stan."""
+
+    def __init__(self, num_agents, config):
+        self.config = config
+        self.wheel = defaultdict(list)  # tick -> lista (indeksy agentów, tick wejścia w stan)
+        self.active = np.zeros(num_agents, dtype=bool)
+
+    def enter(self, agents, state, entered_at, first_check):
+        """Planuje aktywację agentów `agents`, którzy weszli w stan `state` w ticku `entered_at` (liczba lub tablica).
+
+        `first_check` to pierwszy tick, w którym ich przejście może być sprawdzone."""
+        agents = np.asarray(agents, dtype=np.int64)
+        self.active[agents] = False
+        self.schedule(agents, state, entered_at, first_check)
+
+    def schedule(self, agents, state, entered_at, first_check):
+        """Wpisuje agentów do kalendarza jak enter, ale bez zmiany zbioru aktywnych."""
+        agents = np.asarray(agents, dtype=np.int64)
+        period = minimum_periods(self.config).get(state)
+        if period is None or len(agents) == 0:
+            return
+        entered_at = np.broadcast_to(np.asarray(entered_at, dtype=np.int64), agents.shape)
+        due = np.maximum(entered_at + period, first_check)
+        for tick in np.unique(due).tolist():
+            scheduled = due == tick
+            self.wheel[tick].append((agents[scheduled], entered_at[scheduled]))
+
+    def advance(self, tick, entered_at_of):
+        """Aktywuje agentów zaplanowanych na `tick`; `entered_at_of(indeksy)` zwraca ich obecne ticki wejścia w stan."""
+        for agents, entered_at in self.wheel.pop(tick, ()):
+            self.active[agents[entered_at_of(agents) == entered_at]] = True
+
+    def rebuild(self, state, entered_at, tick):
+        """Odtwarza kalendarz z pełnego stanu populacji (start symulacji, wczytanie checkpointu)."""
+        self.wheel.clear()
+        self.active[:] = False
+        for code in (E, I, R):
+            agents = np.flatnonzero(state == code)
+            self.enter(agents, code, entered_at[agents], tick)
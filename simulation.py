@@ -1,383 +1,381 @@
+import itertools
 import random
-from PIL import Image
 import numpy as np
-import pygame
-import matplotlib.pyplot as plt
-
-from agent import Agent
-from functions import age_immunity_loss_proba, age_infection_proba, age_mortality_proba, age_recovery_proba, \
-    gender_immunity_loss_proba, gender_infection_proba, gender_mortality_proba, gender_recovery_proba, \
-    mask_immunity_loss_proba, mask_infection_proba, mask_mortality_proba, mask_recovery_proba, \
-    vaccinated_immunity_loss_proba, vaccinated_infection_proba, vaccinated_mortality_proba, vaccinated_recovery_proba
+
+from agent import agents_from_columns, cache_rates
+from engine import AGENT_SIZE, I, NO_LOCATION, S, STATES, STATE_CODES, VectorizedEngine
+from functions import RATE_FUNCTIONS, compute_rates
 from model import Model
+from population import initial_columns, population_attributes
+from plot_stage import save_plots
+from profiler import PhaseProfiler
+from recorder import StateRecorder
+from repulsion import repulsion_forces
+from scheduler import TransitionScheduler
 from central_location import CentralLocation
-import math
-import os
+from checkpoint import CheckpointWriter
+from counter_random import CounterRandom
+from event_log import EventLog
+from spatial_index import SpatialIndex
+from strata import StratifiedRecorder, strata_codes, value_counts
+from tiled_engine import TiledEngine
+from trajectory import TrajectoryRecorder
+from transmission import NO_INFECTOR, count_infectious_contacts
+
+
+def board_size(config):
+    """Wymiary części planszy, po której poruszają się agenci (bez kwarantanny i pasa o szerokości promienia
+    zakażenia wokół niej)."""
+    if not config.quarantine:
+        return config.width, config.height
+    margin = config.central_location_size + config.infection_radius * 2
+    return config.width - margin, config.height - margin
+
 
 class Simulation:
     def __init__(self, config):
         self.config = config
 
+        # Wszystkie losowania pochodzą z generatorów tej symulacji, wyprowadzonych z config.seed
+        # (dla seed=None z entropii systemu - wtedy użyte ziarno jest dostępne w self.seed)
+        seed_sequence = np.random.SeedSequence(config.seed)
+        self.seed = seed_sequence.entropy
+        agents_seed, engine_seed, event_log_seed, population_seed = seed_sequence.spawn(4)
+        self.random = random.Random(int(agents_seed.generate_state(1)[0]))
+
         self.quarantine = CentralLocation(config.width - config.central_location_size,
                                           config.height - config.central_location_size,
                                           config.central_location_size) if config.quarantine else None
-        self.board_width, self.board_height = (config.width, config.height) if self.quarantine is None \
-            else (config.width - self.quarantine.size - config.infection_radius * 2,
-                  config.height - self.quarantine.size - config.infection_radius * 2)
+        self.board_width, self.board_height = board_size(config)
 
-        self.agents = [Agent(i, random.randint(0, self.board_width - 10), random.randint(0, self.board_height - 10), config) for i in
-                       range(config.num_agents)]
-        self.board_grid = []
+        # Populacja budowana wektorowo: cechy (wiek, płeć, szczepienie, maseczka) wylosowane albo wczytane
+        # z Config.population_file, pozycje i stany jako tablice. Obiekty Agent powstają tylko dla silnika
+        # 'agents' - pozostałe silniki startują wprost z tablic.
+        population_rng = np.random.default_rng(population_seed)
+        self.attributes = population_attributes(config, population_rng)
+        columns = initial_columns(config, self.attributes, population_rng, self.board_width, self.board_height)
+        self.agents = agents_from_columns(columns, config, rng=self.random) if config.engine == 'agents' else []
 
         self.central_locations = [CentralLocation(self.board_width // 2 - config.central_location_size // 2,
                                                   self.board_height // 2 - config.central_location_size // 2,
                                                   config.central_location_size)
                                   for _ in range(config.num_central_locations)]
 
-        for i in range(config.initial_infected):
-            self.agents[i].update_state("I")
+        if self.agents:
+            cache_rates(self.agents, config, self.attributes)
         self.model = Model(config)
 
-        self.state_history = []  # Lista do przechowywania historii stanów
+        # Pomiar czasu faz kroku - tylko przy Config.profile, w przeciwnym razie bez żadnego narzutu
+        self.profiler = PhaseProfiler() if config.profile else None
+
+        self.tick = 0  # Numer następnego kroku symulacji
+        self.scheduler = TransitionScheduler(config.num_agents, config)  # Kalendarz możliwych przejść stanów
+
+        self.board_grid = None  # Indeks przestrzenny silnika 'agents' (silniki tablicowe mają własny)
+        if config.engine == 'vectorized':
+            self.engine = VectorizedEngine(columns, config, self.central_locations, self.quarantine,
+                                           self.board_width, self.board_height, self.scheduler,
+                                           random=CounterRandom(engine_seed))
+        elif config.engine == 'tiled':
+            self.engine = TiledEngine(columns, config, self.central_locations, self.quarantine,
+                                      self.board_width, self.board_height, self.scheduler,
+                                      random=CounterRandom(engine_seed))
+        elif config.engine == 'agents':
+            self.engine = None
+            self.board_grid = SpatialIndex(config.width, config.height,
+                                           max(config.infection_radius, config.social_distancing_repulsion_radius))
+            self.board_grid.profiler = self.profiler
+        else:
+            raise ValueError(f"Nieznany silnik symulacji: {config.engine}")
+        if self.engine is not None:
+            self.engine.profiler = self.profiler
+            self.engine.board_grid.profiler = self.profiler
+
+        # Dziennik przejść stanów, zakażeń (kto kogo zaraził) i wejść do kwarantanny
+        self.event_log = None
+        if config.record_events:
+            if config.engine == 'tiled':
+                raise ValueError("Dziennik zdarzeń nie jest obsługiwany przez silnik 'tiled'")
+            self.event_log = EventLog(config.events_filename, rng=np.random.default_rng(event_log_seed))
+            self.event_log.record(0, np.arange(config.initial_infected), S, I)
+            if self.engine is not None:
+                self.engine.event_log = self.event_log
+
+        self.recorder = StateRecorder(config.record_transitions)  # Historia liczby agentów w każdym stanie
+        self.recorder.start(self.current_states()[0])
+        # Liczba agentów w każdym stanie w podziale na grupy wieku, płeć, szczepienie i maseczkę
+        self.strata = StratifiedRecorder(strata_codes(*self.attributes)) if config.record_strata else None
+        if self.strata is not None:
+            self.strata.start(self.current_states()[0])
+        self.schedule_all_transitions()
+        self.observers = []  # Obserwatorzy kroków symulacji (np. rysowanie w pygame)
+        if self.event_log is not None:
+            self.observers.append(self.event_log)
+        self.running = False
         self.dists = self.get_dists()
         self.rates = self.get_rates(config)
 
+    def set_attributes(self, attributes):
+        """Podmienia cechy populacji (wiek, płeć męska, szczepienie, maseczka), np. wczytane z checkpointu, i
+        przelicza to, co z nich wynika: prawdopodobieństwa przejść agentów, kody kategorii i rozkłady."""
+        self.attributes = tuple(attributes)
+        if self.agents:
+            cache_rates(self.agents, self.config, self.attributes)
+        if self.strata is not None:
+            self.strata.codes = strata_codes(*self.attributes)
+        self.dists = self.get_dists()
+        self.rates = self.get_rates(self.config)
+
     def get_rates(self, config):
-        rates = {
-            "infection": {},
-            "recovery": {},
-            "mortality": {},
-            "immunity_loss": {}
-        }
+        """Rozkłady prawdopodobieństw przejść w populacji (w procentach, zaokrąglone do 1 p.p.).
 
-        for agent in self.agents:
-            infection_rate = np.round(agent.compute_infection_rate(config), 2) * 100
-            recovery_rate = np.round(agent.compute_recovery_rate(config), 2) * 100
-            moratality_rate = np.round(agent.compute_mortality_rate(config), 2) * 100
-            immunity_loss_rate = np.round(agent.compute_immunity_loss_rate(config), 2) * 100
-            
-            if infection_rate in rates["infection"]:
-                rates["infection"][infection_rate] += 1
-            else:
-                rates["infection"][infection_rate] = 1
-
-            if recovery_rate in rates["recovery"]:
-                rates["recovery"][recovery_rate] += 1
-            else:
-                rates["recovery"][recovery_rate] = 1
-
-            if moratality_rate in rates["mortality"]:
-                rates["mortality"][moratality_rate] += 1
-            else:
-                rates["mortality"][moratality_rate] = 1
-
-            if immunity_loss_rate in rates["immunity_loss"]:
-                rates["immunity_loss"][immunity_loss_rate] += 1
-            else:
-                rates["immunity_loss"][immunity_loss_rate] = 1
-        
+        Liczone na całkowitych punktach procentowych; klucze to te same wartości co np.round(rate, 2) * 100."""
+        rates = {}
+        for name, (field, *_) in RATE_FUNCTIONS.items():
+            points = np.rint(compute_rates(name, getattr(config, field), *self.attributes) * 100).astype(np.int64)
+            rates[name] = {point / 100 * 100: count for point, count in value_counts(points).items()}
         return rates
-    
+
     def get_dists(self):
-        dists = {
-            'age': {},
-            'gender': {},
-            'vaccinated': {},
-            'mask': {}
+        """Rozkłady wieku, płci, szczepień i noszenia maseczek w populacji."""
+        age, male, vaccinated, mask = self.attributes
+        return {
+            'age': value_counts(age),
+            'gender': {'Male' if value else 'Female': count for value, count in value_counts(male).items()},
+            'vaccinated': {str(value): count for value, count in value_counts(vaccinated).items()},
+            'mask': {str(value): count for value, count in value_counts(mask).items()}
         }
 
-        for agent in self.agents:
-            
-            if agent.age in dists['age']:
-                dists['age'][agent.age] += 1
-            else:
-                dists['age'][agent.age] = 1
-
-            if agent.gender in dists['gender']:
-                dists['gender'][agent.gender] += 1
-            else:
-                dists['gender'][agent.gender] = 1
-
-            if agent.vaccinated in dists['vaccinated']:
-                dists['vaccinated'][agent.vaccinated] += 1
-            else:
-                dists['vaccinated'][agent.vaccinated] = 1
-
-            if agent.mask in dists['mask']:
-                dists['mask'][agent.mask] += 1
-            else:
-                dists['mask'][agent.mask] = 1
-
-        return dists
-
-
-    def save_plots(self):
-        # Save the state history plot
-        self.plot_state_history()
-        plt.savefig("plot/state_history_plot.png", dpi=300)  # Save with high resolution
-        plt.close()  # Close the plot to avoid overlapping with other plots
+    def save_plots(self, figures=None, dpi=None, background=False):
+        """Zapisuje wykresy (domyślnie Config.plots w rozdzielczości Config.plot_dpi) do katalogu plot/.
 
-        # Save the distributions plot
-        self.plot_dists()
-        plt.savefig("plot/distributions_plot.png", dpi=300)
-        plt.close()
+        Wykresy są rysowane równolegle w osobnych procesach; z `background` metoda nie czeka na ich zapis.
+        Zwraca PlotJob."""
+        return save_plots(self, figures, dpi, background=background)
 
-        # # Save the functions plot
-        # self.plot_functions()
-        # plt.savefig("functions_plot.png", dpi=300)
-        # plt.close()
-
-        # Save the rates plot
-        self.plot_rates()
-        plt.savefig("plot/rates_plot.png", dpi=300)
-        plt.close()
+    def add_observer(self, observer):
+        """Podpina obserwatora (np. PygameRenderer) wywoływanego po każdym kroku i na końcu symulacji."""
+        self.observers.append(observer)
 
     def run(self, steps, screen, clock, gif_filename):
         """Uruchomienie symulacji przez określoną liczbę kroków i zapisanie do pliku GIF."""
-        frames = []  # Lista do przechowywania klatek
+        from renderer import PygameRenderer  # pygame i PIL są potrzebne tylko przy rysowaniu
 
-        running = True
-        while running and steps > 0:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    running = False
+        self.add_observer(PygameRenderer(screen, clock, gif_filename,
+                                         frame_stride=self.config.frame_stride,
+                                         frame_downscale=self.config.frame_downscale))
+        self.run_headless(steps)
 
-            # Ustalenie tła i rysowanie agentów
-            screen.fill((255, 255, 255))  # Tło białe
+        # # Rysowanie wykresów
+        # self.plot_state_history()
+        # self.plot_dists()
+        # self.plot_functions()
+        # self.plot_rates()
+        #
+        # plt.show()
+
+        return self.save_plots(background=True)
 
-            for central_location in self.central_locations:
-                central_location.draw(screen)
+    def run_headless(self, steps):
+        """Uruchomienie symulacji bez pygame i bez ograniczania liczby klatek na sekundę.
 
-            if self.quarantine:
-                self.quarantine.draw(screen)
-                pygame.draw.rect(screen,
-                                 (0, 0, 0),
-                                 pygame.Rect(0, 0, self.board_width, self.board_height), 2)
+        Rysowanie odbywa się tylko przez podpiętych obserwatorów; zwraca historię stanów."""
+        if self.config.checkpoint_interval > 0 and not any(isinstance(observer, CheckpointWriter)
+                                                            for observer in self.observers):
+            self.add_observer(CheckpointWriter(self.config.checkpoint_filename, self.config.checkpoint_interval))
+        if self.config.record_trajectory and not any(isinstance(observer, TrajectoryRecorder)
+                                                     for observer in self.observers):
+            self.add_observer(TrajectoryRecorder(self.config.trajectory_filename))
 
-            self.step(screen)
+        profiler = self.profiler
+        self.running = True
+        while self.running and steps > 0:
+            self.step()
 
             # Zapisanie stanu symulacji
+            if profiler is not None:
+                profiler.start()
             self.record_state()
+            if profiler is not None:
+                profiler.lap('record_state')
 
-            if not os.path.exists('figures'):
-                os.makedirs('figures')
-            frame = pygame.image.tostring(screen, 'RGB')
-            image = Image.frombytes('RGB', (self.config.width, self.config.height), frame)
-            frames.append(image)
-
-            # NOTE: odkomentować, jeśli potrzeba wyświelić symulację w oknie pygame
-            pygame.display.flip()  # Aktualizacja ekranu
-            clock.tick(24)  # Ustalamy ilość klatek na sekundę
+            for observer in self.observers:
+                observer.on_step(self)
+            if profiler is not None:
+                profiler.lap('observers')
             steps -= 1
 
-        # Zapisanie klatek jako GIF
-        if frames:
-            frames[0].save(gif_filename, save_all=True, append_images=frames[1:], optimize=True, duration=40, loop=0)
-
-        # # Rysowanie wykresów
-        # self.plot_state_history()
-        # self.plot_dists()
-        # self.plot_functions()
-        # self.plot_rates()
-        #
-        # plt.show()
+        for observer in self.observers:
+            observer.on_finish(self)
 
-        self.save_plots()
+        if profiler is not None:
+            profiler.dump(self.config.profile_filename)
 
-        pygame.quit()
+        return self.state_history
 
-    def step(self, screen):
+    def step(self):
         """Przeprowadzenie jednego kroku symulacji."""
+        tick = self.tick
+        self.tick += 1
+        if self.engine is not None:
+            self.engine.step(tick)
+            return
+
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.start()
+        repulsion = self.calculate_repulsion()
+        if profiler is not None:
+            profiler.lap('repulsion_forces')
+        event_log = self.event_log
+        if event_log is not None:
+            quarantined_before = np.fromiter((agent.quarantined for agent in self.agents), dtype=bool,
+                                             count=len(self.agents))
+
+        # Ruch wszystkich agentów; przejścia stanów dopiero po nim, na kontaktach z pozycji po ruchu
+        if profiler is not None:
+            for agent, agent_repulsion in zip(self.agents, repulsion):
+                agent.step_profiled(self.config, self.central_locations, self.quarantine,
+                                    self.board_width, self.board_height, agent_repulsion, profiler)
+        else:
+            for agent, agent_repulsion in zip(self.agents, repulsion):
+                agent.step(self.config, self.central_locations, self.quarantine, self.board_width,
+                           self.board_height, agent_repulsion)  # Ruch każdego agenta
+
+        if profiler is not None:
+            profiler.start()
         self.board_grid = self.build_board_grid()
-        for agent in self.agents:
-            agent.step(self.config, screen, self.central_locations, self.quarantine,
-                       self.board_width, self.board_height, self.board_grid)  # Wykonanie kroku dla każdego agenta
+        if profiler is not None:
+            profiler.lap('build_board_grid')
+        if event_log is not None:
+            contacts, pairs = self.count_infectious_contacts(return_pairs=True)
+        else:
+            contacts = self.count_infectious_contacts()
+
+        # Stan mogą zmienić tylko agenci aktywni w kalendarzu przejść oraz podatni z zakaźnym sąsiadem
+        self.scheduler.advance(tick, self.states_entered_at)
+        due = np.flatnonzero(self.scheduler.active | (contacts > 0))
+        states_before = [self.agents[index].state for index in due.tolist()]
+        if profiler is not None:
+            profiler.lap('count_infectious_contacts')
+        for index, infectious_contacts in zip(due.tolist(), contacts[due].tolist()):
+            self.agents[index].transition(self.config, infectious_contacts, tick)  # Aktualizacja stanu
+        if profiler is not None:
+            profiler.lap('transition')
+
+        changed = [index for index, state in zip(due.tolist(), states_before) if self.agents[index].state != state]
+        for code, state in enumerate(STATES):
+            self.scheduler.enter([index for index in changed if self.agents[index].state == state], code,
+                                 tick, tick + 1)
+        if event_log is not None:
+            self.record_events(tick, pairs, quarantined_before, due, states_before)
+
+    def record_events(self, tick, pairs, quarantined_before, due, states_before):
+        """Zapisuje w dzienniku zdarzeń wejścia do kwarantanny i przejścia stanów agentów z kroku `tick`
+        (w kolejności jak VectorizedEngine). Zakażający jest losowany spośród zakaźnych kontaktów `pairs`."""
+        quarantined = np.fromiter((agent.quarantined for agent in self.agents), dtype=bool, count=len(self.agents))
+        quarantine_location = len(self.central_locations)
+        self.event_log.record(tick, np.flatnonzero(quarantined & ~quarantined_before), I, I,
+                              location=quarantine_location)
+
+        before = np.array([STATE_CODES[state] for state in states_before], dtype=np.int8)
+        after = np.array([STATE_CODES[self.agents[index].state] for index in due.tolist()], dtype=np.int8)
+        changed = before != after
+        agents, before, after = due[changed], before[changed], after[changed]
+        infected = (before == S) & (after == STATE_CODES['E'])
+        infectors = np.full(len(agents), NO_INFECTOR, dtype=np.int64)
+        infectors[infected] = self.event_log.choose_infectors(pairs, agents[infected])
+
+        location_codes = {id(location): code for code, location in enumerate(self.central_locations)}
+        if self.quarantine is not None:
+            location_codes[id(self.quarantine)] = quarantine_location
+        locations = [location_codes.get(id(self.agents[index].central_location), NO_LOCATION)
+                     for index in agents.tolist()]
+        self.event_log.record(tick, agents, before, after, infectors, locations)
+
+    def calculate_repulsion(self):
+        """Siły odpychania wszystkich agentów na początku kroku, jako lista par (x, y) w kolejności agentów."""
+        if self.config.social_distancing_repulsion_force <= 0:
+            return itertools.repeat((0, 0))
+        self.board_grid = self.build_board_grid()  # Pozycje sprzed ruchu
+        moving = np.array([not agent.quick_travelling for agent in self.agents], dtype=bool)
+        alive = np.array([agent.state != "D" for agent in self.agents], dtype=bool)
+        repulsion_x, repulsion_y = repulsion_forces(self.board_grid, self.config.social_distancing_repulsion_radius,
+                                                    self.config.social_distancing_repulsion_force, moving, alive)
+        return list(zip(repulsion_x.tolist(), repulsion_y.tolist()))
+
+    def states_entered_at(self, indices):
+        """Ticki wejścia w aktualny stan agentów o podanych indeksach."""
+        return np.array([self.agents[index].state_entered_at for index in indices.tolist()], dtype=np.int64)
+
+    def schedule_all_transitions(self):
+        """Planuje przejścia całej populacji od bieżącego ticku (start symulacji lub wczytanie checkpointu)."""
+        if self.engine is not None:
+            entered_at = self.engine.state_entered_at
+        else:
+            entered_at = np.array([agent.state_entered_at for agent in self.agents], dtype=np.int64)
+        self.scheduler.rebuild(self.current_states()[0], entered_at, self.tick)
+
+    def count_infectious_contacts(self, return_pairs=False):
+        """Liczba zakaźnych sąsiadów każdego podatnego agenta po ruchu w kroku (przeszukiwanie od zakaźnych)."""
+        infectious = np.array([agent.state == "I" and not agent.quick_travelling for agent in self.agents], dtype=bool)
+        susceptible = np.array([agent.state == "S" for agent in self.agents], dtype=bool)
+        return count_infectious_contacts(self.board_grid, self.config.infection_radius, infectious, susceptible,
+                                         return_pairs=return_pairs)
 
     def build_board_grid(self):
-        grid_width = math.ceil(self.board_height / self.config.social_distancing_repulsion_radius)
-        grid_height = math.ceil(self.board_width / self.config.social_distancing_repulsion_radius)
-        result = [
-            [
-                [] for _ in range(grid_width)
-            ] for _ in range(grid_height)
-        ]
-        for agent in self.agents:
-            i = int(agent.x // self.config.social_distancing_repulsion_radius)
-            j = int(agent.y // self.config.social_distancing_repulsion_radius)
-
-            # fallback for the agents that exit the board
-            i = i if i < grid_width else grid_width - 1
-            j = j if j < grid_width else grid_width - 1
-            result[i][j].append(agent)
-        return result
+        """Odbudowuje indeks przestrzenny z aktualnych pozycji agentów."""
+        return self.board_grid.build([agent.x for agent in self.agents], [agent.y for agent in self.agents],
+                                     self.agents)
+
+    @property
+    def state_history(self):
+        """Historia stanów jako lista słowników {"S": ..., "E": ..., ...} (dane trzyma StateRecorder)."""
+        return self.recorder.state_history()
+
+    def current_states(self):
+        """Kody stanów (kolejność STATES) i maska kwarantanny wszystkich agentów."""
+        if self.engine is not None:
+            return self.engine.state, self.engine.quarantined
+
+        num_agents = len(self.agents)
+        state = np.fromiter((STATE_CODES[agent.state] for agent in self.agents), dtype=np.int8, count=num_agents)
+        quarantined = np.fromiter((agent.quarantined for agent in self.agents), dtype=bool, count=num_agents)
+        return state, quarantined
+
+    def agent_size(self):
+        """Promień rysowanego agenta w pikselach."""
+        return AGENT_SIZE
+
+    def positions(self):
+        """Współrzędne x i y wszystkich agentów."""
+        if self.engine is not None:
+            return self.engine.x, self.engine.y
+
+        num_agents = len(self.agents)
+        return (np.fromiter((agent.x for agent in self.agents), dtype=np.float64, count=num_agents),
+                np.fromiter((agent.y for agent in self.agents), dtype=np.float64, count=num_agents))
 
     def record_state(self):
         """Zapisuje liczbę agentów w każdym stanie w danym momencie."""
-        state_counts = {"S": 0, "E": 0, "I": 0, "R": 0, "D": 0}
-
-        for agent in self.agents:
-            state_counts[agent.state] += 1
-
-        # Dodajemy stan do historii
-        self.state_history.append(state_counts)
+        state, quarantined = self.current_states()
+        self.recorder.record(state, quarantined)
+        if self.strata is not None:
+            self.strata.record(state)
 
     def plot_dists(self):
-        fig, ax = plt.subplots(2, 2, figsize=(10, 5))
-
-        ax[0, 0].bar(self.dists['age'].keys(), self.dists['age'].values(), color="skyblue")
-        ax[0, 0].set_title("Age Distribution")
-        ax[0, 0].set_xlabel("Age")
-        ax[0, 0].set_ylabel("Count")
-        ax[0, 0].grid(True)
-
-        ax[0, 1].pie(self.dists['gender'].values(), labels=self.dists['gender'].keys(), autopct='%1.2f%%',
-                     startangle=90, colors=["blue", "pink"])
-        ax[0, 1].set_title("Gender Distribution")
-
-        ax[1, 0].pie(self.dists['vaccinated'].values(), labels=self.dists['vaccinated'].keys(), autopct='%1.2f%%',
-                     startangle=90, colors=["blue", "pink"])
-        ax[1, 0].set_title("Vaccination Distribution")
-
-        ax[1, 1].pie(self.dists['mask'].values(), labels=self.dists['mask'].keys(), autopct='%1.2f%%', startangle=90,
-                     colors=["blue", "pink"])
-        ax[1, 1].set_title("Mask Wearing Distribution")
-
-        plt.tight_layout()
-        fig.savefig('figures/distributions.png')
+        from plots import plot_dists
+        plot_dists(self.dists)
 
     def plot_functions(self):
-        fig1, ax = plt.subplots(2, 4, figsize=(10, 5))
-        fig2, ax2 = plt.subplots(2, 4, figsize=(10, 5))
-
-        ages = np.linspace(0, 100)
-        genders = ['Male', 'Female']
-        vaccinated = ['True', 'False']
-        masks = ['True', 'False']
-
-        infection_vals = [age_infection_proba(age) for age in ages]
-        ax[0, 0].plot(ages, infection_vals, label="InfectionProbability(age)")
-        ax[0, 0].set_xlabel("Age")
-        ax[0, 0].set_ylabel("Rate")
-        ax[0, 0].legend()
-        ax[0, 0].grid(True)
-
-        ax[0, 1].bar(genders, [gender_infection_proba(gender) for gender in genders], color='darkgreen')
-        ax[0, 1].set_title("InfectionProbability(gender)")
-
-        ax[0, 2].bar(vaccinated, [vaccinated_infection_proba(vacc) for vacc in vaccinated], color='gray')
-        ax[0, 2].set_title("InfectionProbability(vaccinated)")
-
-        ax[0, 3].bar(masks, [mask_infection_proba(mask) for mask in masks], color='red')
-        ax[0, 3].set_title("InfectionProbability(wearing_mask)")
-
-        recovery_vals = [age_recovery_proba(age) for age in ages]
-        ax[1, 0].plot(ages, recovery_vals, label="RecoveryProbability(age)")
-        ax[1, 0].set_xlabel("Age")
-        ax[1, 0].set_ylabel("Rate")
-        ax[1, 0].legend()
-        ax[1, 0].grid(True)
-
-        ax[1, 1].bar(genders, [gender_recovery_proba(gender) for gender in genders], color='darkgreen')
-        ax[1, 1].set_title("RecoveryProbability(gender)")
-
-        ax[1, 2].bar(vaccinated, [vaccinated_recovery_proba(vacc) for vacc in vaccinated], color='gray')
-        ax[1, 2].set_title("RecoveryProbability(vaccinated)")
-
-        ax[1, 3].bar(masks, [mask_recovery_proba(mask) for mask in masks], color='red')
-        ax[1, 3].set_title("RecoveryProbability(wearing_mask)")
-
-        mortality_vals = [age_mortality_proba(age) for age in ages]
-        ax2[0, 0].plot(ages, mortality_vals, label="MortalityProbability(age)")
-        ax2[0, 0].set_xlabel("Age")
-        ax2[0, 0].set_ylabel("Rate")
-        ax2[0, 0].legend()
-        ax2[0, 0].grid(True)
-
-        ax2[0, 1].bar(genders, [gender_mortality_proba(gender) for gender in genders], color='darkgreen')
-        ax2[0, 1].set_title("MortalityProbability(gender)")
-
-        ax2[0, 2].bar(vaccinated, [vaccinated_mortality_proba(vacc) for vacc in vaccinated], color='gray')
-        ax2[0, 2].set_title("MortalityProbability(vaccinated)")
-
-        ax2[0, 3].bar(masks, [mask_mortality_proba(mask) for mask in masks], color='red')
-        ax2[0, 3].set_title("MortalityProbability(wearing_mask)")
-
-        immunity_loss_vals = [age_immunity_loss_proba(age) for age in ages]
-        ax2[1, 0].plot(ages, immunity_loss_vals, label="ImmunityLossProbability(age)")
-        ax2[1, 0].set_xlabel("Age")
-        ax2[1, 0].set_ylabel("Rate")
-        ax2[1, 0].legend()
-        ax2[1, 0].grid(True)
-
-        ax2[1, 1].bar(genders, [gender_immunity_loss_proba(gender) for gender in genders], color='darkgreen')
-        ax2[1, 1].set_title("ImmunityLossProbability(gender)")
-
-        ax2[1, 2].bar(vaccinated, [vaccinated_immunity_loss_proba(vacc) for vacc in vaccinated], color='gray')
-        ax2[1, 2].set_title("ImmunityLossProbability(vaccinated)")
-
-        ax2[1, 3].bar(masks, [mask_immunity_loss_proba(mask) for mask in masks], color='red')
-        ax2[1, 3].set_title("ImmunityLossProbability(wearing_mask)")
-
-        fig1.savefig('figures/functions1.png')
-        fig2.savefig('figures/functions2.png')
+        from plots import plot_functions
+        return plot_functions()
 
     def plot_rates(self):
-        fig, ax = plt.subplots(1, 4, figsize=(15, 10))
-
-        ax[0].bar(self.rates["infection"].keys(), self.rates["infection"].values(), color="red")
-        ax[0].set_title("Infection Rates Distribution")
-        ax[0].set_xlabel("Infection Rate (%)")
-        ax[0].set_ylabel("Rate")
-        ax[0].grid(True)
-
-        ax[1].bar(self.rates["recovery"].keys(), self.rates["recovery"].values(), color="green")
-        ax[1].set_title("Recovery Rates Distribution")
-        ax[1].set_xlabel("Recovery Rate (%)")
-        ax[1].set_ylabel("Rate")
-        ax[1].grid(True)
-
-        ax[2].bar(self.rates["mortality"].keys(), self.rates["mortality"].values(), color="black")
-        ax[2].set_title("Mortality Rates Distribution")
-        ax[2].set_xlabel("Mortality Rate (%)")
-        ax[2].set_ylabel("Rate")
-        ax[2].grid(True)
-
-        ax[3].bar(self.rates["immunity_loss"].keys(), self.rates["immunity_loss"].values(), color="blue")
-        ax[3].set_title("Immunity Loss Rates Distribution")
-        ax[3].set_xlabel("Immunity Loss Rate (%)")
-        ax[3].set_ylabel("Rate")
-        ax[3].grid(True)
-
-        fig.savefig('figures/rates_distribution.png')
-
-    def plot_state_history(self):
-        """Rysowanie wykresu rozkładu stanów w czasie."""
-        time_steps = range(len(self.state_history))
-        susceptible = [state["S"] for state in self.state_history]
-        exposed = [state["E"] for state in self.state_history]
-        infected = [state["I"] for state in self.state_history]
-        recovered = [state["R"] for state in self.state_history]
-        dead = [state["D"] for state in self.state_history]
-
-        # Tworzymy wykres
-        f, ax = plt.subplots(1, 1, figsize=(15, 6))
-        plt.plot(time_steps, susceptible, label="S - Susceptible", color="blue")
-        plt.plot(time_steps, exposed, label="E - Exposed", color="yellow")
-        plt.plot(time_steps, infected, label="I - Infected", color="red")
-        plt.plot(time_steps, recovered, label="R - Recovered", color="green")
-        plt.plot(time_steps, dead, label="D - Dead", color="black")
-
-        # Dodajemy parametry config do tytułu wykresu
-        title = f"Agent States Over Time"
-        plt.title(title)
-
-        plt.xlabel("Time Step")
-        plt.ylabel("Number of Agents")
-        plt.legend()
-        plt.grid(True)
-
-        text = 'Configuration parameters:\n' + self.config.params_values_text()
-        box = dict(boxstyle='round', facecolor='grey', alpha=0.15)
-        ax.text(1.03, 0.98, text, transform=ax.transAxes, fontsize=8, verticalalignment='top', bbox=box)
-        plt.tight_layout()
-        plt.savefig('figures/agent_state_history.png')
+        from plots import plot_rates
+        plot_rates(self.rates)
+
+    def plot_state_history(self, ensemble=None):
+        """Rysowanie wykresu rozkładu stanów w czasie (opcjonalnie pasm ensemble, patrz plots.plot_state_history)."""
+        from plots import plot_state_history
+        plot_state_history(self.recorder.counts[:self.recorder.length], self.config, ensemble)
@@ -0,0 +1,124 @@
+import math
+import numpy as np
+
+
+class SpatialIndex:
+    """Równomierna siatka przestrzenna przechowywana w płaskich tablicach.
+
+    Agenci są sortowani według komórek (sortowanie przez zliczanie), więc agenci z komórki `c` to
+    `agent_index[cell_start[c]:cell_start[c + 1]]`. Siatka pokrywa cały świat razem z kwarantanną,
+    a agenci poza planszą trafiają do najbliższej komórki brzegowej, dzięki czemu nikt nie ginie z indeksu."""
+
+    def __init__(self, width, height, cell_size):
+        self.cell_size = cell_size
+        self.cells_x = max(1, math.ceil(width / cell_size))
+        self.cells_y = max(1, math.ceil(height / cell_size))
+        self.num_cells = self.cells_x * self.cells_y
+        # Dla mniej niż 2^16 komórek numpy sortuje stabilnie przez zliczanie (radix sort) w czasie liniowym
+        self.cell_dtype = np.uint16 if self.num_cells <= np.iinfo(np.uint16).max else np.int64
+
+        self.x = np.empty(0)
+        self.y = np.empty(0)
+        self.items = None
+        self.cell = np.empty(0, dtype=np.int64)
+        self.cell_start = np.zeros(self.num_cells + 1, dtype=np.int64)
+        self.agent_index = np.empty(0, dtype=np.int64)
+        self.sorted_cell_start = None  # Listy Pythona dla candidates, tworzone przy pierwszym zapytaniu po budowie
+        self.sorted_items = None
+        self.profiler = None  # PhaseProfiler zbierający liczby kandydatów i obłożenie komórek
+
+    def cell_coordinates(self, x, y):
+        cell_x = np.clip(np.floor_divide(x, self.cell_size), 0, self.cells_x - 1).astype(np.int64)
+        cell_y = np.clip(np.floor_divide(y, self.cell_size), 0, self.cells_y - 1).astype(np.int64)
+        return cell_x, cell_y
+
+    def build(self, x, y, items=None):
+        """Buduje indeks dla pozycji `x`, `y`; opcjonalne `items` (np. lista agentów) zwraca candidates."""
+        self.x = np.asarray(x, dtype=np.float64)
+        self.y = np.asarray(y, dtype=np.float64)
+        self.items = items
+
+        cell_x, cell_y = self.cell_coordinates(self.x, self.y)
+        self.cell = cell_x * self.cells_y + cell_y
+        counts = np.bincount(self.cell, minlength=self.num_cells)
+        self.cell_start = np.concatenate(([0], np.cumsum(counts)))
+        if self.profiler is not None:
+            self.profiler.record_grid(counts)
+        self.agent_index = np.argsort(self.cell.astype(self.cell_dtype), kind='stable')
+
+        self.sorted_cell_start = None
+        self.sorted_items = None
+        return self
+
+    def candidates(self, x, y):
+        """Agenci z komórki punktu (x, y) i ośmiu komórek sąsiednich (elementy `items` albo indeksy).
+
+        Zapytanie o pojedynczy punkt działa na listach Pythona, bo wywołania numpy na skalarach są zbyt kosztowne."""
+        cell_x = min(max(int(x // self.cell_size), 0), self.cells_x - 1)
+        cell_y = min(max(int(y // self.cell_size), 0), self.cells_y - 1)
+        low_y = max(cell_y - 1, 0)
+        high_y = min(cell_y + 1, self.cells_y - 1)
+        if self.sorted_items is None:
+            self.sorted_cell_start = self.cell_start.tolist()
+            self.sorted_items = self.agent_index.tolist() if self.items is None \
+                else [self.items[i] for i in self.agent_index.tolist()]
+        cell_start = self.sorted_cell_start
+        sorted_items = self.sorted_items
+        result = []
+        for neighbour_x in range(max(cell_x - 1, 0), min(cell_x + 2, self.cells_x)):
+            # Komórki o kolejnych y w tej samej kolumnie leżą obok siebie w agent_index
+            column = neighbour_x * self.cells_y
+            result.extend(sorted_items[cell_start[column + low_y]:cell_start[column + high_y + 1]])
+        if self.profiler is not None:
+            self.profiler.count_candidates(1, len(result), len(result))
+        return result
+
+    def pairs(self, radius, sources=None, targets=None, x=None, y=None):
+        """Wszystkie pary (i, j), i != j, zindeksowanych agentów odległych o mniej niż `radius`.
+
+        `sources` i `targets` (maski logiczne) ograniczają pierwszy i drugi element pary. Odległości są liczone
+        z pozycji `x`, `y` (domyślnie z pozycji z chwili budowy indeksu)."""
+        x = self.x if x is None else x
+        y = self.y if y is None else y
+        sources = np.arange(len(self.cell)) if sources is None else np.flatnonzero(sources)
+        empty = np.empty(0, dtype=np.int64)
+        if len(sources) == 0:
+            return empty, empty
+
+        rings = max(1, math.ceil(radius / self.cell_size))
+        source_x, source_y = np.divmod(self.cell[sources], self.cells_y)
+        source_candidates = np.zeros(len(sources), dtype=np.int64) if self.profiler is not None else None
+        first, second = [], []
+        for offset_x in range(-rings, rings + 1):
+            neighbour_x = source_x + offset_x
+            valid_x = (neighbour_x >= 0) & (neighbour_x < self.cells_x)
+            # Zakres kolumn y sąsiednich komórek jest ciągły w agent_index, więc jedno cięcie na agenta
+            low_y = np.maximum(source_y - rings, 0)
+            high_y = np.minimum(source_y + rings, self.cells_y - 1)
+            start = self.cell_start[neighbour_x[valid_x] * self.cells_y + low_y[valid_x]]
+            end = self.cell_start[neighbour_x[valid_x] * self.cells_y + high_y[valid_x] + 1]
+            counts = end - start
+            if source_candidates is not None:
+                source_candidates[valid_x] += counts
+            total = int(counts.sum())
+            if total == 0:
+                continue
+            offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+            candidate_first = np.repeat(sources[valid_x], counts)
+            candidate_second = self.agent_index[np.repeat(start, counts) + offsets]
+
+            keep = candidate_first != candidate_second
+            if targets is not None:
+                keep &= targets[candidate_second]
+            candidate_first, candidate_second = candidate_first[keep], candidate_second[keep]
+            distance_squared = (x[candidate_first] - x[candidate_second]) ** 2 + \
+                (y[candidate_first] - y[candidate_second]) ** 2
+            close = distance_squared < radius ** 2
+            first.append(candidate_first[close])
+            second.append(candidate_second[close])
+
+        if source_candidates is not None:
+            self.profiler.count_candidates(len(sources), int(source_candidates.sum()), int(source_candidates.max()))
+        if not first:
+            return empty, empty
+        return np.concatenate(first), np.concatenate(second)
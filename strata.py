@@ -0,0 +1,109 @@
+import numpy as np
+
+from engine import STATES
+
+AGE_GROUP_SIZE = 10
+AGE_GROUPS = 10  # Grupy wieku 0-9, 10-19, ..., 90+
+
+# Etykiety kategorii każdej cechy w kolejności kodów zwracanych przez strata_codes
+STRATA_LABELS = {
+    'age_group': [f"{start}-{start + AGE_GROUP_SIZE - 1}" for start in range(0, AGE_GROUP_SIZE * (AGE_GROUPS - 1),
+                                                                           AGE_GROUP_SIZE)]
+    + [f"{AGE_GROUP_SIZE * (AGE_GROUPS - 1)}+"],
+    'gender': ['Female', 'Male'],
+    'vaccinated': ['False', 'True'],
+    'mask': ['False', 'True'],
+}
+
+
+def value_counts(values):
+    """Liczności wartości jako słownik {wartość: liczba} w kolejności pierwszego wystąpienia (jak przy liczeniu
+    w pętli po agentach)."""
+    values = np.asarray(values)
+    if values.dtype.kind in 'biu' and len(values):
+        # Liczby całkowite z zakresu nie większego niż liczba wartości - bincount zamiast sortowania
+        low = int(values.min())
+        span = int(values.max()) - low + 1
+        if span <= len(values):
+            codes = values.astype(np.int64) - low
+            counts = np.bincount(codes, minlength=span)
+            first = np.full(span, len(values))
+            np.minimum.at(first, codes, np.arange(len(values)))
+            present = np.flatnonzero(counts)
+            order = present[np.argsort(first[present], kind='stable')]
+            return dict(zip((order + low).astype(values.dtype).tolist(), counts[order].tolist()))
+    unique, first, counts = np.unique(values, return_index=True, return_counts=True)
+    order = np.argsort(first, kind='stable')
+    return dict(zip(unique[order].tolist(), counts[order].tolist()))
+
+
+def age_groups(age):
+    """Numer grupy wieku (indeks STRATA_LABELS['age_group']) dla każdej wartości wieku."""
+    return np.clip(np.asarray(age) // AGE_GROUP_SIZE, 0, AGE_GROUPS - 1).astype(np.int64)
+
+
+def strata_codes(age, male, vaccinated, mask):
+    """Kody kategorii każdej cechy dla wszystkich agentów (indeksy etykiet z STRATA_LABELS)."""
+    return {
+        'age_group': age_groups(age),
+        'gender': np.asarray(male, dtype=np.int64),
+        'vaccinated': np.asarray(vaccinated, dtype=np.int64),
+        'mask': np.asarray(mask, dtype=np.int64),
+    }
+
+
+class StratifiedRecorder:
+    """Liczba agentów w każdym stanie w podziale na kategorie cech (grupa wieku, płeć, szczepienie, maseczka)
+    w każdym kroku, np. rozkład wieku zakażonych w czasie.
+
+    Bieżące tablice (stan, kategoria) są aktualizowane przyrostowo - tylko o agentów, którzy zmienili stan od
+    poprzedniego zapisu - i kopiowane do prealokowanej historii int32 (powiększanej dwukrotnie w razie potrzeby)."""
+
+    def __init__(self, codes, capacity=1024):
+        self.codes = codes
+        self.length = 0
+        self.current = {name: np.zeros((len(STATES), len(STRATA_LABELS[name])), dtype=np.int64) for name in codes}
+        self.history = {name: np.zeros((capacity, len(STATES), len(STRATA_LABELS[name])), dtype=np.int32)
+                        for name in codes}
+        self.previous_state = None
+
+    def counts(self, name, state, agents=None):
+        """Liczności par (stan, kategoria) agentów `agents` (domyślnie wszystkich) jako tablica (stany, kategorie)."""
+        categories = len(STRATA_LABELS[name])
+        codes = self.codes[name] if agents is None else self.codes[name][agents]
+        return np.bincount(state.astype(np.int64) * categories + codes,
+                           minlength=len(STATES) * categories).reshape(len(STATES), categories)
+
+    def start(self, state):
+        """Liczy bieżące tablice od zera (start symulacji, wczytanie checkpointu)."""
+        self.previous_state = np.array(state, dtype=np.int8)
+        for name in self.codes:
+            self.current[name] = self.counts(name, self.previous_state)
+
+    def grow(self):
+        for name, history in self.history.items():
+            self.history[name] = np.resize(history, (2 * len(history),) + history.shape[1:])
+
+    def record(self, state):
+        """Zapisuje krok; `state` to tablica kodów stanów wszystkich agentów."""
+        changed = np.flatnonzero(self.previous_state != state)
+        if len(changed):
+            for name in self.codes:
+                self.current[name] += self.counts(name, state[changed], changed) - \
+                    self.counts(name, self.previous_state[changed], changed)
+            self.previous_state[changed] = state[changed]
+
+        if self.length == len(next(iter(self.history.values()))):
+            self.grow()
+        for name in self.codes:
+            self.history[name][self.length] = self.current[name]
+        self.length += 1
+
+    def table(self, name):
+        """Historia cechy `name` jako tablica (kroki, stany, kategorie)."""
+        return self.history[name][:self.length]
+
+    def save_npz(self, filename):
+        np.savez_compressed(filename, states=np.array(STATES),
+                            **{name: self.table(name) for name in self.codes},
+                            **{name + '_labels': np.array(STRATA_LABELS[name]) for name in self.codes})
@@ -0,0 +1,119 @@
+import argparse
+import csv
+import itertools
+import json
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from config import Config
+from mean_field import MeanFieldModel
+from recorder import load_state_history
+from result_cache import CACHE_DIRECTORY, ResultCache, result_key
+from simulation import Simulation
+
+HISTORY_FILE = 'state_history.npz'  # Nazwa historii stanów we wpisie ResultCache (ta sama co w main.py)
+
+
+def parameter_grid(grid):
+    """Iloczyn kartezjański wartości parametrów: {'infection_rate': [0.1, 0.2], ...} -> lista słowników nadpisań."""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def run_scenario(scenario_id, overrides, steps, params, cache_directory=None):
+    """Uruchamia jeden scenariusz bez renderowania i zwraca jego historię stanów.
+
+    Każda symulacja ma własne generatory liczb losowych (Config.seed), więc wyniki nie zależą od procesu.
+    Z `cache_directory` scenariusze z ustalonym ziarnem są brane z ResultCache (i do niego zapisywane)."""
+    config = Config(params, **overrides)
+    cache = ResultCache(cache_directory) if cache_directory is not None else None
+    key = result_key(config, steps) if cache is not None else None
+    if key is not None:
+        entry = cache.get(key, [HISTORY_FILE])
+        if entry is not None:
+            return scenario_id, overrides, load_state_history(os.path.join(entry, HISTORY_FILE))
+
+    simulation = MeanFieldModel(config) if config.engine == 'mean_field' else Simulation(config)
+    history = simulation.run_headless(steps)
+    if key is not None:
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, HISTORY_FILE)
+            simulation.recorder.save_npz(filename)
+            cache.put(key, {HISTORY_FILE: filename}, config, steps)
+    return scenario_id, overrides, history
+
+
+def run_scenarios(scenarios, steps, params=None, max_workers=None, cache_directory=None):
+    """Uruchamia scenariusze (lista słowników nadpisań pól Config) równolegle w puli procesów.
+
+    Zwraca wyniki jako (numer scenariusza, nadpisania, historia stanów) w kolejności scenariuszy."""
+    if params is None:
+        with open('parameters.json', 'r') as file:
+            params = json.load(file)
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(run_scenario, scenario_id, overrides, steps, params, cache_directory)
+                   for scenario_id, overrides in enumerate(scenarios)]
+        for future in futures:
+            yield future.result()
+
+
+def run_sweep(scenarios, steps, params=None, max_workers=None, cache_directory=None):
+    """Uruchamia scenariusze równolegle i zbiera wyniki w jedną tabelę w postaci listy wierszy:
+    numer scenariusza, nadpisane parametry, krok i liczby S/E/I/R/D."""
+    rows = []
+    for scenario_id, overrides, history in run_scenarios(scenarios, steps, params, max_workers, cache_directory):
+        for step, state_counts in enumerate(history):
+            rows.append({'scenario': scenario_id, **overrides, 'step': step, **state_counts})
+    return rows
+
+
+def write_csv(rows, filename):
+    """Zapisuje tabelę wyników do pliku CSV (kolumny w kolejności pierwszego wystąpienia)."""
+    fieldnames = list(dict.fromkeys(name for row in rows for name in row))
+    with open(filename, 'w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def parse_value(text):
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return text
+
+
+def parse_grid(arguments):
+    """Zamienia argumenty postaci `nazwa=w1,w2,...` na słownik list wartości."""
+    grid = {}
+    for argument in arguments:
+        name, values = argument.split('=', 1)
+        grid[name] = [parse_value(value) for value in values.split(',')]
+    return grid
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Równoległe przeszukiwanie parametrów symulacji (bez pygame).")
+    parser.add_argument('--grid', action='append', default=[], metavar='NAZWA=W1,W2,...',
+                        help="wartości pola Config do przeszukania (można podać wielokrotnie)")
+    parser.add_argument('--scenarios', help="plik JSON z listą słowników nadpisań pól Config")
+    parser.add_argument('--steps', type=int, default=500, help="liczba kroków każdej symulacji")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="liczba procesów")
+    parser.add_argument('--output', default='sweep.csv', help="plik CSV z wynikami")
+    parser.add_argument('--cache', default=CACHE_DIRECTORY, help="katalog pamięci podręcznej wyników")
+    parser.add_argument('--no-cache', action='store_true', help="zawsze uruchamiaj symulacje od nowa")
+    args = parser.parse_args()
+
+    scenarios = parameter_grid(parse_grid(args.grid))
+    if args.scenarios:
+        with open(args.scenarios, 'r') as file:
+            listed = json.load(file)
+        scenarios = [{**listed_overrides, **grid_overrides} for listed_overrides in listed
+                     for grid_overrides in scenarios]
+
+    rows = run_sweep(scenarios, args.steps, max_workers=args.workers,
+                     cache_directory=None if args.no_cache else args.cache)
+    write_csv(rows, args.output)
+    print(f"Zapisano {len(scenarios)} scenariuszy ({len(rows)} wierszy) do {args.output}")
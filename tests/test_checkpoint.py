@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from checkpoint import agent_columns, load_checkpoint
+from config import Config
+from simulation import Simulation
+
+STEPS = 60
+CHECKPOINT_STEP = 30
+
+
+@pytest.mark.parametrize('engine', ['agents', 'vectorized'])
+@pytest.mark.parametrize('seed', [7, None])
+def test_resume_matches_uninterrupted_run(tmp_path, engine, seed):
+    """Wznowienie z checkpointu daje ten sam przebieg co symulacja bez przerwy - także bez ziarna, gdy populacja
+    wylosowana w load_checkpoint różni się od zapisanej."""
+    config = Config({}, num_agents=400, seed=seed, engine=engine, plots=[], initial_infected=20, record_strata=True,
+                    record_transitions=True, checkpoint_interval=CHECKPOINT_STEP,
+                    checkpoint_filename=str(tmp_path / 'checkpoint{step}.npz'))
+    uninterrupted = Simulation(config)
+    history = uninterrupted.run_headless(STEPS)
+
+    resumed = load_checkpoint(str(tmp_path / f'checkpoint{CHECKPOINT_STEP}.npz'))
+    resumed.config.checkpoint_interval = 0
+    assert resumed.run_headless(STEPS - CHECKPOINT_STEP) == history
+
+    for name, values in agent_columns(uninterrupted).items():
+        np.testing.assert_array_equal(agent_columns(resumed)[name], values, err_msg=name)
+    for name in uninterrupted.strata.codes:
+        np.testing.assert_array_equal(resumed.strata.table(name), uninterrupted.strata.table(name), err_msg=name)
+    np.testing.assert_array_equal(resumed.recorder.transitions[:resumed.recorder.length],
+                                  uninterrupted.recorder.transitions[:uninterrupted.recorder.length])
+    assert resumed.dists == uninterrupted.dists
+    assert resumed.rates == uninterrupted.rates
@@ -0,0 +1,15 @@
+import pytest
+
+from config import Config
+
+
+def test_repulsion_radius_follows_infection_radius_override():
+    assert Config({}).social_distancing_repulsion_radius == Config({}).infection_radius + 10
+    assert Config({}, infection_radius=40).social_distancing_repulsion_radius == 50
+    config = Config({}, infection_radius=40, social_distancing_repulsion_radius=20)
+    assert config.social_distancing_repulsion_radius == 20
+
+
+def test_unknown_override_is_rejected():
+    with pytest.raises(ValueError):
+        Config({}, infection_radious=40)
@@ -0,0 +1,41 @@
+import numpy as np
+
+from counter_random import CounterRandom
+
+TICK = 12
+PURPOSE = 3
+
+
+def test_draw_does_not_depend_on_other_agents():
+    """Liczba agenta zależy tylko od (klucz, tick, cel, próba, numer agenta) - nie od tego, którzy inni agenci
+    losują w tym samym wywołaniu ani w jakiej kolejności."""
+    random = CounterRandom(np.random.SeedSequence(5))
+    population = random.uniform(TICK, PURPOSE, np.arange(100000))
+    agents = np.random.default_rng(0).choice(100000, 500, replace=False)
+
+    np.testing.assert_array_equal(random.uniform(TICK, PURPOSE, agents), population[agents])
+    np.testing.assert_array_equal(random.uniform(TICK, PURPOSE, agents[::-1]), population[agents[::-1]])
+    for agent in agents[:10]:
+        assert random.uniform(TICK, PURPOSE, [agent])[0] == population[agent]
+    np.testing.assert_array_equal(random.uniform(TICK, PURPOSE, [99999, 5]), population[[99999, 5]])
+
+
+def test_rows_do_not_depend_on_other_agents():
+    random = CounterRandom(np.random.SeedSequence(5))
+    population = random.uniform(TICK, PURPOSE, np.arange(5000), width=2)
+    agents = np.array([4999, 17, 2500])
+    np.testing.assert_array_equal(random.uniform(TICK, PURPOSE, agents, width=2), population[agents])
+    assert random.uniform(TICK, PURPOSE, [], width=2).shape == (0, 2)
+
+
+def test_streams_are_distinct_and_reproducible():
+    """Inny tick, cel, próba lub klucz dają inne liczby; ten sam klucz (np. z checkpointu) - te same."""
+    random = CounterRandom(np.random.SeedSequence(5))
+    agents = np.arange(1000)
+    values = random.uniform(TICK, PURPOSE, agents)
+    assert 0 <= values.min() and values.max() < 1
+    np.testing.assert_array_equal(CounterRandom(key=random.state()).uniform(TICK, PURPOSE, agents), values)
+    for other in (random.uniform(TICK + 1, PURPOSE, agents), random.uniform(TICK, PURPOSE + 1, agents),
+                  random.uniform(TICK, PURPOSE, agents, attempt=1),
+                  CounterRandom(np.random.SeedSequence(6)).uniform(TICK, PURPOSE, agents)):
+        assert not np.any(other == values)
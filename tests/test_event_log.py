@@ -0,0 +1,113 @@
+import numpy as np
+import pytest
+
+from config import Config
+from engine import E, I, NO_LOCATION, R, S, STATES
+from event_log import (EventLog, generation_intervals, infection_tree, load_events, reproduction_numbers,
+                       secondary_infections)
+from recorder import TRANSITIONS
+from simulation import Simulation
+from transmission import NO_INFECTOR
+
+STEPS = 150
+
+
+def test_chunks_round_trip(tmp_path):
+    """Rekordy dopisywane w wielu porcjach (i po wznowieniu) są odczytywane bez zmian i w kolejności."""
+    filename = str(tmp_path / 'events.bin')
+    rng = np.random.default_rng(2)
+    log = EventLog(filename, chunk_size=7)
+    agents = rng.integers(0, 1000, 40)
+    infectors = rng.integers(0, 1000, 40)
+    log.record(3, agents[:25], S, E, infectors[:25], 2)
+    size = log.flush()
+    log.record(4, agents[25:], R, S)
+    log.on_finish(None)
+
+    events = load_events(filename)
+    np.testing.assert_array_equal(events['agent'], agents)
+    np.testing.assert_array_equal(events['tick'], [3] * 25 + [4] * 15)
+    np.testing.assert_array_equal(events['infector'][:25], infectors[:25])
+    assert np.all(events['infector'][25:] == NO_INFECTOR)
+    assert np.all(events['location'] == [2] * 25 + [NO_LOCATION] * 15)
+
+    resumed = EventLog(filename, chunk_size=7)
+    resumed.resume(size)
+    resumed.record(5, [1, 2], I, R)
+    resumed.on_finish(None)
+    events = load_events(filename)
+    np.testing.assert_array_equal(events['agent'], np.concatenate((agents[:25], [1, 2])))
+    np.testing.assert_array_equal(events['from_state'], [S] * 25 + [I] * 2)
+
+
+@pytest.fixture(params=['agents', 'vectorized'])
+def logged_run(request, tmp_path):
+    config = Config({}, engine=request.param, seed=4, num_agents=300, infection_rate=0.1, record_events=True,
+                    record_transitions=True, events_filename=str(tmp_path / 'events.bin'))
+    simulation = Simulation(config)
+    simulation.event_log.chunk_size = 64  # Wiele porcji w pliku
+    simulation.event_log.buffers = {name: values[:64] for name, values in simulation.event_log.buffers.items()}
+    simulation.run_headless(STEPS)
+    return simulation, load_events(config.events_filename)
+
+
+def test_events_match_recorder_transitions(logged_run):
+    simulation, events = logged_run
+    recorder = simulation.recorder
+    initial = (events['tick'] == 0) & (events['from_state'] == S) & (events['to_state'] == I)
+    assert np.count_nonzero(initial) == simulation.config.initial_infected
+    assert np.all(events['tick'][~initial] < STEPS)
+
+    transitions = recorder.transitions[:recorder.length]
+    for column, (name, before, after) in enumerate(TRANSITIONS):
+        logged = (events['from_state'] == before) & (events['to_state'] == after) & ~initial
+        np.testing.assert_array_equal(np.bincount(events['tick'][logged], minlength=STEPS), transitions[:, column],
+                                      err_msg=name)
+
+    # Odtworzenie stanów z dziennika daje liczności z StateRecorder w każdym kroku
+    state = np.full(simulation.config.num_agents, S, dtype=np.int8)
+    state[events['agent'][initial]] = I
+    changes = (events['from_state'] != events['to_state']) & ~initial
+    for tick in range(STEPS):
+        now = changes & (events['tick'] == tick)
+        assert np.all(state[events['agent'][now]] == events['from_state'][now])
+        state[events['agent'][now]] = events['to_state'][now]
+        np.testing.assert_array_equal(np.bincount(state, minlength=len(STATES)), recorder.counts[tick])
+
+    # Wejścia do kwarantanny (I -> I) tłumaczą każdy wzrost liczby agentów w kwarantannie
+    entries = np.bincount(events['tick'][~changes & ~initial], minlength=STEPS)
+    growth = np.diff(recorder.quarantined[:recorder.length], prepend=0)
+    assert np.all(growth <= entries)
+
+
+def test_infection_tree_is_consistent(logged_run):
+    simulation, events = logged_run
+    tree = infection_tree(events)
+    infections = (events['from_state'] == S) & np.isin(events['to_state'], (E, I))
+    assert len(tree['tick']) == np.count_nonzero(infections) > simulation.config.initial_infected
+    assert np.all(np.diff(tree['tick']) >= 0)
+
+    # Każde zakażenie S -> E ma zakażającego i jego zakażenie źródłowe; początkowo zakażeni - nie
+    secondary = tree['source_infection'] >= 0
+    np.testing.assert_array_equal(secondary, tree['infector'] != NO_INFECTOR)
+    sources = tree['source_infection'][secondary]
+    np.testing.assert_array_equal(tree['agent'][sources], tree['infector'][secondary])
+    assert np.all(tree['tick'][sources] <= tree['tick'][secondary])
+
+    # Zakażający był już zakaźny: od zakażenia S -> E minął co najmniej okres inkubacji
+    intervals = generation_intervals(events)
+    np.testing.assert_array_equal(intervals, tree['tick'][secondary] - tree['tick'][sources])
+    initial_source = tree['infector'][sources] < simulation.config.initial_infected
+    initial_source &= tree['tick'][sources] == 0
+    assert np.all(intervals[~initial_source] >= simulation.config.incubation_period)
+
+    counts = secondary_infections(tree)
+    assert counts.sum() == np.count_nonzero(secondary)
+    ticks, rt = reproduction_numbers(events)
+    cohort_size = np.bincount(tree['tick'], minlength=len(ticks))
+    np.testing.assert_array_equal(ticks, np.arange(len(ticks)))
+    np.testing.assert_allclose(np.nansum(rt * cohort_size), counts.sum())
+    np.testing.assert_array_equal(np.isnan(rt), cohort_size == 0)
+
+    ticks, rt = reproduction_numbers(events, window=10)
+    np.testing.assert_allclose(np.nansum(rt * np.bincount(tree['tick'] // 10)), counts.sum())
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+import population
+from config import Config
+from population import load_population_table
+from simulation import Simulation
+
+ROWS = 50
+
+
+def write_csv(path, age):
+    rows = [f"{value},{value % 2},{int(value > 30)},1,{1 + value % 3}" for value in age]
+    path.write_text('age, male, vaccinated, mask, count\n' + '\n'.join(rows) + '\n')
+    return str(path)
+
+
+def test_csv_is_converted_once_and_memory_mapped(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    age = np.arange(ROWS) + 5
+    filename = write_csv(tmp_path / 'population.csv', age)
+
+    table = load_population_table(filename)
+    assert isinstance(table['age'], np.memmap)
+    assert {name: values.dtype for name, values in table.items()} == {
+        'age': np.int64, 'male': bool, 'vaccinated': bool, 'mask': bool, 'count': np.int64}
+    np.testing.assert_array_equal(table['age'], age)
+    np.testing.assert_array_equal(table['male'], age % 2 == 1)
+    np.testing.assert_array_equal(table['vaccinated'], age > 30)
+
+    # Kolejne wczytanie mapuje przekonwertowany plik, bez ponownego parsowania
+    with monkeypatch.context() as patch:
+        patch.setattr(np, 'loadtxt', None)
+        np.testing.assert_array_equal(load_population_table(filename)['count'], 1 + age % 3)
+
+    # Zmieniona zawartość pod tą samą ścieżką jest konwertowana od nowa
+    write_csv(tmp_path / 'population.csv', age + 1)
+    np.testing.assert_array_equal(load_population_table(filename)['age'], age + 1)
+    assert len(list((tmp_path / population.CSV_CACHE_DIRECTORY).iterdir())) == 2
+
+
+def test_csv_integer_columns_must_be_integral(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'population.csv').write_text('age,male\n20.5,1\n')
+    with pytest.raises(ValueError):
+        load_population_table(str(tmp_path / 'population.csv'))
+
+
+def test_csv_and_npz_tables_give_the_same_population(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    age = np.arange(ROWS) + 5
+    csv_filename = write_csv(tmp_path / 'population.csv', age)
+    npz_filename = str(tmp_path / 'population.npz')
+    np.savez(npz_filename, **{name: np.asarray(values) for name, values in load_population_table(csv_filename).items()})
+
+    attributes = [Simulation(Config({}, seed=3, num_agents=200, population_file=filename)).attributes
+                  for filename in (csv_filename, npz_filename)]
+    for csv_values, npz_values in zip(*attributes):
+        np.testing.assert_array_equal(csv_values, npz_values)
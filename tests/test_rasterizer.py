@@ -0,0 +1,47 @@
+import numpy as np
+
+import rasterizer
+from engine import STATES
+from rasterizer import BACKGROUND, BORDER, STATE_COLOR_INDEX, FrameRasterizer
+
+WIDTH = 120
+HEIGHT = 90
+
+
+def population(seed, count=300):
+    rng = np.random.default_rng(seed)
+    return (rng.uniform(-5, WIDTH + 5, count), rng.uniform(-5, HEIGHT + 5, count),
+            rng.integers(0, len(STATES), count))
+
+
+def reference_frame(frame_rasterizer, x, y, state):
+    """Klatka rysowana agent po agencie; na wspólnym pikselu zostaje kolor o większym priorytecie."""
+    frame = frame_rasterizer.background[:-1].reshape(HEIGHT, WIDTH).copy()
+    for agent_x, agent_y, agent_state in zip(x, y, state):
+        rows = int(agent_y) + frame_rasterizer.sprite_dy
+        columns = int(agent_x) + frame_rasterizer.sprite_dx
+        visible = (rows >= 0) & (rows < HEIGHT) & (columns >= 0) & (columns < WIDTH)
+        pixels = (rows[visible], columns[visible])
+        frame[pixels] = np.maximum(frame[pixels], STATE_COLOR_INDEX[agent_state])
+    return frame
+
+
+def test_overlaps_follow_draw_priority_not_agent_order(monkeypatch):
+    frame_rasterizer = FrameRasterizer(WIDTH, HEIGHT, 4, [(0, 0, WIDTH, HEIGHT), (30, 20, 40, 40)])
+    x, y, state = population(1)
+    frame = frame_rasterizer.rasterize(x, y, state)
+    np.testing.assert_array_equal(frame, reference_frame(frame_rasterizer, x, y, state))
+
+    order = np.random.default_rng(2).permutation(len(x))
+    np.testing.assert_array_equal(frame_rasterizer.rasterize(x[order], y[order], state[order]), frame)
+    monkeypatch.setattr(rasterizer, 'RASTER_CHUNK', 7)
+    np.testing.assert_array_equal(frame_rasterizer.rasterize(x, y, state), frame)
+
+
+def test_infected_agent_is_drawn_over_others():
+    frame_rasterizer = FrameRasterizer(WIDTH, HEIGHT, 4)
+    infected = STATES.index('I')
+    for state in ([infected, 0], [0, infected]):
+        frame = frame_rasterizer.rasterize([50, 51], [40, 40], state)
+        assert frame[40, 50] == STATE_COLOR_INDEX[infected]
+    assert STATE_COLOR_INDEX.min() > max(BACKGROUND, BORDER)
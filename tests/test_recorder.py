@@ -0,0 +1,72 @@
+import numpy as np
+
+from config import Config
+from engine import STATES
+from recorder import TRANSITIONS, StateRecorder, load_state_history
+from simulation import Simulation
+
+STEPS = 30
+AGENTS = 500
+
+
+def random_states(seed):
+    """Losowe stany AGENTS agentów w STEPS + 1 krokach (stan początkowy i kolejne zapisy)."""
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, len(STATES), (STEPS + 1, AGENTS)).astype(np.int8)
+
+
+def test_counts_and_transitions_grow_past_capacity():
+    states = random_states(1)
+    quarantined = np.random.default_rng(2).random((STEPS, AGENTS)) < 0.1
+    recorder = StateRecorder(record_transitions=True, capacity=4)
+    recorder.start(states[0])
+    for step in range(STEPS):
+        recorder.record(states[step + 1], quarantined[step])
+
+    assert recorder.length == STEPS and len(recorder.counts) >= STEPS
+    for step in range(STEPS):
+        np.testing.assert_array_equal(recorder.counts[step],
+                                      [np.count_nonzero(states[step + 1] == code) for code in range(len(STATES))])
+        for column, (_, before, after) in enumerate(TRANSITIONS):
+            expected = np.count_nonzero((states[step] == before) & (states[step + 1] == after))
+            assert recorder.transitions[step, column] == expected
+        assert recorder.quarantined[step] == np.count_nonzero(quarantined[step])
+
+    table = recorder.table()
+    assert table.shape == (STEPS, len(recorder.columns()))
+    np.testing.assert_array_equal(table[:, :len(STATES)], recorder.counts[:STEPS])
+    assert recorder.state_history()[3] == dict(zip(STATES, recorder.counts[3].tolist()))
+
+
+def test_counts_without_transitions(tmp_path):
+    states = random_states(3)
+    recorder = StateRecorder(capacity=1)
+    for step in range(STEPS):
+        recorder.record(states[step])
+    assert recorder.transitions is None and recorder.columns() == list(STATES)
+    np.testing.assert_array_equal(recorder.table(), [np.bincount(state, minlength=len(STATES))
+                                                     for state in states[:STEPS]])
+
+    filename = str(tmp_path / 'state_history.npz')
+    recorder.save_npz(filename)
+    assert load_state_history(filename) == recorder.state_history()
+
+
+def test_simulation_totals():
+    """W każdym kroku liczności stanów sumują się do liczby agentów, a zmiany liczności wynikają z przejść."""
+    config = Config({}, engine='vectorized', seed=3, num_agents=AGENTS, infection_rate=0.1, record_transitions=True)
+    simulation = Simulation(config)
+    simulation.run_headless(STEPS)
+    counts = simulation.recorder.counts[:STEPS].astype(np.int64)
+    transitions = dict(zip((name for name, _, _ in TRANSITIONS), simulation.recorder.transitions[:STEPS].T))
+    assert np.all(counts.sum(axis=1) == AGENTS)
+
+    initial = [AGENTS - config.initial_infected if state == 'S' else config.initial_infected if state == 'I' else 0
+               for state in STATES]
+    previous = np.vstack(([initial], counts[:-1]))
+    change = dict(zip(STATES, (counts - previous).T))
+    assert transitions['new_infections'].sum() > 0
+    # E, I i D zmieniają się tylko przez zapisywane przejścia (R -> S nie jest zapisywane)
+    np.testing.assert_array_equal(change['E'], transitions['new_infections'] - transitions['E->I'])
+    np.testing.assert_array_equal(change['I'], transitions['E->I'] - transitions['I->R'] - transitions['I->D'])
+    np.testing.assert_array_equal(change['D'], transitions['I->D'])
@@ -0,0 +1,92 @@
+import os
+
+import numpy as np
+
+import result_cache
+from config import Config
+from result_cache import ResultCache, result_key
+
+
+def write_file(path, content):
+    with open(path, 'w') as file:
+        file.write(content)
+    return str(path)
+
+
+def test_key_is_stable_and_follows_results():
+    config = Config({}, seed=1, num_agents=300)
+    key = result_key(config, 100)
+    assert key == result_key(Config({}, seed=1, num_agents=300), 100)
+    assert result_key(Config({}, seed=1, num_agents=300, profile=True, checkpoint_interval=10), 100) == key
+
+    assert result_key(Config({}, seed=2, num_agents=300), 100) != key
+    assert result_key(Config({}, seed=1, num_agents=301), 100) != key
+    assert result_key(config, 101) != key
+    assert result_key(Config({}, seed=None), 100) is None
+
+
+def test_results_version_invalidates_keys(monkeypatch):
+    config = Config({}, seed=1)
+    key = result_key(config, 100)
+    monkeypatch.setattr(result_cache, 'RESULTS_VERSION', result_cache.RESULTS_VERSION + 1)
+    assert result_key(config, 100) != key
+
+
+def test_key_follows_population_table_contents(tmp_path):
+    """Zmiana tabeli populacji pod tą samą ścieżką daje nowy klucz; ta sama zawartość - ten sam."""
+    filename = str(tmp_path / 'population.npz')
+    np.savez(filename, age=np.arange(300) % 90)
+    config = Config({}, seed=1, num_agents=300, population_file=filename)
+    key = result_key(config, 100)
+    assert result_key(config, 100) == key
+
+    np.savez(filename, age=np.arange(300) % 80)
+    assert result_key(config, 100) != key
+    np.savez(filename, age=np.arange(300) % 90)
+    assert result_key(config, 100) == key
+
+
+def test_put_get_and_restore(tmp_path):
+    cache = ResultCache(str(tmp_path / 'cache'))
+    source = write_file(tmp_path / 'history.txt', 'history')
+    cache.put('a', {'state_history.npz': source, 'plot/rates_plot.png': source}, Config({}, seed=1), 100)
+
+    assert cache.get('a', ['state_history.npz', 'plot/rates_plot.png']) is not None
+    assert cache.get('a', ['vis.gif']) is None
+    assert cache.get('b') is None
+
+    destination = tmp_path / 'restored'
+    assert cache.restore('a', ['plot/rates_plot.png'], str(destination))
+    assert (destination / 'plot' / 'rates_plot.png').read_text() == 'history'
+    assert not cache.restore('a', ['vis.gif'], str(destination))
+
+    # Dopisanie pliku zachowuje wcześniejsze pliki wpisu
+    cache.put('a', {'vis.gif': write_file(tmp_path / 'vis.txt', 'gif')})
+    assert cache.get('a', ['state_history.npz', 'vis.gif']) is not None
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = ResultCache(str(tmp_path / 'cache'), max_bytes=None, max_entries=2)
+    source = write_file(tmp_path / 'result.txt', 'x' * 100)
+    for used_at, key in enumerate(('a', 'b')):
+        cache.put(key, {'result.txt': source})
+        os.utime(os.path.join(cache.entry_path(key), result_cache.ENTRY_FILE), (used_at, used_at))
+    cache.get('a')  # 'a' używany później niż 'b'
+    cache.put('c', {'result.txt': source})
+    assert sorted(key for _, _, key in cache.entries()) == ['a', 'c']
+
+
+def test_evicts_by_size_but_keeps_new_entry(tmp_path):
+    source = write_file(tmp_path / 'result.txt', 'x' * 1000)
+    cache = ResultCache(str(tmp_path / 'cache'), max_bytes=2500)
+    for used_at, key in enumerate(('a', 'b')):
+        cache.put(key, {'result.txt': source})
+        os.utime(os.path.join(cache.entry_path(key), result_cache.ENTRY_FILE), (used_at, used_at))
+    cache.put('c', {'result.txt': source})
+    keys = sorted(key for _, _, key in cache.entries())
+    assert 'c' in keys and 'a' not in keys
+    assert sum(size for _, size, _ in cache.entries()) <= 2500
+
+    cache.max_bytes = 10
+    cache.put('d', {'result.txt': source})  # Większy niż limit - zostaje sam
+    assert [key for _, _, key in cache.entries()] == ['d']
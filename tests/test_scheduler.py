@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from config import Config
+from engine import E, I, R
+from scheduler import TransitionScheduler
+
+ENTERED_AT = 7
+TICKS = 120
+
+
+def due_ticks(scheduler, entered_at):
+    """Ticki (od ENTERED_AT + 1, jak po zmianie stanu w kroku ENTERED_AT), w których agent 0 jest aktywny."""
+    ticks = []
+    for tick in range(ENTERED_AT + 1, ENTERED_AT + TICKS):
+        scheduler.advance(tick, entered_at.__getitem__)
+        if scheduler.active[0]:
+            ticks.append(tick)
+    return ticks
+
+
+@pytest.mark.parametrize('state, overrides, period', [
+    (E, {'incubation_period': 15}, 15),
+    (I, {'recovery_period': 30, 'mortality_period': 50}, 30),
+    (I, {'recovery_period': 60, 'mortality_period': 40}, 40),
+    (R, {'immunity_loss_period': 30}, 30),
+])
+def test_agent_becomes_due_exactly_after_minimum_period(state, overrides, period):
+    """Agent jest aktywny od ticku, w którym czas w stanie (tick - state_entered_at) osiąga minimalny okres,
+    czyli od pierwszego ticku, w którym Agent.transition może zmienić jego stan - i nigdy wcześniej."""
+    scheduler = TransitionScheduler(2, Config({}, **overrides))
+    entered_at = np.array([ENTERED_AT, ENTERED_AT])
+    scheduler.enter([0], state, ENTERED_AT, ENTERED_AT + 1)
+
+    ticks = due_ticks(scheduler, entered_at)
+    assert ticks[0] == ENTERED_AT + period
+    assert ticks == list(range(ENTERED_AT + period, ENTERED_AT + TICKS))  # Aktywny aż do zmiany stanu
+    assert not scheduler.active[1]
+
+
+def test_state_change_cancels_pending_activation():
+    """Wpis kalendarza agenta, który zmienił stan przed terminem, nie aktywuje go."""
+    config = Config({})
+    scheduler = TransitionScheduler(1, config)
+    entered_at = np.array([ENTERED_AT])
+    scheduler.enter([0], R, ENTERED_AT, ENTERED_AT + 1)
+    entered_at[0] = ENTERED_AT + 3
+    scheduler.enter([0], I, ENTERED_AT + 3, ENTERED_AT + 4)
+
+    period = min(config.recovery_period, config.mortality_period)
+    assert due_ticks(scheduler, entered_at)[0] == ENTERED_AT + 3 + period
+
+
+def test_rebuild_activates_overdue_agents_at_current_tick():
+    """Po wczytaniu checkpointu agenci z okresem już upłyniętym są aktywni od razu, pozostali - w terminie."""
+    config = Config({})
+    scheduler = TransitionScheduler(3, config)
+    state = np.array([E, E, R], dtype=np.int8)
+    entered_at = np.array([0, 10, 5])
+    scheduler.rebuild(state, entered_at, 20)
+
+    active = {}
+    for tick in range(20, 60):
+        scheduler.advance(tick, entered_at.__getitem__)
+        for agent in np.flatnonzero(scheduler.active).tolist():
+            active.setdefault(agent, tick)
+    assert active == {0: 20, 1: 10 + config.incubation_period, 2: 5 + config.immunity_loss_period}
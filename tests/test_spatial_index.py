@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from spatial_index import SpatialIndex
+
+WIDTH = 200
+HEIGHT = 120
+CELL_SIZE = 20
+
+
+def positions():
+    """Losowe pozycje oraz punkty na granicach komórek, na krawędziach planszy i poza nią (kwarantanna)."""
+    rng = np.random.default_rng(3)
+    x = np.concatenate((rng.uniform(0, WIDTH, 400), np.arange(0, WIDTH + 1, CELL_SIZE), [0, WIDTH, 0, WIDTH],
+                        [-5, WIDTH + 15, WIDTH + 30, 19.999, 20.001, 40]))
+    y = np.concatenate((rng.uniform(0, HEIGHT, 400), np.full(WIDTH // CELL_SIZE + 1, 60.0), [0, 0, HEIGHT, HEIGHT],
+                        [-5, HEIGHT + 15, 60, 40, 40, 39.999]))
+    return x, y
+
+
+def brute_force_pairs(x, y, radius, sources, targets):
+    distance_squared = (x[:, None] - x[None, :]) ** 2 + (y[:, None] - y[None, :]) ** 2
+    close = (distance_squared < radius ** 2) & sources[:, None] & targets[None, :]
+    np.fill_diagonal(close, False)
+    return set(zip(*np.nonzero(close)))
+
+
+@pytest.mark.parametrize('radius', [CELL_SIZE / 2, CELL_SIZE, 2.5 * CELL_SIZE])
+def test_pairs_match_brute_force(radius):
+    x, y = positions()
+    index = SpatialIndex(WIDTH, HEIGHT, CELL_SIZE).build(x, y)
+    everyone = np.ones(len(x), dtype=bool)
+    first, second = index.pairs(radius)
+    assert len(first) == len(set(zip(first, second)))
+    assert set(zip(first, second)) == brute_force_pairs(x, y, radius, everyone, everyone)
+
+    rng = np.random.default_rng(4)
+    sources = rng.random(len(x)) < 0.3
+    targets = rng.random(len(x)) < 0.6
+    first, second = index.pairs(radius, sources, targets)
+    assert set(zip(first, second)) == brute_force_pairs(x, y, radius, sources, targets)
+
+
+def test_pairs_use_given_positions():
+    """Pary liczone z innych pozycji niż te z budowy indeksu (np. po ruchu o mniej niż komórkę)."""
+    x, y = positions()
+    index = SpatialIndex(WIDTH, HEIGHT, CELL_SIZE).build(x, y)
+    moved_x, moved_y = x + 1.5, y - 1.5
+    everyone = np.ones(len(x), dtype=bool)
+    first, second = index.pairs(CELL_SIZE / 2, x=moved_x, y=moved_y)
+    assert set(zip(first, second)) == brute_force_pairs(moved_x, moved_y, CELL_SIZE / 2, everyone, everyone)
+
+
+def test_candidates_contain_all_neighbours():
+    """Kandydaci punktu to nadzbiór agentów bliższych niż rozmiar komórki, każdy agent co najwyżej raz."""
+    x, y = positions()
+    items = [f'agent {i}' for i in range(len(x))]
+    index = SpatialIndex(WIDTH, HEIGHT, CELL_SIZE).build(x, y, items)
+    for point_x, point_y in zip(x, y):
+        candidates = index.candidates(point_x, point_y)
+        assert len(candidates) == len(set(candidates))
+        distance_squared = (x - point_x) ** 2 + (y - point_y) ** 2
+        expected = {items[i] for i in np.flatnonzero(distance_squared < CELL_SIZE ** 2)}
+        assert expected <= set(candidates)
+
+    indices = SpatialIndex(WIDTH, HEIGHT, CELL_SIZE).build(x, y).candidates(WIDTH, HEIGHT)
+    assert all(isinstance(i, int) for i in indices)
+    assert set(np.flatnonzero((x - WIDTH) ** 2 + (y - HEIGHT) ** 2 < CELL_SIZE ** 2)) <= set(indices)
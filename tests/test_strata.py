@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from config import Config
+from engine import STATES
+from simulation import Simulation
+from strata import STRATA_LABELS, StratifiedRecorder, strata_codes, value_counts
+
+STEPS = 30
+AGENTS = 500
+
+
+def test_incremental_counts_grow_past_capacity():
+    """Przyrostowo aktualizowane tablice są równe liczeniu od zera w każdym kroku, także po powiększeniu historii."""
+    rng = np.random.default_rng(1)
+    codes = strata_codes(rng.integers(0, 110, AGENTS), rng.random(AGENTS) < 0.5, rng.random(AGENTS) < 0.3,
+                         rng.random(AGENTS) < 0.7)
+    states = rng.integers(0, len(STATES), (STEPS + 1, AGENTS)).astype(np.int8)
+    states[1:] = np.where(rng.random((STEPS, AGENTS)) < 0.8, states[:1], states[1:])  # Część agentów bez zmian
+
+    strata = StratifiedRecorder(codes, capacity=2)
+    strata.start(states[0])
+    for step in range(STEPS):
+        strata.record(states[step + 1])
+
+    for name, labels in STRATA_LABELS.items():
+        table = strata.table(name)
+        assert table.shape == (STEPS, len(STATES), len(labels))
+        for step in range(STEPS):
+            expected = np.zeros((len(STATES), len(labels)), dtype=np.int64)
+            np.add.at(expected, (states[step + 1], codes[name]), 1)
+            np.testing.assert_array_equal(table[step], expected)
+
+
+@pytest.mark.parametrize('engine', ['agents', 'vectorized'])
+def test_strata_totals_match_state_counts(engine):
+    config = Config({}, engine=engine, seed=5, num_agents=AGENTS, infection_rate=0.1, record_strata=True)
+    simulation = Simulation(config)
+    simulation.run_headless(STEPS)
+    counts = simulation.recorder.counts[:STEPS]
+    for name in STRATA_LABELS:
+        table = simulation.strata.table(name)
+        assert len(table) == STEPS
+        np.testing.assert_array_equal(table.sum(axis=2), counts, err_msg=name)
+    # Kategorie cech są stałe, więc suma po stanach to liczność kategorii w populacji
+    np.testing.assert_array_equal(simulation.strata.table('gender').sum(axis=1)[-1],
+                                  np.bincount(simulation.strata.codes['gender'], minlength=2))
+
+
+def test_value_counts_keep_first_occurrence_order():
+    assert value_counts(np.array([5, 3, 5, 4, 3, 5])) == {5: 3, 3: 2, 4: 1}
+    assert value_counts(np.array([1000, 0, 1000])) == {1000: 2, 0: 1}  # Zakres większy niż liczba wartości
+    assert value_counts(np.array(['Male', 'Female', 'Male'])) == {'Male': 2, 'Female': 1}
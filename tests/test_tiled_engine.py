@@ -0,0 +1,48 @@
+import os
+import signal
+
+import numpy as np
+import pytest
+
+from config import Config
+from engine import AGENT_ARRAYS
+from simulation import Simulation
+
+STEPS = 80
+PARAMETERS = dict(num_agents=2000, seed=3, plots=[], initial_infected=30, num_central_locations=2, quarantine=True,
+                  central_location_visit_proba=0.02)
+
+
+@pytest.fixture(scope='module')
+def vectorized():
+    simulation = Simulation(Config({}, engine='vectorized', **PARAMETERS))
+    simulation.run_headless(STEPS)
+    return simulation
+
+
+@pytest.mark.parametrize('tiles_x, tiles_y', [(1, 1), (2, 2), (1, 3), (3, 2), (4, 4)])
+def test_tiled_matches_vectorized(vectorized, tiles_x, tiles_y):
+    """Podział na kafelki (z migracją agentów przez granice, do Central Location i kwarantanny) nie zmienia
+    przebiegu - stan populacji jest bitowo zgodny z silnikiem jednoprocesowym."""
+    simulation = Simulation(Config({}, engine='tiled', tiles_x=tiles_x, tiles_y=tiles_y, **PARAMETERS))
+    try:
+        assert simulation.run_headless(STEPS) == vectorized.state_history
+        for name in AGENT_ARRAYS:
+            np.testing.assert_array_equal(getattr(simulation.engine, name), getattr(vectorized.engine, name),
+                                          err_msg=name)
+    finally:
+        simulation.engine.close()
+
+
+def test_worker_exit_is_reported():
+    """Zakończenie procesu kafelka przerywa krok błędem zamiast zawieszać pozostałe kafelki."""
+    simulation = Simulation(Config({}, engine='tiled', tiles_x=2, tiles_y=2, num_agents=200, seed=1, plots=[]))
+    try:
+        simulation.step()
+        process = simulation.engine.processes[1]
+        os.kill(process.pid, signal.SIGKILL)
+        process.join()
+        with pytest.raises(RuntimeError, match='kafelku 1'):
+            simulation.step()
+    finally:
+        simulation.engine.close()
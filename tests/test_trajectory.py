@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from config import Config
+from rasterizer import FrameRasterizer
+from simulation import Simulation
+from trajectory import POSITION_SCALE, Trajectory, TrajectoryRecorder, position_scale
+
+STEPS = 40
+
+
+class PositionCapture:
+    """Obserwator zapamiętujący pozycje i stany agentów z każdego kroku."""
+
+    def __init__(self):
+        self.frames = []
+
+    def on_step(self, simulation):
+        x, y = simulation.positions()
+        self.frames.append((np.array(x, dtype=np.float64), np.array(y, dtype=np.float64),
+                            np.array(simulation.current_states()[0])))
+
+    def on_finish(self, simulation):
+        pass
+
+
+def test_position_scale_fits_board():
+    limit = np.iinfo(np.int16).max
+    assert position_scale(800, 800) == POSITION_SCALE
+    for size in (800, 3000, 4000, 6000, 12000, 30000):
+        scale = position_scale(size, size // 2)
+        assert 1 <= scale <= POSITION_SCALE
+        assert (size + 64) * scale <= limit
+        assert scale == POSITION_SCALE or (size + 64) * scale * 2 > limit
+    with pytest.raises(ValueError):
+        position_scale(40000, 100)
+
+
+@pytest.mark.parametrize('engine, size', [('agents', 800), ('vectorized', 800), ('vectorized', 6000)])
+def test_replay_matches_simulation(tmp_path, engine, size):
+    config = Config({}, engine=engine, seed=2, num_agents=400, width=size, height=size, infection_rate=0.1)
+    simulation = Simulation(config)
+    capture = PositionCapture()
+    recorder = TrajectoryRecorder(str(tmp_path / 'trajectory.traj'), capacity=4)  # Kilkukrotne powiększenie pliku
+    simulation.add_observer(capture)
+    simulation.add_observer(recorder)
+    simulation.run_headless(STEPS)
+
+    trajectory = Trajectory(str(tmp_path / 'trajectory.traj'))
+    scale = trajectory.metadata['scale']
+    assert scale == position_scale(size, size)
+    assert len(trajectory) == STEPS
+
+    # Pozycje odtworzone z int16 różnią się od pozycji silnika o mniej niż krok kwantyzacji
+    for step, (x, y, state) in enumerate(capture.frames):
+        replay_x, replay_y, replay_state = trajectory.frame(step)
+        assert np.max(np.abs(replay_x - x)) < 1 / scale
+        assert np.max(np.abs(replay_y - y)) < 1 / scale
+        np.testing.assert_array_equal(replay_state, state)
+
+    np.testing.assert_array_equal(trajectory.state_counts(), [list(counts.values())
+                                                              for counts in simulation.recorder.state_history()])
+
+    # Klatka odtworzona z trajektorii jest identyczna z klatką narysowaną z pozycji silnika
+    metadata = trajectory.metadata
+    rasterizer = FrameRasterizer(metadata['width'], metadata['height'], metadata['agent_size'],
+                                 metadata['rectangles'], downscale=4)
+    for step in (0, STEPS // 2, STEPS - 1):
+        np.testing.assert_array_equal(rasterizer.rasterize(*trajectory.frame(step)),
+                                      rasterizer.rasterize(*capture.frames[step]))
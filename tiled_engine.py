@@ -0,0 +1,365 @@
+import math
+import multiprocessing
+import threading
+import traceback
+import weakref
+from multiprocessing.connection import wait
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from counter_random import CounterRandom
+from engine import AGENT_ARRAYS, E, I, R, VectorizedEngine
+from scheduler import TransitionScheduler
+
+# Tablice zapisywane przez właściciela po fazie ruchu i po fazie przejść stanów
+MOVEMENT_ARRAYS = ('x', 'y', 'direction_x', 'direction_y', 'destination_x', 'destination_y', 'quick_travelling',
+                   'quick_travelling_counter', 'time_to_spend_in_central_location', 'quarantined', 'location')
+TRANSITION_ARRAYS = ('state', 'state_entered_at')
+BARRIER_TIMEOUT = 600  # Sekundy oczekiwania na pozostałe kafelki, po których krok kończy się błędem
+
+
+def tile_of(x, y, tiles_x, tiles_y, width, height):
+    """Numer kafelka zawierającego punkt (x, y); punkty poza planszą należą do najbliższego kafelka brzegowego."""
+    column = np.clip(np.floor_divide(x, width / tiles_x), 0, tiles_x - 1).astype(np.int64)
+    row = np.clip(np.floor_divide(y, height / tiles_y), 0, tiles_y - 1).astype(np.int64)
+    return column * tiles_y + row
+
+
+def tile_with_halo(tile, x, y, halo, tiles_x, tiles_y, width, height):
+    """Maska agentów kafelka `tile` razem z pasem o szerokości `halo` wokół niego (kafelki brzegowe są otwarte
+    na zewnątrz planszy, tak jak w tile_of)."""
+    column, row = divmod(tile, tiles_y)
+    tile_width, tile_height = width / tiles_x, height / tiles_y
+    low_x = column * tile_width - halo if column > 0 else -np.inf
+    high_x = (column + 1) * tile_width + halo if column < tiles_x - 1 else np.inf
+    low_y = row * tile_height - halo if row > 0 else -np.inf
+    high_y = (row + 1) * tile_height + halo if row < tiles_y - 1 else np.inf
+    return (x >= low_x) & (x < high_x) & (y >= low_y) & (y < high_y)
+
+
+def neighbour_tiles(tile, halo, tiles_x, tiles_y, width, height):
+    """Kafelki (bez samego `tile`), na których mogą leżeć agenci z pasu o szerokości `halo` wokół kafelka."""
+    column, row = divmod(tile, tiles_y)
+    reach_x = math.ceil(halo / (width / tiles_x))
+    reach_y = math.ceil(halo / (height / tiles_y))
+    return [other_column * tiles_y + other_row
+            for other_column in range(max(column - reach_x, 0), min(column + reach_x, tiles_x - 1) + 1)
+            for other_row in range(max(row - reach_y, 0), min(row + reach_y, tiles_y - 1) + 1)
+            if (other_column, other_row) != (column, row)]
+
+
+class TileScheduler(TransitionScheduler):
+    """TransitionScheduler własnych agentów kafelka, zachowywany między krokami.
+
+    Indeksy lokalnego silnika zmieniają się w każdej fazie, więc kalendarz i zbiór aktywnych są zapisane
+    w numerach agentów całej populacji, a `bind` przekłada je na agentów wczytanych do silnika. Planowani są tylko
+    własni agenci; wpisy agentów, którzy opuścili kafelek, są pomijane, a nowy właściciel planuje ich od nowa
+    (`adopt`)."""
+
+    def __init__(self, config):
+        super().__init__(0, config)
+        self.active_ids = np.zeros(0, dtype=np.int64)  # Numery aktywnych własnych agentów (posortowane)
+        self.bind(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=bool))
+
+    def bind(self, agent_ids, owned):
+        """Wiąże kalendarz z agentami lokalnego silnika: ich posortowanymi numerami i maską własnych agentów."""
+        self.agent_ids = agent_ids
+        self.owned = owned
+        self.active = owned & np.isin(agent_ids, self.active_ids)
+
+    def adopt(self, agents, state, entered_at, tick):
+        """Planuje od ticku `tick` przejścia agentów `agents` (numery w populacji) przejętych przez kafelek."""
+        for code in (E, I, R):
+            chosen = state == code
+            self.schedule(agents[chosen], code, entered_at[chosen], tick)
+
+    def forget(self, agents):
+        """Usuwa agentów `agents` (numery w populacji) ze zbioru aktywnych."""
+        self.active_ids = np.setdiff1d(self.active_ids, agents)
+
+    def enter(self, agents, state, entered_at, first_check):
+        agents = np.asarray(agents, dtype=np.int64)
+        self.active[agents] = False
+        owned = self.owned[agents]
+        ids = self.agent_ids[agents]
+        self.forget(ids)
+        entered_at = np.broadcast_to(np.asarray(entered_at, dtype=np.int64), agents.shape)
+        self.schedule(ids[owned], state, entered_at[owned], first_check)
+
+    def advance(self, tick, entered_at_of):
+        for agents, entered_at in self.wheel.pop(tick, ()):
+            position = np.minimum(np.searchsorted(self.agent_ids, agents), max(len(self.agent_ids) - 1, 0))
+            found = (self.agent_ids[position] == agents) & self.owned[position] if len(self.agent_ids) \
+                else np.zeros(len(agents), dtype=bool)
+            local = position[found]
+            current = entered_at_of(local) == entered_at[found]
+            self.active[local[current]] = True
+            self.active_ids = np.union1d(self.active_ids, agents[found][current])
+
+
+class TileWorker:
+    """Właściciel jednego kafelka planszy w osobnym procesie.
+
+    Populacja leży we wspólnej pamięci. Kafelek pamięta posortowane numery swoich agentów i publikuje je we
+    wspólnej tablicy `order` (każdy kafelek ma w niej swój odcinek). W każdej fazie kopiuje swoich agentów razem
+    z pasem sąsiadów (halo, wybieranym tylko z odcinków sąsiednich kafelków) do lokalnego VectorizedEngine,
+    wykonuje na nim fazy silnika jednoprocesowego i zapisuje z powrotem tylko własnych agentów. Po ruchu agenci,
+    którzy przeszli przez granicę kafelka (także w quick travel do Central Location lub kwarantanny), są
+    przekazywani nowemu właścicielowi razem z planem przejść, więc praca kafelka zależy od liczby jego agentów
+    i sąsiadów, a nie od całej populacji. Lokalny silnik losuje z CounterRandom o wspólnym kluczu, według numerów
+    agentów w całej populacji, więc agent dostaje te same liczby losowe niezależnie od kafelka."""
+
+    def __init__(self, tile, layout, config, central_locations, quarantine, width, height, key, barrier):
+        self.tile = tile
+        self.config = config
+        self.barrier = barrier
+        self.blocks = {name: SharedMemory(name=block_name) for name, (block_name, _, _) in layout.items()}
+        self.shared = {name: np.ndarray(shape, dtype=dtype, buffer=self.blocks[name].buf)
+                       for name, (_, shape, dtype) in layout.items()}
+        empty = {name: self.shared[name][:0] for name in AGENT_ARRAYS}  # Agentów wczytuje dopiero load
+        self.engine = VectorizedEngine(empty, config, central_locations, quarantine, width, height,
+                                       TileScheduler(config), random=CounterRandom(key=key))
+        self.tiles = (config.tiles_x, config.tiles_y, config.width, config.height)
+        self.owned = np.zeros(0, dtype=np.int64)  # Posortowane numery własnych agentów
+        self.next_tick = None  # Kolejny oczekiwany tick; inny wymusza odtworzenie kafelka ze wspólnej pamięci
+
+    def segment(self, tile, length=None):
+        """Odcinek tablicy `order` kafelka `tile` - jego agenci albo (z `length`) pierwsze `length` wpisów."""
+        offset = self.shared['tile_offsets'][tile]
+        return self.shared['order'][offset:offset + (self.shared['tile_counts'][tile] if length is None else length)]
+
+    def publish(self):
+        """Zapisuje numery własnych agentów w odcinku kafelka tablicy `order` (wszystkie kafelki naraz)."""
+        shared = self.shared
+        shared['tile_counts'][self.tile] = len(self.owned)
+        self.barrier.wait()  # Wszystkie kafelki skończyły czytać poprzednie odcinki i podały swoje liczności
+        shared['tile_offsets'][self.tile] = shared['tile_counts'][:self.tile].sum()
+        self.segment(self.tile)[:] = self.owned
+        self.barrier.wait()
+
+    def rebuild(self, tick):
+        """Własni agenci i plan przejść kafelka ze stanu populacji we wspólnej pamięci (pierwszy krok,
+        także po wczytaniu checkpointu) - jedyne przejrzenie całej populacji."""
+        shared = self.shared
+        self.owned = np.flatnonzero(tile_of(shared['x'], shared['y'], *self.tiles) == self.tile)
+        shared['owner'][self.owned] = self.tile
+        self.engine.scheduler = TileScheduler(self.config)
+        self.engine.scheduler.adopt(self.owned, shared['state'][self.owned], shared['state_entered_at'][self.owned],
+                                    tick)
+        self.publish()
+
+    def halo_agents(self, halo):
+        """Numery agentów sąsiednich kafelków leżących w pasie o szerokości `halo` wokół kafelka."""
+        segments = [self.segment(tile) for tile in neighbour_tiles(self.tile, halo, *self.tiles)]
+        candidates = np.concatenate(segments) if segments else np.zeros(0, dtype=np.int64)
+        inside = tile_with_halo(self.tile, self.shared['x'][candidates], self.shared['y'][candidates], halo,
+                                *self.tiles)
+        return candidates[inside]
+
+    def load(self, halo):
+        """Kopiuje agentów kafelka i jego halo do lokalnego silnika; zwraca ich indeksy i maskę własnych agentów."""
+        neighbours = self.halo_agents(halo) if halo > 0 else np.zeros(0, dtype=np.int64)
+        indices = np.concatenate((self.owned, neighbours))
+        order = np.argsort(indices, kind='stable')
+        indices = indices[order]
+        owned = order < len(self.owned)
+        for name in AGENT_ARRAYS:
+            setattr(self.engine, name, self.shared[name][indices])
+        self.engine.num_agents = len(indices)
+        self.engine.agent_ids = indices
+        self.engine.invalidate_rates()
+        return indices, owned
+
+    def store(self, names, indices, owned):
+        for name in names:
+            self.shared[name][indices[owned]] = getattr(self.engine, name)[owned]
+
+    def migrate(self, tick):
+        """Po ruchu przekazuje agentów, którzy opuścili kafelek, nowym właścicielom i przejmuje przybyłych."""
+        shared = self.shared
+        owner = tile_of(shared['x'][self.owned], shared['y'][self.owned], *self.tiles)
+        leaving = owner != self.tile
+        emigrants = self.owned[leaving]
+        shared['owner'][emigrants] = owner[leaving]
+        self.segment(self.tile, len(emigrants))[:] = emigrants  # Odcinek kafelka nie jest już czytany
+        shared['emigrant_counts'][self.tile] = len(emigrants)
+        self.owned = self.owned[~leaving]
+        self.engine.scheduler.forget(emigrants)
+        self.barrier.wait()  # Wszyscy wyjeżdżający są zapisani
+
+        arrivals = [self.segment(tile, shared['emigrant_counts'][tile]) for tile in range(len(shared['tile_counts']))
+                    if tile != self.tile]
+        immigrants = np.concatenate(arrivals) if arrivals else np.zeros(0, dtype=np.int64)
+        immigrants = immigrants[shared['owner'][immigrants] == self.tile]
+        self.owned = np.sort(np.concatenate((self.owned, immigrants)))
+        self.engine.scheduler.adopt(immigrants, shared['state'][immigrants], shared['state_entered_at'][immigrants],
+                                    tick)
+        self.publish()
+
+    def step(self, tick):
+        config = self.config
+        engine = self.engine
+        if tick != self.next_tick:
+            self.rebuild(tick)
+        engine.tick = tick
+
+        # Faza ruchu - halo potrzebne tylko do odpychania od sąsiadów
+        repulsion = config.social_distancing_repulsion_force > 0
+        indices, owned = self.load(config.social_distancing_repulsion_radius if repulsion else 0)
+        engine.visit_central_location()
+        engine.visit_quarantine()
+        engine.change_direction()
+        if repulsion:
+            engine.board_grid.build(engine.x.copy(), engine.y.copy())
+            engine.calculate_repulsion()
+        engine.move()
+        self.barrier.wait()  # Wszystkie kafelki skończyły czytać pozycje sprzed ruchu
+        self.store(MOVEMENT_ARRAYS, indices, owned)
+        self.migrate(tick)
+
+        # Faza przejść stanów - halo o szerokości promienia zakażenia, własność według pozycji po ruchu
+        indices, owned = self.load(config.infection_radius)
+        engine.scheduler.bind(indices, owned)
+        engine.board_grid.build(engine.x.copy(), engine.y.copy())
+        engine.transition()
+        self.barrier.wait()
+        self.store(TRANSITION_ARRAYS, indices, owned)
+        self.next_tick = tick + 1
+
+    def run(self, connection):
+        while True:
+            command, argument = connection.recv()
+            if command == 'close':
+                break
+            try:
+                if command == 'step':
+                    self.step(argument)
+                elif command == 'set_rng_state':
+                    self.engine.set_rng_state(argument)
+                connection.send(('ok', None))
+            except threading.BrokenBarrierError:
+                self.next_tick = None
+                connection.send(('aborted', traceback.format_exc()))
+            except Exception:
+                self.next_tick = None
+                self.barrier.abort()  # Pozostałe kafelki nie czekają w nieskończoność na ten kafelek
+                connection.send(('error', traceback.format_exc()))
+        for block in self.blocks.values():
+            block.close()
+
+
+def run_tile_worker(connection, *arguments):
+    TileWorker(*arguments).run(connection)
+
+
+def close_workers(connections, processes, blocks):
+    for connection, process in zip(connections, processes):
+        if process.is_alive():
+            connection.send(('close', None))
+    for process in processes:
+        process.join(BARRIER_TIMEOUT)
+        if process.is_alive():
+            process.terminate()
+    for block in blocks:
+        block.close()
+        block.unlink()
+
+
+class TiledEngine(VectorizedEngine):
+    """Silnik z dekompozycją domeny: plansza jest podzielona na Config.tiles_x x Config.tiles_y kafelków,
+    każdy obsługiwany przez osobny proces (TileWorker) pracujący na wspólnej pamięci.
+
+    Tablice agentów (AGENT_ARRAYS) tego obiektu są widokami na wspólną pamięć, więc zapis historii, rysowanie
+    i checkpointy działają jak dla VectorizedEngine. Kafelki losują z CounterRandom o kluczu tego silnika, więc
+    przebieg nie zależy od podziału na kafelki i bez odpychania jest bitowo zgodny z silnikiem jednoprocesowym
+    (z odpychaniem siły mogą się różnić kolejnością sumowania, czyli błędem zaokrągleń). Błąd w kafelku przerywa
+    krok we wszystkich kafelkach i jest zgłaszany jako RuntimeError."""
+
+    def __init__(self, columns, config, central_locations, quarantine, width, height, scheduler, random=None):
+        super().__init__(columns, config, central_locations, quarantine, width, height, scheduler, random)
+
+        tiles = config.tiles_x * config.tiles_y
+        self.blocks = []
+        layout = {}
+        for name in AGENT_ARRAYS:
+            setattr(self, name, self.share(layout, name, getattr(self, name)))
+        # Podział populacji między kafelki: właściciel agenta i odcinki kafelków w tablicy `order`
+        self.share(layout, 'owner', np.zeros(self.num_agents, dtype=np.int64))
+        self.share(layout, 'order', np.zeros(self.num_agents, dtype=np.int64))
+        for name in ('tile_counts', 'tile_offsets', 'emigrant_counts'):
+            self.share(layout, name, np.zeros(tiles, dtype=np.int64))
+
+        context = multiprocessing.get_context('spawn')
+        self.barrier = context.Barrier(tiles, timeout=BARRIER_TIMEOUT)  # Synchronizacja faz między kafelkami
+        self.connections, self.processes = [], []
+        for tile in range(tiles):
+            connection, worker_connection = context.Pipe()
+            process = context.Process(target=run_tile_worker, daemon=True,
+                                      args=(worker_connection, tile, layout, config, central_locations, quarantine,
+                                            width, height, self.random.state(), self.barrier))
+            process.start()
+            worker_connection.close()  # Koniec procesu kafelka zamyka połączenie (recv zgłasza EOFError)
+            self.connections.append(connection)
+            self.processes.append(process)
+        self.finalizer = weakref.finalize(self, close_workers, self.connections, self.processes, self.blocks)
+
+    def share(self, layout, name, values):
+        """Kopia `values` we wspólnej pamięci, opisana w `layout` dla procesów kafelków."""
+        block = SharedMemory(create=True, size=max(values.nbytes, 1))
+        shared = np.ndarray(values.shape, dtype=values.dtype, buffer=block.buf)
+        shared[...] = values
+        self.blocks.append(block)
+        layout[name] = (block.name, values.shape, values.dtype)
+        return shared
+
+    def command(self, command, arguments=None):
+        """Wysyła polecenie do wszystkich kafelków i zwraca ich odpowiedzi; błąd kafelka zgłasza jako RuntimeError
+        (w pierwszej kolejności pierwotny błąd, a nie przerwane przez niego oczekiwanie pozostałych kafelków)."""
+        arguments = arguments if arguments is not None else [None] * len(self.connections)
+        replies = [None] * len(self.connections)
+        pending = set(range(len(self.connections)))
+        for tile, (connection, argument) in enumerate(zip(self.connections, arguments)):
+            try:
+                connection.send((command, argument))
+            except OSError:
+                replies[tile] = ('error', "Proces kafelka zakończył się nieoczekiwanie")
+                pending.discard(tile)
+                self.barrier.abort()
+        while pending:
+            ready = wait([self.connections[tile] for tile in pending] +
+                         [self.processes[tile].sentinel for tile in pending])
+            for tile in sorted(pending):
+                connection = self.connections[tile]
+                if connection in ready or connection.poll():
+                    try:
+                        replies[tile] = connection.recv()
+                    except EOFError:
+                        replies[tile] = ('error', "Proces kafelka zakończył się nieoczekiwanie")
+                elif self.processes[tile].sentinel in ready:
+                    replies[tile] = ('error', "Proces kafelka zakończył się nieoczekiwanie")
+                    self.barrier.abort()  # Pozostałe kafelki nie doczekają się na barierze zakończonego procesu
+                else:
+                    continue
+                pending.discard(tile)
+        for status in ('error', 'aborted'):
+            for tile, (reply_status, detail) in enumerate(replies):
+                if reply_status == status:
+                    raise RuntimeError(f"Błąd w kafelku {tile} (polecenie {command}):\n{detail}")
+        return [detail for _, detail in replies]
+
+    def step(self, tick):
+        """Krok `tick` wykonany równolegle przez wszystkie kafelki."""
+        self.tick = tick
+        if self.profiler is not None:
+            self.profiler.start()
+        self.command('step', [tick] * len(self.connections))
+        self.lap('tiles')
+
+    def set_rng_state(self, state):
+        super().set_rng_state(state)
+        self.command('set_rng_state', [state] * len(self.connections))
+
+    def close(self):
+        """Zatrzymuje procesy kafelków i zwalnia wspólną pamięć."""
+        self.finalizer()
@@ -0,0 +1,147 @@
+import json
+
+import numpy as np
+
+from engine import STATES
+from rasterizer import frame_rectangles
+
+TRAJECTORY_MAGIC = b'SEIRDTRJ'
+HEADER_SIZE = 4096  # Nagłówek: magic i metadane JSON dopełnione spacjami; dalej kolejne kroki
+POSITION_SCALE = 8  # Największa dokładność zapisu pozycji: 1/8 piksela
+POSITION_MARGIN = 64  # Zapas (w pikselach) na wyjście agenta poza krawędź planszy przed odbiciem
+
+
+def trajectory_dtype(num_agents):
+    """Rekord jednego kroku: pozycje x i y (int16, w 1/scale piksela - zob. position_scale) i kody stanów (uint8)."""
+    return np.dtype([('x', '<i2', (num_agents,)), ('y', '<i2', (num_agents,)), ('state', 'u1', (num_agents,))])
+
+
+def position_scale(width, height):
+    """Dokładność zapisu pozycji na planszy `width` x `height`: największa potęga dwójki nie większa od
+    POSITION_SCALE, przy której pozycje (z zapasem POSITION_MARGIN) mieszczą się w int16."""
+    extent = max(width, height) + POSITION_MARGIN
+    limit = np.iinfo(np.int16).max
+    if extent > limit:
+        raise ValueError(f"Plansza {width} x {height} jest za duża dla zapisu trajektorii (pozycje int16)")
+    scale = POSITION_SCALE
+    while extent * scale > limit:
+        scale //= 2
+    return scale
+
+
+def quantize_positions(values, scale):
+    """Pozycje w jednostkach 1/scale piksela. Obcięcie w stronę zera (jak przy rysowaniu), więc agent odtworzony
+    z trajektorii trafia w ten sam piksel."""
+    limits = np.iinfo(np.int16)
+    return np.clip(np.trunc(np.asarray(values) * scale), limits.min, limits.max).astype(np.int16)
+
+
+def write_header(file, metadata):
+    header = TRAJECTORY_MAGIC + json.dumps(metadata).encode()
+    if len(header) > HEADER_SIZE:
+        raise ValueError("Metadane trajektorii nie mieszczą się w nagłówku")
+    file.seek(0)
+    file.write(header.ljust(HEADER_SIZE, b' '))
+    file.flush()
+
+
+class TrajectoryRecorder:
+    """Obserwator zapisujący w każdym kroku pozycje i stany wszystkich agentów do pliku mapowanego w pamięci.
+
+    Zapis kosztuje jedną kwantyzację pozycji na krok (5 bajtów na agenta), więc symulacje wsadowe mogą go włączyć
+    bez rysowania, a animację dowolnego fragmentu przebiegu można potem odtworzyć przez replay.py. Plik jest
+    powiększany dwukrotnie w razie potrzeby, a liczba zapisanych kroków jest aktualizowana w nagłówku po każdym
+    kroku, więc plik przerwanej symulacji też da się odtworzyć."""
+
+    def __init__(self, filename, scale=None, capacity=256):
+        self.filename = filename
+        self.scale = scale  # Domyślnie position_scale planszy symulacji
+        self.capacity = capacity
+        self.length = 0
+        self.metadata = None
+        self.file = None
+        self.data = None
+
+    def open(self, simulation):
+        config = simulation.config
+        if self.scale is None:
+            self.scale = position_scale(config.width, config.height)
+        self.metadata = {
+            'version': 1,
+            'num_agents': len(simulation.current_states()[0]),
+            'width': config.width,
+            'height': config.height,
+            'agent_size': simulation.agent_size(),
+            'rectangles': [list(map(int, rectangle)) for rectangle in frame_rectangles(simulation)],
+            'scale': self.scale,
+            'states': list(STATES),
+            'first_tick': simulation.tick - 1,
+            'length': 0,
+        }
+        self.file = open(self.filename, 'w+b')
+        write_header(self.file, self.metadata)
+        self.map(self.capacity)
+
+    def map(self, capacity):
+        """Mapuje w pamięci miejsce na `capacity` kroków (powiększając plik)."""
+        dtype = trajectory_dtype(self.metadata['num_agents'])
+        if self.data is not None:
+            self.data.flush()
+        self.file.truncate(HEADER_SIZE + capacity * dtype.itemsize)
+        self.data = np.memmap(self.file, dtype=dtype, mode='r+', offset=HEADER_SIZE, shape=(capacity,))
+        self.capacity = capacity
+
+    def on_step(self, simulation):
+        if self.file is None:
+            self.open(simulation)
+        if self.length == self.capacity:
+            self.map(2 * self.capacity)
+
+        x, y = simulation.positions()
+        record = self.data[self.length]
+        record['x'] = quantize_positions(x, self.scale)
+        record['y'] = quantize_positions(y, self.scale)
+        record['state'] = simulation.current_states()[0]
+        self.length += 1
+        self.metadata['length'] = self.length
+        write_header(self.file, self.metadata)
+
+    def on_finish(self, simulation):
+        if self.file is None:
+            return
+        self.data.flush()
+        self.data = None
+        self.file.truncate(HEADER_SIZE + self.length * trajectory_dtype(self.metadata['num_agents']).itemsize)
+        self.file.close()
+        self.file = None
+
+
+class Trajectory:
+    """Trajektoria wczytana z pliku TrajectoryRecorder; x, y (w pikselach) i state czytane są leniwie z mapowanego
+    pliku, więc można odtwarzać fragmenty przebiegów dłuższych niż dostępna pamięć."""
+
+    def __init__(self, filename):
+        with open(filename, 'rb') as file:
+            header = file.read(HEADER_SIZE)
+        if not header.startswith(TRAJECTORY_MAGIC):
+            raise ValueError(f"{filename} nie jest plikiem trajektorii")
+        self.metadata = json.loads(header[len(TRAJECTORY_MAGIC):].decode())
+
+        dtype = trajectory_dtype(self.metadata['num_agents'])
+        length = self.metadata['length']
+        self.data = np.memmap(filename, dtype=dtype, mode='r', offset=HEADER_SIZE, shape=(length,)) if length \
+            else np.zeros(0, dtype=dtype)
+
+    def __len__(self):
+        return len(self.data)
+
+    def frame(self, step):
+        """Pozycje x, y (w pikselach) i kody stanów agentów w kroku `step`."""
+        record = self.data[step]
+        scale = self.metadata['scale']
+        return record['x'] / scale, record['y'] / scale, record['state']
+
+    def state_counts(self):
+        """Liczba agentów w każdym stanie w każdym kroku (kolejność STATES)."""
+        states = len(self.metadata['states'])
+        return np.stack([np.bincount(record['state'], minlength=states) for record in self.data])
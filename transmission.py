@@ -0,0 +1,42 @@
+import numpy as np
+
+
+NO_INFECTOR = -1  # Zakażenie bez zakażającego (początkowo zakażeni)
+
+
+def count_infectious_contacts(board_grid, radius, infectious, susceptible, x=None, y=None, return_pairs=False):
+    """Liczba zakaźnych agentów w promieniu `radius` od każdego podatnego agenta.
+
+    Przeszukiwanie zaczyna się od zbioru zakaźnych (zwykle małego) i przez indeks przestrzenny znajduje
+    podatnych sąsiadów, więc koszt zależy od liczby zakaźnych, a nie od wielkości populacji.
+    Z `return_pairs` zwraca też same kontakty jako tablice (zakaźny, podatny)."""
+    sources, exposed = board_grid.pairs(radius, sources=infectious, targets=susceptible, x=x, y=y)
+    contacts = np.bincount(exposed, minlength=len(susceptible))
+    return (contacts, (sources, exposed)) if return_pairs else contacts
+
+
+def infected_by_contacts(contacts, infection_rate, random_values):
+    """Indeksy agentów zarażonych w tym kroku.
+
+    Każdy kontakt zaraża niezależnie z prawdopodobieństwem `infection_rate` agenta, więc łącznie zarażenie
+    następuje z prawdopodobieństwem 1 - (1 - p)^k - tak samo jak przy osobnym losowaniu dla każdego sąsiada.
+    `random_values(agents)` zwraca liczby z przedziału [0, 1) dla agentów o podanych indeksach - tych, którzy
+    mieli jakikolwiek kontakt."""
+    candidates = np.flatnonzero(contacts)
+    infection_proba = 1 - (1 - infection_rate[candidates]) ** contacts[candidates]
+    return candidates[random_values(candidates) < infection_proba]
+
+
+def choose_infectors(pairs, infected, random_values):
+    """Zakażający każdego z agentów `infected` (rosnące indeksy) - jeden z jego zakaźnych kontaktów `pairs`.
+
+    Każdy kontakt zaraża z tym samym prawdopodobieństwem, więc pod warunkiem zarażenia każdy z nich jest równie
+    prawdopodobnym źródłem; wybierany jest kontakt z największą wylosowaną wartością `random_values(n)`."""
+    sources, targets = pairs
+    candidate = np.zeros(len(targets), dtype=bool) if len(infected) == 0 else np.isin(targets, infected)
+    sources, targets = sources[candidate], targets[candidate]
+    order = np.lexsort((random_values(len(targets)), targets))
+    sources, targets = sources[order], targets[order]
+    last = np.ones(len(targets), dtype=bool)
+    last[:-1] = targets[1:] != targets[:-1]
+    return sources[last]
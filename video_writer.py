@@ -0,0 +1,125 @@
+import os
+import queue
+import threading
+
+import numpy as np
+from PIL import GifImagePlugin, Image
+
+from rasterizer import FRAME_COLORS, PALETTE
+
+# Stała paleta GIF: tło, obramowania lokalizacji i kolory stanów agentów. Dzięki niej każdą klatkę
+# można zakodować od razu, bez zbierania wszystkich klatek w celu wyznaczenia wspólnej palety.
+GIF_COLORS = FRAME_COLORS
+
+
+def gif_palette_image():
+    palette = [channel for color in GIF_COLORS for channel in color]
+    image = Image.new('P', (1, 1))
+    image.putpalette(palette + palette[:3] * (256 - len(GIF_COLORS)))
+    return image
+
+
+class GifStreamWriter:
+    """Przyrostowy zapis pliku GIF - każda klatka trafia na dysk od razu po dodaniu."""
+
+    def __init__(self, filename, duration=40, loop=0):
+        self.file = open(filename, 'wb')
+        self.duration = duration
+        self.loop = loop
+        self.palette = gif_palette_image()
+        self.header_written = False
+
+    def append_data(self, frame):
+        """Koduje klatkę i dopisuje ją do pliku (interfejs zgodny z writerami imageio).
+
+        Klatka indeksów kolorów GIF_COLORS (z FrameRasterizer) jest używana bez kopiowania i kwantyzacji."""
+        if frame.ndim == 2:
+            image = Image.frombuffer('P', (frame.shape[1], frame.shape[0]), frame, 'raw', 'P', 0, 1)
+            image.putpalette(self.palette.getpalette())
+        else:
+            image = Image.fromarray(frame, 'RGB').quantize(palette=self.palette, dither=Image.Dither.NONE)
+        if not self.header_written:
+            header, _ = GifImagePlugin.getheader(image, info={'loop': self.loop, 'duration': self.duration})
+            self.file.writelines(header)
+            self.header_written = True
+        self.file.writelines(GifImagePlugin.getdata(image, duration=self.duration))
+
+    def close(self):
+        if self.header_written:
+            self.file.write(b';')  # Zakończenie pliku GIF
+        self.file.close()
+
+
+class StreamingVideoWriter:
+    """Zapisuje klatki animacji na dysk w trakcie symulacji, w osobnym wątku.
+
+    Klatki trafiają do kolejki o ograniczonym rozmiarze, więc zużycie pamięci nie zależy od długości symulacji.
+    Format wynika z rozszerzenia pliku: `.gif` jest kodowany przez Pillow, a `.mp4` (i inne formaty wideo)
+    przez imageio z wtyczką ffmpeg. `stride` zapisuje co n-tą klatkę, a `downscale` zmniejsza klatki
+    n-krotnie (najbliższy sąsiad, więc kolory stanów pozostają dokładne)."""
+
+    def __init__(self, filename, fps=25, stride=1, downscale=1, queue_size=16):
+        self.filename = filename
+        self.fps = fps
+        self.stride = max(1, int(stride))
+        self.downscale = max(1, int(downscale))
+        self.frame_count = 0
+        self.error = None
+
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.thread = threading.Thread(target=self.write_frames, daemon=True)
+        self.thread.start()
+
+    def keeps_next_frame(self):
+        """Czy kolejna klatka zostanie zapisana (przy `stride` > 1 pozostałych nie trzeba w ogóle rysować)."""
+        return self.frame_count % self.stride == 0
+
+    def skip(self):
+        """Pomija klatkę, która i tak nie zostałaby zapisana."""
+        self.frame_count += 1
+
+    def append(self, frame):
+        """Dodaje klatkę (tablica uint8 o kształcie wysokość x szerokość x 3 albo wysokość x szerokość z indeksami
+        kolorów GIF_COLORS); blokuje, gdy kolejka jest pełna. Klatka nie jest kopiowana, więc nie wolno jej
+        potem zmieniać."""
+        if self.error is not None:
+            raise self.error
+        if self.keeps_next_frame():
+            if self.downscale > 1:
+                frame = frame[::self.downscale, ::self.downscale]
+            self.queue.put(np.ascontiguousarray(frame))
+        self.frame_count += 1
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+        if self.error is not None:
+            raise self.error
+
+    def open_writer(self):
+        if os.path.splitext(self.filename)[1].lower() == '.gif':
+            return GifStreamWriter(self.filename, duration=round(1000 / self.fps))
+
+        import imageio
+        return imageio.get_writer(self.filename, fps=self.fps, macro_block_size=1)
+
+    def write_frames(self):
+        writer = None
+        try:
+            while True:
+                frame = self.queue.get()
+                if frame is None:
+                    break
+                if writer is None:
+                    writer = self.open_writer()
+                if frame.ndim == 2 and not isinstance(writer, GifStreamWriter):
+                    frame = PALETTE[frame]  # Wideo przyjmuje tylko klatki RGB
+                writer.append_data(frame)
+        except Exception as error:
+            self.error = error
+            # Opróżnienie kolejki, żeby wątek symulacji nie zablokował się na pełnej kolejce
+            while self.queue.get() is not None:
+                pass
+        finally:
+            if writer is not None:
+                writer.close()